@@ -6,12 +6,31 @@ set -o errexit
 python -m pip install --upgrade pip
 pip install -r requirements.txt
 
-# Collect static files
-python manage.py collectstatic --no-input
-
 # Run database migrations
 python manage.py migrate
 
+# Create the table behind the shared database cache (idempotent)
+python manage.py createcachetable
+
+# Collect static files (after migrating: the main.css purge reads page content)
+python manage.py collectstatic --no-input
+
+# Report how much of main.css the purge dropped (also in staticfiles/staticfiles-purge.json)
+python manage.py purge_css
+
+# Copy site images uploaded before the public media storage existed (idempotent)
+python manage.py migrate_public_media
+
+# Render responsive WebP/JPEG variants for images that do not have them yet
+python manage.py generate_image_derivatives
+
+# Build the Font Awesome subset for the icons in use (templates may have changed)
+python manage.py subset_icons
+
+# Inline above-the-fold CSS per page template (uses the content just migrated;
+# written to CRITICAL_CSS_ROOT, not the committed fixtures/critical_css snapshots)
+python manage.py extract_critical_css
+
 # Load initial content (optional - uncomment when you have fixtures)
 # python manage.py loaddata fixtures/site_content.json
 
@@ -1,17 +1,17 @@
-import mimetypes
-from pathlib import Path
-from urllib.parse import quote
-
 from django.contrib import admin
 from django.core.exceptions import PermissionDenied
-from django.http import FileResponse
+from django.db.models import Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from django.urls import path, reverse
 from django.utils.html import format_html
 from .models import (Banner, Feature, Post, MiniPost, ContactInfo, Footer,
                     GenericPageSection, PageContent, DynamicPage,
                     IntakeForm, IntakeField, IntakeSubmission, IntakeFile,
-                    NavigationItem, SocialMediaLink)
+                    NavigationItem, SocialMediaLink, BackgroundJob,
+                    needs_followup_q)
+from .file_delivery import intake_file_response
+from .site_chrome import get_site_chrome
+from .staff_choices import CachedStaffAutocompleteSelect
 
 # Configure admin site headers
 admin.site.site_header = "XFED Website Admin"
@@ -368,6 +368,23 @@ class IntakeFileInline(admin.TabularInline):
         )
     preview_link.short_description = "Preview"
 
+class NeedsFollowupFilter(admin.SimpleListFilter):
+    title = "needs follow-up"
+    parameter_name = 'needs_followup'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('yes', 'Yes'),
+            ('no', 'No'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(needs_followup_q())
+        if self.value() == 'no':
+            return queryset.exclude(needs_followup_q())
+        return queryset
+
 @admin.register(IntakeSubmission)
 class IntakeSubmissionAdmin(admin.ModelAdmin):
     list_display = (
@@ -375,11 +392,13 @@ class IntakeSubmissionAdmin(admin.ModelAdmin):
         'submitted_at', 'days_since_submission', 'needs_followup_flag', 'has_files'
     )
     list_filter = (
-        'status', 'priority', 'form', 'assigned_to',
+        'status', 'priority', NeedsFollowupFilter, 'form',
+        ('assigned_to', admin.RelatedOnlyFieldListFilter),
         'submitted_at', 'first_contacted_at'
     )
     list_editable = ('status', 'priority', 'assigned_to')
-    search_fields = ('data', 'admin_notes')
+    autocomplete_fields = ('assigned_to',)
+    search_fields = ('contact_name', 'contact_email', 'contact_phone', 'data', 'admin_notes')
     ordering = ['-submitted_at']
     readonly_fields = (
         'form', 'submitted_at', 'ip_address', 'data', 'status_updated_at',
@@ -425,7 +444,8 @@ class IntakeSubmissionAdmin(admin.ModelAdmin):
         custom_urls = [
             path(
                 '<int:submission_id>/file/<int:file_id>/preview/',
-                self.admin_site.admin_view(self.preview_uploaded_file),
+                # Cache headers are set by intake_file_response, not never_cache.
+                self.admin_site.admin_view(self.preview_uploaded_file, cacheable=True),
                 name='main_intakesubmission_file_preview',
             ),
         ]
@@ -436,20 +456,16 @@ class IntakeSubmissionAdmin(admin.ModelAdmin):
         if not self.has_view_or_change_permission(request, submission):
             raise PermissionDenied
 
-        intake_file = get_object_or_404(IntakeFile, pk=file_id, submission=submission)
-        storage_file = intake_file.file.open('rb')
-        filename = Path(intake_file.original_filename or intake_file.file.name).name
-        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
-
-        response = FileResponse(storage_file, content_type=content_type)
-        response["Content-Disposition"] = f"inline; filename*=UTF-8''{quote(filename)}"
-        return response
+        intake_file = get_object_or_404(
+            IntakeFile.objects.select_related('blob'), pk=file_id, submission=submission
+        )
+        return intake_file_response(request, intake_file)
 
     def get_client_name(self, obj):
         """Display client name"""
         return obj.get_client_name()
     get_client_name.short_description = "Client Name"
-    get_client_name.admin_order_field = 'submitted_at'  # Allow sorting
+    get_client_name.admin_order_field = 'contact_name'
 
     def get_formatted_data(self, obj):
         """Display submitted data in a readable format"""
@@ -489,15 +505,21 @@ class IntakeSubmissionAdmin(admin.ModelAdmin):
 
     def needs_followup_flag(self, obj):
         """Visual indicator for submissions needing follow-up"""
+        if hasattr(obj, 'is_followup_due'):
+            return obj.is_followup_due
         return obj.needs_followup()
     needs_followup_flag.boolean = True
     needs_followup_flag.short_description = "Needs Follow-up"
+    needs_followup_flag.admin_order_field = 'is_followup_due'
 
     def has_files(self, obj):
         """Check if submission has uploaded files"""
+        if hasattr(obj, 'has_uploaded_files'):
+            return obj.has_uploaded_files
         return obj.files.exists()
     has_files.boolean = True
     has_files.short_description = "Has Files"
+    has_files.admin_order_field = 'has_uploaded_files'
 
     # Custom actions
     def mark_as_contacted(self, request, queryset):
@@ -534,6 +556,25 @@ class IntakeSubmissionAdmin(admin.ModelAdmin):
         self.message_user(request, f"Assigned {updated} submission(s) to you.")
     assign_to_me.short_description = "Assign selected to me"
 
+    def get_queryset(self, request):
+        # Everything the changelist columns need comes from this one query.
+        return (
+            super().get_queryset(request)
+            .select_related('form', 'assigned_to')
+            .with_followup_flag()
+            .annotate(
+                has_uploaded_files=Exists(IntakeFile.objects.filter(submission=OuterRef('pk')))
+            )
+        )
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'assigned_to':
+            # Render only the selected user, labelled from the cached staff list.
+            kwargs['widget'] = CachedStaffAutocompleteSelect(
+                db_field, self.admin_site, using=kwargs.get('using')
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
     def has_add_permission(self, request):
         # Don't allow manual creation of submissions
         return False
@@ -542,17 +583,8 @@ class IntakeSubmissionAdmin(admin.ModelAdmin):
         """Add dashboard stats to the changelist view"""
         extra_context = extra_context or {}
 
-        # Get submission statistics
-        from django.db.models import Count
-        total_submissions = IntakeSubmission.objects.count()
-        new_submissions = IntakeSubmission.objects.filter(status='new').count()
-        need_followup = len([s for s in IntakeSubmission.objects.all() if s.needs_followup()])
-
-        extra_context['submission_stats'] = {
-            'total': total_submissions,
-            'new': new_submissions,
-            'need_followup': need_followup,
-        }
+        # Get submission statistics in a single aggregate query
+        extra_context['submission_stats'] = IntakeSubmission.objects.dashboard_stats()
 
         return super().changelist_view(request, extra_context)
 
@@ -726,14 +758,15 @@ class NavigationItemAdmin(admin.ModelAdmin):
 
     def has_children_indicator(self, obj):
         """Show if this menu item has dropdown children"""
-        if obj.has_children:
+        # Read from the compiled navigation tree instead of querying per row.
+        if get_site_chrome().navigation.has_children(obj.pk):
             return format_html('<span style="color: green; font-weight: bold;">✓ Has Submenu</span>')
         return format_html('<span style="color: gray;">No Submenu</span>')
     has_children_indicator.short_description = 'Submenu Status'
 
     def get_queryset(self, request):
         """Optimize query to reduce database hits"""
-        return super().get_queryset(request).select_related('parent').prefetch_related('children')
+        return super().get_queryset(request).select_related('parent')
 
     def get_readonly_fields(self, request, obj=None):
         """Make URL readonly when editing existing items to encourage using add form for complex changes"""
@@ -783,3 +816,32 @@ class SocialMediaLinkAdmin(admin.ModelAdmin):
             'description': 'Control how this social link appears'
         }),
     )
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = (
+        'task', 'payload', 'status', 'attempts', 'max_attempts', 'run_after',
+        'locked_until', 'last_error', 'created_at', 'finished_at'
+    )
+    ordering = ('-created_at',)
+    actions = ['requeue_jobs']
+
+    def has_add_permission(self, request):
+        # Jobs are only created by the application
+        return False
+
+    def requeue_jobs(self, request, queryset):
+        """Give dead-lettered jobs a fresh set of attempts"""
+        from django.utils import timezone
+        updated = queryset.filter(status=BackgroundJob.STATUS_DEAD).update(
+            status=BackgroundJob.STATUS_PENDING,
+            attempts=0,
+            run_after=timezone.now(),
+            locked_until=None,
+            finished_at=None,
+        )
+        self.message_user(request, f"Requeued {updated} dead job(s).")
+    requeue_jobs.short_description = "Requeue selected dead jobs"
@@ -0,0 +1,49 @@
+"""
+Version tokens stored in the default cache.
+
+Cached data is keyed by the current token for its namespace; invalidating
+means writing a new token, so every worker sharing the cache moves on to
+fresh keys and the stale entries simply expire.
+
+With the default DatabaseCache every read is a query, so each process keeps
+the tokens it has read for CACHE_VERSION_CHECK_INTERVAL seconds before
+asking the cache again. A bump is seen straight away by the process that
+made it and within that interval by every other worker.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Cache key -> (token, time.monotonic() when it was read).
+_local_versions = {}
+_local_versions_lock = threading.Lock()
+
+
+def get_cache_version(key):
+    """Return the current token for ``key``, creating one if none is set."""
+    interval = getattr(settings, 'CACHE_VERSION_CHECK_INTERVAL', 0)
+    now = time.monotonic()
+    local = _local_versions.get(key)
+    if local is not None and now - local[1] < interval:
+        return local[0]
+
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key) or version
+    with _local_versions_lock:
+        _local_versions[key] = (version, now)
+    return version
+
+
+def bump_cache_version(key):
+    """Replace the token for ``key`` and return the new value."""
+    version = uuid.uuid4().hex
+    cache.set(key, version, None)
+    with _local_versions_lock:
+        _local_versions[key] = (version, time.monotonic())
+    return version
@@ -0,0 +1,155 @@
+"""
+Critical (above-the-fold) CSS for the pages built on base.html.
+
+main.css from the HTML5 UP theme blocks rendering on every page. For each
+page template `manage.py extract_critical_css` renders a representative
+page, cuts the document down to what a first screen shows (the header and
+first content block of #main, plus the search box and menu of the sidebar)
+and keeps only the main.css rules whose selectors match what is left. The
+results are written to CRITICAL_CSS_ROOT/<template>.css during the build;
+base.html inlines the file for the template being rendered and loads
+main.css without blocking (see templatetags/critical_css.py). Templates
+without a file link main.css as usual.
+
+fixtures/critical_css/ holds the output for the setup_hirexfed_content
+pages. The tests compare against it; the site never reads it.
+
+Selectors are matched statically, so state-only rules (:hover, :focus,
+:active) are left to main.css, and selectors the matcher can't evaluate
+are kept rather than risk an unstyled first paint.
+"""
+import inspect
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import soupsieve
+import tinycss2
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles import finders
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .models import DynamicPage, IntakeForm
+
+THEME_CSS = 'assets/css/main.css'
+
+# Children of "#main > .inner" and "#sidebar > .inner" visible on first paint.
+FOLD_MAIN_BLOCKS = 2
+FOLD_SIDEBAR_BLOCKS = 2
+
+PSEUDO_ELEMENT_RE = re.compile(r'::?(?:before|after|-(?:moz|ms|webkit)-[a-z-]+)\b')
+STATE_PSEUDO_CLASS_RE = re.compile(r':(?:hover|focus|active|visited)\b')
+
+
+def representative_pages():
+    """Map each page template name to the path of a page rendered with it."""
+    pages = {
+        'index': reverse('index'),
+        'generic': reverse('generic'),
+        'elements': reverse('elements'),
+    }
+    dynamic_page = (
+        DynamicPage.objects.filter(is_published=True)
+        .exclude(template_type__in=['index', 'intake'])
+        .order_by('pk')
+        .first()
+    )
+    if dynamic_page is not None:
+        pages['dynamic_page'] = dynamic_page.get_absolute_url()
+    intake_form = IntakeForm.objects.filter(is_active=True).order_by('pk').first()
+    if intake_form is not None:
+        pages['intake'] = reverse('intake_form', args=[intake_form.slug])
+    return pages
+
+
+def render_page(path):
+    """Render ``path`` for an anonymous visitor, bypassing the page cache."""
+    match = resolve(path)
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    response = inspect.unwrap(match.func)(request, *match.args, **match.kwargs)
+    return response.content.decode(response.charset)
+
+
+def extract_critical_css(html, css):
+    """Return the rules of ``css`` that apply to the above-the-fold part of ``html``."""
+    soup = BeautifulSoup(html, 'html.parser')
+    _trim_to_fold(soup)
+    rules = tinycss2.parse_stylesheet(css, skip_comments=True, skip_whitespace=True)
+    return ''.join(_critical_rules(rules, soup)) + '\n'
+
+
+def theme_css():
+    return Path(finders.find(THEME_CSS)).read_text(encoding='utf-8')
+
+
+@lru_cache(maxsize=None)
+def get_critical_css(template_name):
+    """Extracted CSS for ``template_name`` (e.g. "index"), or '' if there is none."""
+    path = Path(settings.CRITICAL_CSS_ROOT) / f'{template_name}.css'
+    if not path.is_file():
+        return ''
+    return path.read_text(encoding='utf-8')
+
+
+def _trim_to_fold(soup):
+    for container, keep in (('#main > .inner', FOLD_MAIN_BLOCKS), ('#sidebar > .inner', FOLD_SIDEBAR_BLOCKS)):
+        inner = soup.select_one(container)
+        if inner is None:
+            continue
+        for block in inner.find_all(recursive=False)[keep:]:
+            block.decompose()
+
+    sidebar = soup.select_one('#sidebar')
+    if sidebar is not None:
+        # main.js collapses the sidebar on narrow screens and adds its toggle.
+        sidebar['class'] = sidebar.get('class', []) + ['inactive']
+        toggle = soup.new_tag('a', href='#sidebar')
+        toggle['class'] = ['toggle']
+        sidebar.append(toggle)
+
+
+def _critical_rules(rules, soup):
+    for rule in rules:
+        if rule.type == 'qualified-rule':
+            selectors = [
+                selector for selector in _split_selectors(tinycss2.serialize(rule.prelude))
+                if _matches(selector, soup)
+            ]
+            if selectors:
+                yield f"{','.join(selectors)}{{{_declarations(rule.content)}}}"
+        elif rule.type == 'at-rule' and rule.lower_at_keyword == 'media':
+            inner = ''.join(_critical_rules(
+                tinycss2.parse_rule_list(rule.content, skip_comments=True, skip_whitespace=True), soup
+            ))
+            if inner:
+                yield f"@media {' '.join(tinycss2.serialize(rule.prelude).split())}{{{inner}}}"
+        # @import (web fonts) and other at-rules stay in main.css.
+
+
+def _split_selectors(prelude):
+    return [' '.join(selector.split()) for selector in prelude.split(',') if selector.strip()]
+
+
+def _matches(selector, soup):
+    if STATE_PSEUDO_CLASS_RE.search(selector):
+        return False
+    selector = PSEUDO_ELEMENT_RE.sub('', selector) or '*'
+    try:
+        return soup.select_one(selector) is not None
+    except soupsieve.SelectorSyntaxError:
+        return True
+
+
+def _declarations(content):
+    declarations = []
+    for declaration in tinycss2.parse_declaration_list(content, skip_comments=True, skip_whitespace=True):
+        if declaration.type != 'declaration':
+            continue
+        value = ' '.join(tinycss2.serialize(declaration.value).split())
+        important = ' !important' if declaration.important else ''
+        declarations.append(f'{declaration.name}:{value}{important}')
+    return ';'.join(declarations)
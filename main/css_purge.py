@@ -0,0 +1,157 @@
+"""
+Drop the main.css rules nothing on the site can match.
+
+main.css is the whole HTML5 UP "Editorial" theme. PurgedCssStaticFilesStorage
+rewrites it during collectstatic, before the manifest fingerprints it, keeping
+only selectors whose classes, ids and element names all occur somewhere in:
+
+- the templates and the theme JavaScript (which adds state classes),
+- admin-authored HTML stored in the database (PageContent, GenericPageSection,
+  Post, Banner and Feature text rendered with |safe),
+- the safelist below plus CSS_PURGE_SAFELIST.
+
+Classes typed into the admin after a deploy are only kept from the next
+build, so add any the editors rely on to CSS_PURGE_SAFELIST. A summary of
+what was removed is written to staticfiles-purge.json; `manage.py purge_css`
+prints the same report without touching STATIC_ROOT.
+"""
+import json
+import logging
+import re
+from pathlib import Path
+
+import tinycss2
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DatabaseError
+
+from .models import Banner, Feature, GenericPageSection, PageContent, Post
+from .static_images import OptimizedImageStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+PURGE_CSS_FILES = ('assets/css/main.css',)
+PURGE_REPORT_NAME = 'staticfiles-purge.json'
+
+HTML_CONTENT_FIELDS = (
+    (PageContent, 'content'),
+    (GenericPageSection, 'content'),
+    (Post, 'description'),
+    (Banner, 'description1'),
+    (Banner, 'description2'),
+    (Banner, 'description3'),
+    (Feature, 'description'),
+)
+# Classes set from code the scan can't see as literal words.
+SAFELIST = frozenset({'inactive', 'is-open', 'is-preload', 'is-resizing', 'polyfill-placeholder'})
+
+APP_DIR = Path(__file__).resolve().parent
+SOURCE_GLOBS = (
+    (APP_DIR / 'templates', '**/*.html'),
+    (APP_DIR / 'templatetags', '*.py'),
+    (APP_DIR / 'static' / 'assets' / 'js', '*.js'),
+)
+
+TOKEN_RE = re.compile(r'[A-Za-z0-9_-]+')
+# Pseudo-classes/elements (with arguments) and attribute selectors don't
+# name anything the markup has to contain; :not() must not require its argument.
+IGNORED_SELECTOR_PARTS_RE = re.compile(r'::?[\w-]+(?:\([^)]*\))?|\[[^\]]*\]')
+SELECTOR_NAME_RE = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+
+
+def used_tokens():
+    """Every word in the templates, theme JS, stored page HTML and safelist."""
+    tokens = set(SAFELIST) | set(getattr(settings, 'CSS_PURGE_SAFELIST', []))
+    for directory, pattern in SOURCE_GLOBS:
+        for path in directory.glob(pattern):
+            tokens.update(TOKEN_RE.findall(path.read_text(encoding='utf-8')))
+    for engine in settings.TEMPLATES:
+        for directory in engine.get('DIRS', []):
+            for path in Path(directory).glob('**/*.html'):
+                tokens.update(TOKEN_RE.findall(path.read_text(encoding='utf-8')))
+    for model, field in HTML_CONTENT_FIELDS:
+        values = model.objects.exclude(**{field: ''}).values_list(field, flat=True)
+        for value in values.iterator():
+            tokens.update(TOKEN_RE.findall(value or ''))
+    return tokens
+
+
+def selector_is_used(selector, tokens):
+    names = SELECTOR_NAME_RE.findall(IGNORED_SELECTOR_PARTS_RE.sub(' ', selector))
+    return all(name in tokens for _prefix, name in names)
+
+
+def purge_stylesheet(css, tokens):
+    """Return (purged css, list of the selectors removed)."""
+    rules = tinycss2.parse_stylesheet(css, skip_comments=True, skip_whitespace=True)
+    kept, removed = _purge_rules(rules, tokens)
+    return '\n'.join(kept) + '\n', removed
+
+
+def _purge_rules(rules, tokens):
+    kept, removed = [], []
+    for rule in rules:
+        if rule.type == 'qualified-rule':
+            selectors = [selector.strip() for selector in tinycss2.serialize(rule.prelude).split(',')]
+            used = [selector for selector in selectors if selector_is_used(selector, tokens)]
+            removed.extend(selector for selector in selectors if selector not in used)
+            if used:
+                kept.append(f"{', '.join(used)} {{{tinycss2.serialize(rule.content)}}}")
+        elif rule.type == 'at-rule' and rule.lower_at_keyword == 'media':
+            inner, inner_removed = _purge_rules(
+                tinycss2.parse_rule_list(rule.content, skip_comments=True, skip_whitespace=True), tokens
+            )
+            removed += inner_removed
+            if inner:
+                kept.append(f"@media {tinycss2.serialize(rule.prelude).strip()} {{\n{chr(10).join(inner)} }}")
+        elif rule.type == 'at-rule':
+            kept.append(tinycss2.serialize([rule]))
+    return kept, removed
+
+
+def purge_report(css, purged, removed):
+    original_bytes = len(css.encode('utf-8'))
+    purged_bytes = len(purged.encode('utf-8'))
+    return {
+        'original_bytes': original_bytes,
+        'purged_bytes': purged_bytes,
+        'removed_bytes': original_bytes - purged_bytes,
+        'removed_selectors': len(removed),
+    }
+
+
+class PurgedCssStaticFilesStorage(OptimizedImageStaticFilesStorage):
+    """Static storage that also purges unused rules from PURGE_CSS_FILES before hashing."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            self.purge_stylesheets(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def purge_stylesheets(self, paths):
+        try:
+            tokens = used_tokens()
+        except DatabaseError as exc:
+            # Without the stored page HTML we can't tell what is unused.
+            logger.warning("Not purging CSS; could not read page content: %s", exc)
+            return
+
+        report = {}
+        for name in PURGE_CSS_FILES:
+            if name not in paths:
+                continue
+            storage, path = paths[name]
+            with storage.open(path) as handle:
+                css = handle.read().decode('utf-8')
+            purged, removed = purge_stylesheet(css, tokens)
+            self._write(name, purged)
+            paths[name] = (self, name)
+            report[name] = purge_report(css, purged, removed)
+            logger.info("Purged %s: removed %s bytes", name, report[name]['removed_bytes'])
+        self._write(PURGE_REPORT_NAME, json.dumps(report, indent=2, sort_keys=True))
+
+    def _write(self, name, text):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(text.encode('utf-8')))
@@ -0,0 +1,170 @@
+"""
+Serve confidential intake uploads to staff without tying up a worker.
+
+INTAKE_FILE_DELIVERY picks how the admin preview hands over the bytes:
+
+- "redirect": 302 to a short-lived presigned storage URL (S3 only).
+- "accel": X-Accel-Redirect to an internal nginx location.
+- "sendfile": X-Sendfile with the file's local path (Apache/lighttpd).
+  Storages without local paths (S3) fall back to "redirect".
+- "proxy": stream the file through Django, honouring Range and
+  conditional requests so large PDFs can seek without re-downloading.
+
+Callers must do their own permission checks first.
+"""
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from storages.backends.s3 import S3Storage
+
+DEFAULT_URL_EXPIRE = 300
+STREAM_CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def intake_file_response(request, intake_file, disposition="inline"):
+    filename = Path(intake_file.original_filename or intake_file.file.name).name
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    content_disposition = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+    storage = intake_file.file.storage
+    mode = getattr(settings, 'INTAKE_FILE_DELIVERY', 'proxy')
+    if mode == 'sendfile':
+        try:
+            local_path = storage.path(intake_file.file.name)
+        except NotImplementedError:
+            # Nothing on disk for the web server to send.
+            mode = 'redirect'
+
+    if mode == 'redirect' and isinstance(storage, S3Storage):
+        response = _redirect_response(intake_file.file, content_type, content_disposition)
+    elif mode == 'accel':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'INTAKE_FILE_ACCEL_PREFIX', '/protected-media/')
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(intake_file.file.name)
+    elif mode == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = local_path
+    else:
+        response = _proxy_response(request, intake_file, content_type)
+
+    if response.status_code in (200, 206):
+        response["Content-Disposition"] = content_disposition
+    # Staff may revalidate their own copy, but shared caches must not keep it.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _redirect_response(field_file, content_type, content_disposition):
+    url = field_file.storage.url(
+        field_file.name,
+        parameters={
+            'ResponseContentDisposition': content_disposition,
+            'ResponseContentType': content_type,
+        },
+        expire=getattr(settings, 'INTAKE_FILE_URL_EXPIRE', DEFAULT_URL_EXPIRE),
+    )
+    return HttpResponseRedirect(url)
+
+
+def _proxy_response(request, intake_file, content_type):
+    field_file = intake_file.file
+    storage = field_file.storage
+    size = field_file.size
+    etag = _etag(intake_file, size)
+    try:
+        last_modified = int(storage.get_modified_time(field_file.name).timestamp())
+    except (NotImplementedError, OSError):
+        last_modified = None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        if response.status_code == 304:
+            response["ETag"] = etag
+        return response
+
+    byte_range = _requested_range(request, size, etag, last_modified)
+    if byte_range == "unsatisfiable":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    handle = field_file.open("rb")
+    if byte_range is None:
+        response = FileResponse(handle, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _iter_range(handle, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def _etag(intake_file, size):
+    blob = intake_file.blob
+    if blob is not None:
+        return f'"{blob.sha256}"'
+    return f'"{intake_file.pk}-{size}"'
+
+
+def _requested_range(request, size, etag, last_modified):
+    """
+    Return (start, end) for a satisfiable single-range request, None to send
+    the whole file, or "unsatisfiable".
+    """
+    header = request.headers.get("Range", "")
+    if request.method != "GET" or not header:
+        return None
+
+    if_range = request.headers.get("If-Range")
+    if if_range and if_range != etag:
+        if_range_date = parse_http_date_safe(if_range)
+        if if_range_date is None or last_modified is None or last_modified > if_range_date:
+            return None
+
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        # Multiple or malformed ranges: just send everything.
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            # An invalid range (bytes=5-2) is ignored, not refused.
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start >= size:
+        return "unsatisfiable"
+    return start, end
+
+
+def _iter_range(handle, start, length):
+    try:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        handle.close()
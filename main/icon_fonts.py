@@ -0,0 +1,306 @@
+"""
+Font Awesome subset covering only the icons the site uses.
+
+The full Font Awesome stylesheet and fonts weigh in at megabytes, while the
+site uses a few dozen icons: the Feature and SocialMediaLink choices, the
+icons stored on Feature, SocialMediaLink and NavigationItem rows, the
+fa-* classes in the templates and in admin-authored page HTML (the fields
+css_purge scans), and the glyphs main.css draws itself. Those
+are subset into WOFF2 fonts plus a matching stylesheet with fontTools and
+stored as an IconSubset row keyed by a hash of the icon set, which the site
+serves under immutable URLs (see views.icon_subset_stylesheet).
+
+`manage.py subset_icons` builds the subset during deploys; saving one of the
+icon models regenerates it when the set changes. Most saves don't change the
+set, so they only recollect it and find its subset already built. Until a
+subset for the current set exists, pages link the full stylesheet instead.
+"""
+import hashlib
+import io
+import json
+import logging
+import re
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+from .cache_versions import bump_cache_version, get_cache_version
+from .css_purge import HTML_CONTENT_FIELDS
+from .jobs import enqueue_job
+from .models import Feature, IconSubset, NavigationItem, SocialMediaLink
+from .page_cache import invalidate_page_cache
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows name icons, including the admin-authored HTML fields.
+ICON_MODELS = tuple(dict.fromkeys(
+    (Feature, SocialMediaLink, NavigationItem, *(model for model, _field in HTML_CONTENT_FIELDS))
+))
+
+FONT_AWESOME_CSS = 'assets/css/fontawesome-all.min.css'
+THEME_CSS = 'assets/css/main.css'
+# style: (font-family, font-weight, source font)
+FONT_STYLES = {
+    'solid': ('Font Awesome 5 Free', 900, 'assets/webfonts/fa-solid-900.ttf'),
+    'regular': ('Font Awesome 5 Free', 400, 'assets/webfonts/fa-regular-400.ttf'),
+    'brands': ('Font Awesome 5 Brands', 400, 'assets/webfonts/fa-brands-400.ttf'),
+}
+# Bump when the generated CSS or fonts change shape so new subsets are built.
+SUBSET_VERSION = 1
+
+ICON_SET_VERSION_KEY = 'main:icon_set:version'
+ICON_SET_KEY = 'main:icon_set:{version}'
+ICON_STYLESHEET_URL_KEY = 'main:icon_subset_url:{key}'
+ICON_STYLESHEET_URL_TIMEOUT = 60 * 60
+ICON_STYLESHEET_MISS_TIMEOUT = 60
+# Subset URLs are keyed by content, so browsers may keep them for a year.
+ICON_SUBSET_MAX_AGE = 60 * 60 * 24 * 365
+
+ICON_NAME_RE = re.compile(r'\bfa-[a-z0-9]+(?:-[a-z0-9]+)*')
+GLYPH_RULE_RE = re.compile(r'((?:\.fa-[a-z0-9-]+:before,?)+)\{content:"\\([0-9a-f]+)"\}')
+CSS_RULE_RE = re.compile(r'([^{}]+)\{([^{}]*)\}')
+CSS_GLYPH_RE = re.compile(r'''content:\s*['"]\\(f[0-9a-f]{3})['"]''')
+BASE_SELECTORS = {'.fa', '.fab', '.fad', '.fal', '.far', '.fas'}
+
+# (icon set version, IconSet) last used by this process.
+_process_icon_set = (None, None)
+# (icon set key, stylesheet URL or '', time.monotonic() deadline).
+_process_stylesheet_url = (None, '', 0)
+
+
+class IconSet:
+    """Icon class names and extra codepoints in use, with a stable key."""
+
+    def __init__(self, names, codepoints):
+        self.names = sorted(names)
+        self.codepoints = sorted(codepoints)
+        payload = json.dumps([SUBSET_VERSION, self.names, self.codepoints])
+        self.key = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def collect_icon_set():
+    """Gather the icons offered in the admin, stored on rows and used in templates, page HTML and CSS."""
+    glyphs = font_awesome_glyphs()
+    names = {value for value, _label in Feature.ICON_CHOICES}
+    names.update(f'fa-{value}' for value, _label in SocialMediaLink.PLATFORM_CHOICES)
+    names.update(Feature.objects.values_list('icon', flat=True))
+    names.update(f'fa-{platform}' for platform in SocialMediaLink.objects.values_list('platform', flat=True))
+    for icon_class in NavigationItem.objects.exclude(icon_class='').values_list('icon_class', flat=True):
+        names.update(ICON_NAME_RE.findall(icon_class))
+    for model, field in HTML_CONTENT_FIELDS:
+        values = model.objects.filter(**{f'{field}__contains': 'fa-'}).values_list(field, flat=True)
+        for value in values.iterator():
+            names.update(ICON_NAME_RE.findall(value))
+    names.update(_template_icon_names())
+    # Modifier classes such as fa-lg or fa-spin have no glyph.
+    return IconSet({name for name in names if name in glyphs}, _theme_css_codepoints())
+
+
+def get_icon_set():
+    """
+    Return the current IconSet, cached until one of the icon models changes.
+    Each process keeps the set for the current version, so warm requests
+    don't read it from the shared cache.
+    """
+    global _process_icon_set
+
+    version = get_cache_version(ICON_SET_VERSION_KEY)
+    local_version, icon_set = _process_icon_set
+    if local_version == version:
+        return icon_set
+
+    cache_key = ICON_SET_KEY.format(version=version)
+    icon_set = cache.get(cache_key)
+    if icon_set is None:
+        icon_set = collect_icon_set()
+        cache.set(cache_key, icon_set, None)
+    _process_icon_set = (version, icon_set)
+    return icon_set
+
+
+def invalidate_icon_set():
+    global _process_stylesheet_url
+
+    bump_cache_version(ICON_SET_VERSION_KEY)
+    _process_stylesheet_url = (None, '', 0)
+
+
+def get_icon_stylesheet_url():
+    """
+    URL of the subset stylesheet for the current icons, or None until it is
+    built. Each process remembers the answer for as long as the shared cache
+    would (an hour, or a minute while the subset is missing).
+    """
+    global _process_stylesheet_url
+
+    key = get_icon_set().key
+    local_key, url, expires = _process_stylesheet_url
+    if local_key == key and time.monotonic() < expires:
+        return url or None
+
+    cache_key = ICON_STYLESHEET_URL_KEY.format(key=key)
+    url = cache.get(cache_key)
+    if url is None:
+        url = reverse('icon_subset_stylesheet', args=[key]) if IconSubset.objects.filter(key=key).exists() else ''
+        cache.set(cache_key, url, ICON_STYLESHEET_URL_TIMEOUT if url else ICON_STYLESHEET_MISS_TIMEOUT)
+    timeout = ICON_STYLESHEET_URL_TIMEOUT if url else ICON_STYLESHEET_MISS_TIMEOUT
+    _process_stylesheet_url = (key, url, time.monotonic() + timeout)
+    return url or None
+
+
+def generate_icon_subset(icon_set=None):
+    """Build and store the subset for ``icon_set`` (default: current icons) if missing."""
+    global _process_stylesheet_url
+
+    icon_set = icon_set or collect_icon_set()
+    existing = IconSubset.objects.filter(key=icon_set.key).first()
+    if existing is not None:
+        return existing
+
+    glyphs = font_awesome_glyphs()
+    codepoints = {glyphs[name] for name in icon_set.names} | set(icon_set.codepoints)
+    fonts = {}
+    for style, (_family, _weight, path) in FONT_STYLES.items():
+        font_data = subset_font(_static_path(path), codepoints)
+        if font_data:
+            fonts[f'{style}_font'] = font_data
+
+    try:
+        with transaction.atomic():
+            icon_subset = IconSubset.objects.create(
+                key=icon_set.key,
+                icons=icon_set.names,
+                stylesheet=render_stylesheet(icon_set, glyphs, fonts),
+                **fonts,
+            )
+    except IntegrityError:
+        # Built concurrently by another worker.
+        return IconSubset.objects.get(key=icon_set.key)
+
+    cache.delete(ICON_STYLESHEET_URL_KEY.format(key=icon_set.key))
+    _process_stylesheet_url = (None, '', 0)
+    # Cached pages still link the full stylesheet.
+    invalidate_page_cache()
+    return icon_subset
+
+
+def generate_icon_subset_job(payload):
+    """Background job handler (see main.jobs.JOB_HANDLERS)."""
+    generate_icon_subset()
+
+
+def schedule_icon_subset():
+    """Rebuild the subset once the current transaction commits, if the icons changed."""
+    transaction.on_commit(_build_missing_icon_subset)
+
+
+def subset_font(path, codepoints):
+    """Return ``path`` reduced to ``codepoints`` as WOFF2, or b'' if it has none of them."""
+    font = TTFont(path)
+    available = codepoints & set(font.getBestCmap())
+    if not available:
+        return b''
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = []
+    options.notdef_outline = True
+    # FontForge timestamps; fontTools can't subset them and warns otherwise.
+    options.drop_tables.append('FFTM')
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=sorted(available))
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    font.flavor = 'woff2'
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+def render_stylesheet(icon_set, glyphs, fonts):
+    rules = [
+        '/* Font Awesome Free 5.15.4 subset - https://fontawesome.com/license/free'
+        ' (Icons: CC BY 4.0, Fonts: SIL OFL 1.1, Code: MIT License) */'
+    ]
+    for style, (family, weight, _path) in FONT_STYLES.items():
+        if f'{style}_font' in fonts:
+            url = reverse('icon_subset_font', args=[icon_set.key, style])
+            rules.append(
+                f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+                f'font-display:block;src:url({url}) format("woff2")}}'
+            )
+    rules.extend(_base_rules())
+    rules.extend(f'.{name}:before{{content:"\\{glyphs[name]:x}"}}' for name in icon_set.names)
+    return '\n'.join(rules) + '\n'
+
+
+@lru_cache(maxsize=None)
+def font_awesome_glyphs():
+    """Map every fa-* class in the bundled Font Awesome CSS to its codepoint."""
+    glyphs = {}
+    for selectors, codepoint in GLYPH_RULE_RE.findall(_read_static(FONT_AWESOME_CSS)):
+        for selector in selectors.split(','):
+            if selector:
+                glyphs[selector[1:-len(':before')]] = int(codepoint, 16)
+    return glyphs
+
+
+@lru_cache(maxsize=None)
+def _base_rules():
+    # The .fa/.fas/.far/.fab rules that set the font family and weight.
+    rules = []
+    for selectors, body in CSS_RULE_RE.findall(_read_static(FONT_AWESOME_CSS)):
+        if set(selectors.strip().split(',')) <= BASE_SELECTORS:
+            rules.append(f'{selectors.strip()}{{{body}}}')
+    return tuple(rules)
+
+
+@lru_cache(maxsize=None)
+def _template_icon_names():
+    names = set()
+    for directory in _template_dirs():
+        for template in Path(directory).rglob('*.html'):
+            names.update(ICON_NAME_RE.findall(template.read_text(encoding='utf-8')))
+    return frozenset(names)
+
+
+@lru_cache(maxsize=None)
+def _theme_css_codepoints():
+    return frozenset(int(codepoint, 16) for codepoint in CSS_GLYPH_RE.findall(_read_static(THEME_CSS)))
+
+
+def _template_dirs():
+    directories = [Path(__file__).resolve().parent / 'templates']
+    for engine in settings.TEMPLATES:
+        directories.extend(Path(directory) for directory in engine.get('DIRS', []))
+    return [directory for directory in directories if directory.is_dir()]
+
+
+def _static_path(path):
+    found = finders.find(path)
+    if not found:
+        raise FileNotFoundError(f'Static file not found: {path}')
+    return found
+
+
+def _read_static(path):
+    return Path(_static_path(path)).read_text(encoding='utf-8')
+
+
+def _build_missing_icon_subset():
+    try:
+        icon_set = get_icon_set()
+        if IconSubset.objects.filter(key=icon_set.key).exists():
+            return
+        if getattr(settings, 'ENABLE_BACKGROUND_JOBS', False):
+            enqueue_job('icon_subset', {})
+        else:
+            generate_icon_subset(icon_set)
+    except Exception:
+        logger.exception('Failed to generate the Font Awesome subset')
@@ -0,0 +1,166 @@
+"""
+Responsive derivatives for site-content images.
+
+When a Banner, Post, MiniPost or PageContent image is saved, Pillow renders
+it at several widths as WebP plus a JPEG fallback (in the job worker when
+background jobs are enabled, otherwise right after the save commits). The
+`{% responsive_image %}` tag turns those into srcset markup. Source names in
+the public storage are content-hashed, so derivatives are keyed by name and
+never go stale.
+"""
+import hashlib
+import logging
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .cache_versions import bump_cache_version, get_cache_version
+from .jobs import enqueue_job_on_commit
+from .models import Banner, ImageDerivative, MiniPost, PageContent, Post
+from .page_cache import invalidate_page_cache
+from .storage import public_media_storage
+
+logger = logging.getLogger(__name__)
+
+RESPONSIVE_IMAGE_MODELS = (Banner, Post, MiniPost, PageContent)
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+DERIVATIVES_VERSION_KEY = "main:image_derivatives:version"
+SOURCES_CACHE_KEY = "main:image_derivatives:{version}:{digest}"
+SOURCES_CACHE_TIMEOUT = 60 * 60 * 24
+
+# (derivatives version, {source name: sources}) for this process.
+_process_sources = (None, {})
+
+
+def derivative_widths(source_width):
+    """Target widths for an image: every standard width below it, plus its own (capped)."""
+    widths = {width for width in DERIVATIVE_WIDTHS if width < source_width}
+    widths.add(min(source_width, DERIVATIVE_WIDTHS[-1]))
+    return sorted(widths)
+
+
+def generate_derivatives(source_name):
+    """Create the WebP and JPEG derivatives for ``source_name`` if missing."""
+    if ImageDerivative.objects.filter(source_name=source_name).exists():
+        return 0
+
+    storage = public_media_storage()
+    with storage.open(source_name, 'rb') as handle:
+        image = ImageOps.exif_transpose(Image.open(handle))
+        image.load()
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    source_width, source_height = image.size
+    stem = PurePosixPath(source_name).stem
+    derivatives = []
+    for width in derivative_widths(source_width):
+        height = max(1, round(source_height * width / source_width))
+        resized = image if width == source_width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for image_format, extension, content in (
+            (ImageDerivative.FORMAT_WEBP, 'webp', _encode_webp(resized)),
+            (ImageDerivative.FORMAT_JPEG, 'jpg', _encode_jpeg(resized)),
+        ):
+            derivative = ImageDerivative(
+                source_name=source_name,
+                format=image_format,
+                width=width,
+                height=height,
+            )
+            derivative.file.save(f"{stem}-{width}w.{extension}", ContentFile(content), save=False)
+            derivatives.append(derivative)
+
+    ImageDerivative.objects.bulk_create(derivatives, ignore_conflicts=True)
+    invalidate_responsive_sources()
+    # Cached pages were rendered with the plain <img>.
+    invalidate_page_cache()
+    return len(derivatives)
+
+
+def generate_derivatives_job(payload):
+    """Background job handler (see main.jobs.JOB_HANDLERS)."""
+    generate_derivatives(payload['source_name'])
+
+
+def schedule_derivatives(source_name):
+    """Generate derivatives once the current transaction commits."""
+    if getattr(settings, 'ENABLE_BACKGROUND_JOBS', False):
+        enqueue_job_on_commit('image_derivatives', {'source_name': source_name})
+    else:
+        transaction.on_commit(lambda: _generate_derivatives_logged(source_name))
+
+
+def get_responsive_sources(source_name):
+    """
+    Return {"webp": [...], "jpeg": [...]} of (url, width, height) tuples
+    ordered by width, or {} when no derivatives exist yet. Each process keeps
+    the answer until derivatives are generated for any image, so a warm
+    render doesn't read the shared cache once per image.
+    """
+    global _process_sources
+
+    version = get_cache_version(DERIVATIVES_VERSION_KEY)
+    local_version, local_sources = _process_sources
+    if local_version != version:
+        local_sources = {}
+        _process_sources = (version, local_sources)
+    sources = local_sources.get(source_name)
+    if sources is not None:
+        return sources
+
+    cache_key = _sources_cache_key(version, source_name)
+    sources = cache.get(cache_key)
+    if sources is None:
+        sources = {}
+        for derivative in ImageDerivative.objects.filter(source_name=source_name):
+            sources.setdefault(derivative.format, []).append(
+                (derivative.file.url, derivative.width, derivative.height)
+            )
+        cache.set(cache_key, sources, SOURCES_CACHE_TIMEOUT)
+    local_sources[source_name] = sources
+    return sources
+
+
+def invalidate_responsive_sources():
+    """Start a new derivatives version so every worker reloads image sources."""
+    global _process_sources
+
+    bump_cache_version(DERIVATIVES_VERSION_KEY)
+    _process_sources = (None, {})
+
+
+def _generate_derivatives_logged(source_name):
+    try:
+        generate_derivatives(source_name)
+    except Exception:
+        logger.exception("Failed to generate image derivatives for %s", source_name)
+
+
+def _encode_webp(image):
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def _encode_jpeg(image):
+    if image.mode == 'RGBA':
+        # JPEG has no alpha channel; flatten onto white like the page background.
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _sources_cache_key(version, source_name):
+    digest = hashlib.sha256(source_name.encode('utf-8')).hexdigest()
+    return SOURCES_CACHE_KEY.format(version=version, digest=digest)
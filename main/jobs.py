@@ -0,0 +1,166 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows in BackgroundJob, usually enqueued with `enqueue_job_on_commit`
+so they only exist once the request's data is committed. `manage.py run_jobs`
+claims due jobs, runs the handler registered for their task, retries
+failures with exponential backoff and dead-letters jobs that keep failing.
+
+Every claim gets a fresh claim token. A worker whose visibility timeout ran
+out may find its job claimed again by another worker; it then skips the
+handler, and it never overwrites the outcome the new claimant records.
+"""
+import logging
+import random
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Task name -> dotted path of a callable that takes the job payload.
+JOB_HANDLERS = {
+    'intake_recipient_email': 'main.views.deliver_intake_recipient_email',
+    'intake_owner_email': 'main.views.deliver_intake_owner_email',
+    'intake_owner_slack': 'main.views.deliver_intake_owner_slack',
+    'image_derivatives': 'main.images.generate_derivatives_job',
+    'icon_subset': 'main.icon_fonts.generate_icon_subset_job',
+}
+
+DEFAULT_VISIBILITY_TIMEOUT = 300
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 60 * 60
+MAX_ERROR_LENGTH = 4000
+
+
+def enqueue_job(task, payload=None, max_attempts=5):
+    """Create a pending job for ``task`` immediately."""
+    if task not in JOB_HANDLERS:
+        raise ValueError(f"Unknown background job task: {task}")
+    return BackgroundJob.objects.create(
+        task=task,
+        payload=payload or {},
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_job_on_commit(task, payload=None, max_attempts=5):
+    """Create the job once the surrounding transaction commits."""
+    transaction.on_commit(lambda: enqueue_job(task, payload, max_attempts=max_attempts))
+
+
+def claim_jobs(limit, visibility_timeout=DEFAULT_VISIBILITY_TIMEOUT):
+    """
+    Lock and return up to ``limit`` due jobs. Running jobs whose visibility
+    timeout has passed (e.g. their worker died) are claimed again.
+    """
+    now = timezone.now()
+    due = Q(status=BackgroundJob.STATUS_PENDING, run_after__lte=now) | Q(
+        status=BackgroundJob.STATUS_RUNNING, locked_until__lte=now
+    )
+
+    with transaction.atomic():
+        candidates = list(
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by('run_after', 'pk')[:limit]
+        )
+
+        claimed = []
+        for job in candidates:
+            if job.attempts >= job.max_attempts:
+                # Its last attempt never reported back; stop retrying.
+                job.status = BackgroundJob.STATUS_DEAD
+                job.locked_until = None
+                job.claim_token = None
+                job.finished_at = now
+                job.last_error = job.last_error or "Visibility timeout expired on the final attempt."
+            else:
+                job.status = BackgroundJob.STATUS_RUNNING
+                job.attempts += 1
+                job.locked_until = now + timedelta(seconds=visibility_timeout)
+                job.claim_token = uuid.uuid4()
+                claimed.append(job)
+
+        BackgroundJob.objects.bulk_update(
+            candidates,
+            ['status', 'attempts', 'locked_until', 'claim_token', 'finished_at', 'last_error'],
+        )
+
+    return claimed
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome. Returns True on success, False
+    on failure and None when the job is no longer claimed by this worker.
+    """
+    if not _held_claim(job).filter(locked_until__gt=timezone.now()).exists():
+        # The visibility timeout passed before we got to it; another worker
+        # may already be running it, so don't send anything twice.
+        logger.warning("Skipping background job %s (%s); its claim expired", job.pk, job.task)
+        return None
+
+    try:
+        handler = import_string(JOB_HANDLERS[job.task])
+        handler(job.payload)
+    except Exception as exc:
+        logger.exception("Background job %s (%s) failed on attempt %s", job.pk, job.task, job.attempts)
+        if not _record_failure(job, f"{type(exc).__name__}: {exc}"):
+            return None
+        return False
+
+    job.status = BackgroundJob.STATUS_DONE
+    job.locked_until = None
+    job.finished_at = timezone.now()
+    job.last_error = ''
+    if not _save_if_claimed(job, ['status', 'locked_until', 'finished_at', 'last_error']):
+        return None
+    return True
+
+
+def retry_delay(attempts):
+    """Exponential backoff with a little jitter, capped at RETRY_MAX_DELAY."""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** max(attempts - 1, 0)))
+    return timedelta(seconds=delay + random.uniform(0, delay / 10))
+
+
+def _held_claim(job):
+    return BackgroundJob.objects.filter(
+        pk=job.pk, status=BackgroundJob.STATUS_RUNNING, claim_token=job.claim_token
+    )
+
+
+def _save_if_claimed(job, fields):
+    """Save ``fields`` and release the claim, if ``job`` still holds it."""
+    updated = _held_claim(job).update(claim_token=None, **{field: getattr(job, field) for field in fields})
+    if updated:
+        job.claim_token = None
+    else:
+        logger.warning(
+            "Background job %s (%s) was claimed by another worker; not recording this run", job.pk, job.task
+        )
+    return bool(updated)
+
+
+def _record_failure(job, error):
+    now = timezone.now()
+    job.last_error = error[:MAX_ERROR_LENGTH]
+    job.locked_until = None
+    if job.attempts >= job.max_attempts:
+        job.status = BackgroundJob.STATUS_DEAD
+        job.finished_at = now
+    else:
+        job.status = BackgroundJob.STATUS_PENDING
+        job.run_after = now + retry_delay(job.attempts)
+    if not _save_if_claimed(job, ['status', 'last_error', 'locked_until', 'finished_at', 'run_after']):
+        return False
+    if job.status == BackgroundJob.STATUS_DEAD:
+        logger.error("Background job %s (%s) moved to dead letter after %s attempts", job.pk, job.task, job.attempts)
+    return True
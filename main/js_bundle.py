@@ -0,0 +1,179 @@
+"""
+A single minified, deferred bundle for the theme JavaScript.
+
+base.html used to load jQuery, the HTML5 UP helpers and main.js as five
+blocking scripts. BundledJsStaticFilesStorage concatenates the files listed
+in JS_BUNDLES during collectstatic, minifies them with rjsmin and writes a
+source map next to the bundle (assets/js/site.js, assets/js/site.js.map).
+Both are then fingerprinted by the manifest like any other static file,
+including the sourceMappingURL comment. `{% script_bundle %}` links the
+bundle with `defer`, or its source files when the storage doesn't build
+bundles (e.g. with DEBUG on).
+
+The map is built by aligning the minified text with each source: rjsmin
+only drops comments and whitespace, so every token in the output can be
+found in order in the input.
+"""
+import bisect
+import json
+import logging
+import posixpath
+import re
+
+import rjsmin
+
+from .css_purge import PurgedCssStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+# Bundle name: source files in load order.
+JS_BUNDLES = {
+    'assets/js/site.js': (
+        'assets/js/jquery.min.js',
+        'assets/js/browser.min.js',
+        'assets/js/breakpoints.min.js',
+        'assets/js/util.js',
+        'assets/js/main.js',
+    ),
+}
+
+VLQ_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+WORD_RE = re.compile(r'[\w$]')
+
+
+def source_map_name(bundle):
+    return f'{bundle}.map'
+
+
+def minify(source):
+    # Keep /*! ... */ license banners.
+    return rjsmin.jsmin(source, keep_bang_comments=True)
+
+
+def build_bundle(bundle, sources):
+    """
+    Minify and concatenate ``sources`` ([(name, text)] in load order).
+
+    Returns (bundle js, source map json) with source names relative to the
+    bundle, which is expected to sit next to its map.
+    """
+    directory = posixpath.dirname(bundle)
+    parts, segments = [], []
+    line = 0
+    for index, (_name, source) in enumerate(sources):
+        minified = minify(source).strip()
+        if not minified.endswith(';'):
+            # Don't let the next file continue this one's last statement.
+            minified += ';'
+        line_starts = _line_starts(minified)
+        for offset, (source_line, source_column) in _token_positions(source, minified):
+            minified_line = bisect.bisect_right(line_starts, offset) - 1
+            column = offset - line_starts[minified_line]
+            segments.append((line + minified_line, column, index, source_line, source_column))
+        parts.append(minified + '\n')
+        line += len(line_starts)
+
+    source_map = {
+        'version': 3,
+        'file': posixpath.basename(bundle),
+        'sources': [posixpath.relpath(name, directory or '.') for name, _source in sources],
+        'sourcesContent': [source for _name, source in sources],
+        'names': [],
+        'mappings': encode_mappings(segments),
+    }
+    js = ''.join(parts) + f'//# sourceMappingURL={posixpath.basename(source_map_name(bundle))}\n'
+    return js, json.dumps(source_map, separators=(',', ':'))
+
+
+def encode_mappings(segments):
+    """Encode sorted (line, column, source, source line, source column) tuples as VLQ mappings."""
+    lines = []
+    previous_source = previous_source_line = previous_source_column = 0
+    for line, column, source, source_line, source_column in segments:
+        while len(lines) <= line:
+            lines.append([])
+            previous_column = 0
+        lines[line].append(''.join(_vlq(value) for value in (
+            column - previous_column,
+            source - previous_source,
+            source_line - previous_source_line,
+            source_column - previous_source_column,
+        )))
+        previous_column, previous_source = column, source
+        previous_source_line, previous_source_column = source_line, source_column
+    return ';'.join(','.join(line) for line in lines)
+
+
+def _vlq(value):
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ''
+    while True:
+        digit, value = value & 31, value >> 5
+        encoded += VLQ_CHARS[digit | (32 if value else 0)]
+        if not value:
+            return encoded
+
+
+def _token_positions(source, minified):
+    """Yield (offset in minified, (line, column) in source) for each token start."""
+    line_starts = _line_starts(source)
+    j, length = 0, len(source)
+    for i, char in enumerate(minified):
+        if char.isspace():
+            # Whitespace rjsmin kept (or added for a removed comment).
+            if j < length and source[j].isspace():
+                j += 1
+            continue
+        while j < length and source[j] != char:
+            if source.startswith(('/*', '//'), j) and not minified.startswith(source[j:j + 2], i):
+                j = _comment_end(source, j)
+            else:
+                j += 1
+        if j >= length:
+            return
+        if i == 0 or not (WORD_RE.match(char) and WORD_RE.match(minified[i - 1])):
+            source_line = bisect.bisect_right(line_starts, j) - 1
+            yield i, (source_line, j - line_starts[source_line])
+        j += 1
+
+
+def _line_starts(text):
+    return [0] + [match.end() for match in re.finditer('\n', text)]
+
+
+def _comment_end(source, start):
+    if source.startswith('//', start):
+        end = source.find('\n', start)
+    else:
+        end = source.find('*/', start)
+        end = end + 2 if end != -1 else -1
+    return len(source) if end == -1 else end
+
+
+class BundledJsStaticFilesStorage(PurgedCssStaticFilesStorage):
+    """Static storage that also builds JS_BUNDLES, with source maps, before hashing."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            self.build_bundles(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def build_bundles(self, paths):
+        for bundle, source_names in JS_BUNDLES.items():
+            missing = [name for name in source_names if name not in paths]
+            if missing:
+                logger.warning("Not building %s; missing %s", bundle, ', '.join(missing))
+                continue
+            sources = []
+            for name in source_names:
+                storage, path = paths[name]
+                with storage.open(path) as handle:
+                    sources.append((name, handle.read().decode('utf-8')))
+            js, source_map = build_bundle(bundle, sources)
+            for name, text in ((bundle, js), (source_map_name(bundle), source_map)):
+                self._write(name, text)
+                paths[name] = (self, name)
+
+    def has_bundle(self, bundle):
+        return bundle in self.hashed_files
@@ -0,0 +1,97 @@
+"""
+Compare the bundled theme JavaScript with the separate source files.
+Run with: python manage.py benchmark_js_bundle [--runs 50]
+
+Reports requests and raw/gzip/brotli bytes for both, and when `node` is on
+PATH the median time V8 takes to parse and compile each set (a fresh
+vm.Script per run, so nothing comes from the code cache). Executing the
+scripts needs a DOM, so run time is left to the browser's performance
+panel; the bundle is deferred, so it no longer blocks HTML parsing either.
+"""
+import gzip
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import brotli
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from main.js_bundle import JS_BUNDLES, build_bundle
+
+NODE_COMPILE_SCRIPT = r"""
+const vm = require('vm');
+let input = '';
+process.stdin.on('data', chunk => { input += chunk; }).on('end', () => {
+  const {groups, runs} = JSON.parse(input);
+  const labels = Object.keys(groups);
+  const timings = Object.fromEntries(labels.map(label => [label, []]));
+  // Interleave the variants (after a warm-up run) so neither gains from JIT warm-up.
+  for (let run = -1; run < runs; run++) {
+    for (const label of labels) {
+      const start = process.hrtime.bigint();
+      groups[label].forEach((source, index) => {
+        new vm.Script(`${source}\n//${run}`, {filename: `${label}-${index}-${run}.js`});
+      });
+      if (run >= 0) timings[label].push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+  }
+  const medians = {};
+  for (const label of labels) {
+    timings[label].sort((a, b) => a - b);
+    medians[label] = timings[label][Math.floor(runs / 2)];
+  }
+  process.stdout.write(JSON.stringify(medians));
+});
+"""
+
+
+class Command(BaseCommand):
+    help = 'Measure the size and parse/compile savings of the JavaScript bundle'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bundle', default='assets/js/site.js', choices=sorted(JS_BUNDLES))
+        parser.add_argument('--runs', type=int, default=50, help='Compile runs per variant (default 50).')
+
+    def handle(self, *args, **options):
+        bundle = options['bundle']
+        sources = []
+        for name in JS_BUNDLES[bundle]:
+            path = finders.find(name)
+            if not path:
+                raise CommandError(f'Static file not found: {name}')
+            sources.append((name, Path(path).read_text(encoding='utf-8')))
+        js, _source_map = build_bundle(bundle, sources)
+        variants = {
+            'separate': [source for _name, source in sources],
+            'bundle': [js],
+        }
+
+        self.stdout.write(f'{"":<10}{"requests":>10}{"bytes":>10}{"gzip":>10}{"brotli":>10}')
+        for label, texts in variants.items():
+            encoded = [text.encode('utf-8') for text in texts]
+            self.stdout.write(
+                f'{label:<10}{len(encoded):>10}'
+                f'{sum(len(data) for data in encoded):>10}'
+                f'{sum(len(gzip.compress(data, 9)) for data in encoded):>10}'
+                f'{sum(len(brotli.compress(data)) for data in encoded):>10}'
+            )
+
+        node = shutil.which('node')
+        if not node:
+            self.stdout.write('node not found; skipping the parse/compile timing.')
+            return
+        result = subprocess.run(
+            [node, '-e', NODE_COMPILE_SCRIPT],
+            input=json.dumps({'groups': variants, 'runs': options['runs']}),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        medians = json.loads(result.stdout)
+        saved = medians['separate'] - medians['bundle']
+        self.stdout.write(
+            f"V8 parse/compile (median of {options['runs']}): separate {medians['separate']:.2f} ms, "
+            f"bundle {medians['bundle']:.2f} ms ({saved:+.2f} ms saved)"
+        )
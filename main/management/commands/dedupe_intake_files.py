@@ -0,0 +1,95 @@
+"""
+Move intake uploads stored before deduplication onto IntakeBlob rows, then
+report how many bytes deduplication saves.
+Run with: python manage.py dedupe_intake_files [--dry-run] [--report-only]
+"""
+import hashlib
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from main.models import IntakeBlob, IntakeFile
+
+
+def _sha256(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as handle:
+        for chunk in handle.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Command(BaseCommand):
+    help = 'Deduplicate legacy intake uploads and report the bytes saved'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would change without writing anything.',
+        )
+        parser.add_argument(
+            '--report-only',
+            action='store_true',
+            help='Only print the deduplication report.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['report_only']:
+            self.backfill(dry_run=options['dry_run'])
+        self.report()
+
+    def backfill(self, dry_run):
+        linked = removed = missing = 0
+        legacy_files = IntakeFile.objects.filter(blob__isnull=True).exclude(file='').order_by('pk')
+
+        for intake_file in legacy_files.iterator():
+            legacy_name = intake_file.file.name
+            if not intake_file.file.storage.exists(legacy_name):
+                missing += 1
+                self.stderr.write(f'IntakeFile {intake_file.pk}: {legacy_name} not found in storage')
+                continue
+
+            digest = _sha256(intake_file.file)
+            prefix = legacy_name.split('/', 1)[0]
+            linked += 1
+            if dry_run:
+                continue
+
+            with transaction.atomic():
+                # Lock the blob so an after-commit purge can't delete it now.
+                blob = IntakeBlob.objects.select_for_update().filter(sha256=digest, prefix=prefix).first()
+                if blob is None:
+                    # Adopt the existing object as the blob; nothing is uploaded.
+                    blob = IntakeBlob.objects.create(
+                        sha256=digest,
+                        prefix=prefix,
+                        file=legacy_name,
+                        size=intake_file.file.size,
+                        ref_count=1,
+                    )
+                else:
+                    IntakeBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                IntakeFile.objects.filter(pk=intake_file.pk).update(blob=blob, file=blob.file.name)
+
+            if (
+                legacy_name != blob.file.name
+                and not IntakeFile.objects.filter(file=legacy_name).exists()
+            ):
+                intake_file.file.storage.delete(legacy_name)
+                removed += 1
+
+        verb = 'Would link' if dry_run else 'Linked'
+        self.stdout.write(
+            f'{verb} {linked} legacy file(s) to blobs; removed {removed} duplicate object(s); {missing} missing.'
+        )
+
+    def report(self):
+        usage = IntakeBlob.objects.usage()
+        self.stdout.write(
+            f"Stored uploads: {usage['blobs']} blob(s) for {usage['references']} file(s)\n"
+            f"Stored bytes: {usage['stored_bytes']}\n"
+            f"Referenced bytes: {usage['referenced_bytes']}\n"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Bytes saved by deduplication: {usage['saved_bytes']}"))
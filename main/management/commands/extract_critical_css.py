@@ -0,0 +1,59 @@
+"""
+Extract the above-the-fold CSS for each page template into CRITICAL_CSS_ROOT.
+Run with: python manage.py extract_critical_css [--template index] [--output-dir DIR]
+
+Each template (index, generic, elements, dynamic_page, intake) is rendered
+from a representative page in the database; templates without one (e.g. no
+published DynamicPage yet) are skipped and keep loading main.css blocking.
+See main/critical_css.py for how the fold is cut and rules are matched.
+
+To refresh the test snapshots, run it against a database set up with
+`manage.py setup_hirexfed_content` and `--output-dir fixtures/critical_css`.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.critical_css import (
+    extract_critical_css,
+    get_critical_css,
+    render_page,
+    representative_pages,
+    theme_css,
+)
+
+
+class Command(BaseCommand):
+    help = 'Write the critical CSS inlined by base.html for each page template'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template',
+            action='append',
+            dest='templates',
+            help='Only extract for this template name (repeatable).',
+        )
+        parser.add_argument(
+            '--output-dir',
+            help='Directory to write to (default: CRITICAL_CSS_ROOT).',
+        )
+
+    def handle(self, *args, **options):
+        pages = representative_pages()
+        templates = options['templates'] or sorted(pages)
+        unknown = set(templates) - set(pages)
+        if unknown:
+            raise CommandError(f"No representative page for: {', '.join(sorted(unknown))}")
+
+        css = theme_css()
+        output_dir = Path(options['output_dir'] or settings.CRITICAL_CSS_ROOT)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for template_name in templates:
+            critical = extract_critical_css(render_page(pages[template_name]), css)
+            (output_dir / f'{template_name}.css').write_text(critical, encoding='utf-8')
+            self.stdout.write(
+                f'{template_name}: {len(critical.encode("utf-8"))} of {len(css.encode("utf-8"))} bytes '
+                f'(from {pages[template_name]})'
+            )
+        get_critical_css.cache_clear()
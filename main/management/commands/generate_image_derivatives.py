@@ -0,0 +1,69 @@
+"""
+Generate responsive WebP/JPEG derivatives for site-content images uploaded
+before derivatives existed, and optionally prune derivatives of images that
+are no longer used.
+Run with: python manage.py generate_image_derivatives [--prune] [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+
+from main.images import RESPONSIVE_IMAGE_MODELS, generate_derivatives
+from main.models import ImageDerivative
+from main.storage import public_media_storage
+from main.storage_cleanup import delete_stored_files
+
+
+def referenced_image_names():
+    names = set()
+    for model in RESPONSIVE_IMAGE_MODELS:
+        names.update(model.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True))
+    return names
+
+
+class Command(BaseCommand):
+    help = 'Generate missing responsive image derivatives for site-content images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Also delete derivatives whose source image is no longer referenced.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be generated or pruned without writing anything.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        names = referenced_image_names()
+        existing = set(ImageDerivative.objects.values_list('source_name', flat=True).distinct())
+
+        generated = failed = 0
+        for name in sorted(names - existing):
+            if dry_run:
+                self.stdout.write(f'Would generate derivatives for {name}')
+                generated += 1
+                continue
+            try:
+                created = generate_derivatives(name)
+            except Exception as exc:
+                self.stderr.write(f'Could not generate derivatives for {name}: {exc}')
+                failed += 1
+                continue
+            self.stdout.write(f'{name}: {created} derivative(s)')
+            generated += 1
+
+        pruned = 0
+        if options['prune']:
+            stale = ImageDerivative.objects.exclude(source_name__in=names)
+            pruned = stale.count()
+            if not dry_run and pruned:
+                files = [name for name in stale.values_list('file', flat=True) if name]
+                stale.delete()
+                delete_stored_files(public_media_storage(), files)
+
+        verb = 'Would process' if dry_run else 'Processed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {generated} image(s); {failed} failed; pruned {pruned} derivative(s).'
+        ))
@@ -0,0 +1,85 @@
+"""
+Copy existing site-content images from the default (private) storage into
+the public storage, under content-hashed names, and point the rows at them.
+Run with: python manage.py migrate_public_media [--dry-run] [--delete-source]
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from main.models import Banner, GenericPageSection, MiniPost, PageContent, Post
+from main.page_cache import invalidate_page_cache
+from main.site_chrome import invalidate_site_chrome
+from main.storage import public_media_storage
+
+PUBLIC_MEDIA_FIELDS = (
+    (Banner, 'image'),
+    (Post, 'image'),
+    (MiniPost, 'image'),
+    (PageContent, 'image'),
+    (GenericPageSection, 'image'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Move site-content images from the private media storage to the public one'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be copied without writing anything.',
+        )
+        parser.add_argument(
+            '--delete-source',
+            action='store_true',
+            help='Delete the original objects from the private storage once copied.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        public = public_media_storage()
+        copied = {}
+        missing = 0
+
+        for model, field_name in PUBLIC_MEDIA_FIELDS:
+            rows = (
+                model._default_manager.exclude(**{field_name: ''})
+                .exclude(**{f'{field_name}__isnull': True})
+                .values_list('pk', field_name)
+            )
+            for pk, name in rows.iterator():
+                if name in copied:
+                    new_name = copied[name]
+                elif public.exists(name):
+                    # Already migrated, or both aliases share a directory locally.
+                    continue
+                elif not default_storage.exists(name):
+                    missing += 1
+                    self.stderr.write(f'{model.__name__} {pk}: {name} not found in the default storage')
+                    continue
+                elif dry_run:
+                    new_name = copied[name] = name
+                else:
+                    with default_storage.open(name, 'rb') as source:
+                        new_name = copied[name] = public.save(name, source)
+
+                self.stdout.write(f'{model.__name__} {pk}: {name} -> {new_name}')
+                if not dry_run:
+                    model._default_manager.filter(pk=pk).update(**{field_name: new_name})
+
+        if dry_run:
+            self.stdout.write(f'Dry run: {len(copied)} file(s) would be copied, {missing} missing.')
+            return
+
+        if options['delete_source']:
+            for name in copied:
+                default_storage.delete(name)
+
+        if copied:
+            # Rows were updated without signals, so drop the rendered URLs.
+            invalidate_site_chrome()
+            invalidate_page_cache()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied {len(copied)} file(s) to the public storage, {missing} missing.'
+        ))
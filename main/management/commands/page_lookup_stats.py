@@ -0,0 +1,26 @@
+"""
+Report how many catch-all page lookups were rejected by the slug index.
+Web workers add their counts to the total about once a minute.
+Run with: python manage.py page_lookup_stats [--reset]
+"""
+from django.core.management.base import BaseCommand
+
+from main.slug_index import get_rejected_lookup_count, reset_rejected_lookup_count
+
+
+class Command(BaseCommand):
+    help = 'Show the number of unknown page slugs rejected without a database lookup'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counter after printing it.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Rejected page lookups: {get_rejected_lookup_count()}')
+
+        if options['reset']:
+            reset_rejected_lookup_count()
+            self.stdout.write(self.style.SUCCESS('Counter reset.'))
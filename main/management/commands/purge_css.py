@@ -0,0 +1,50 @@
+"""
+Report how much of main.css the collectstatic purge removes.
+Run with: python manage.py purge_css [--output purged.css] [--show-removed]
+
+Nothing in STATIC_ROOT is changed; collectstatic does the actual purge (see
+main/css_purge.py) and records the same numbers in staticfiles-purge.json.
+"""
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from main.css_purge import PURGE_CSS_FILES, purge_report, purge_stylesheet, used_tokens
+
+
+class Command(BaseCommand):
+    help = 'Report the bytes the unused-CSS purge removes from the theme stylesheets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Write the purged stylesheet to this path for review (single stylesheet only).',
+        )
+        parser.add_argument(
+            '--show-removed',
+            action='store_true',
+            help='List the selectors that would be removed.',
+        )
+
+    def handle(self, *args, **options):
+        if options['output'] and len(PURGE_CSS_FILES) != 1:
+            raise CommandError('--output needs a single stylesheet to purge.')
+
+        tokens = used_tokens()
+        for name in PURGE_CSS_FILES:
+            path = finders.find(name)
+            if not path:
+                raise CommandError(f'Static file not found: {name}')
+            css = Path(path).read_text(encoding='utf-8')
+            purged, removed = purge_stylesheet(css, tokens)
+            report = purge_report(css, purged, removed)
+            self.stdout.write(
+                f"{name}: {report['original_bytes']} -> {report['purged_bytes']} bytes "
+                f"({report['removed_bytes']} removed, {report['removed_selectors']} selector(s))"
+            )
+            if options['show_removed']:
+                for selector in removed:
+                    self.stdout.write(f'  {selector}')
+            if options['output']:
+                Path(options['output']).write_text(purged, encoding='utf-8')
@@ -0,0 +1,222 @@
+"""
+Reconcile intake uploads in storage with the rows that reference them.
+Run with: python manage.py reconcile_media [--dry-run] [--prefix resumes]
+
+Both sides are streamed in byte order and compared as a sorted merge, so
+memory stays bounded however many objects there are:
+
+- storage is listed page by page (S3 ListObjectsV2, or a sorted directory walk);
+- referenced names (IntakeFile.file and IntakeBlob.file) are read with keyset
+  pagination, which stays correct while dangling rows are being deleted.
+
+Objects nobody references ("orphans") are deleted once older than
+--min-age-hours, so uploads still being saved are left alone. Rows whose
+object is missing ("dangling") are deleted too, under the same age limit and
+only if the object still doesn't exist right before the delete. Use
+--dry-run to only report.
+"""
+import heapq
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Collate
+from django.utils import timezone
+from storages.backends.s3 import S3Storage
+
+from main.models import IntakeBlob, IntakeFile
+from main.storage_cleanup import delete_stored_files
+
+DEFAULT_PREFIXES = ('resumes', 'client-docs')
+# Collations that compare strings byte by byte, like S3 listings do.
+BINARY_COLLATIONS = {
+    'postgresql': 'C',
+    'mysql': 'utf8mb4_bin',
+}
+
+
+def iter_stored_files(storage, prefix):
+    """Yield (name, modified) for every object under ``prefix``, in byte order."""
+    if isinstance(storage, S3Storage):
+        yield from _iter_s3_files(storage, prefix)
+    else:
+        yield from _iter_local_files(storage, prefix)
+
+
+def _iter_s3_files(storage, prefix):
+    location = storage.location.strip('/')
+    key_prefix = f"{location}/{prefix}/" if location else f"{prefix}/"
+    paginator = storage.bucket.meta.client.get_paginator('list_objects_v2')
+    pages = paginator.paginate(
+        Bucket=storage.bucket_name,
+        Prefix=key_prefix,
+        PaginationConfig={'PageSize': 1000},
+    )
+    for page in pages:
+        for obj in page.get('Contents', []):
+            name = obj['Key'][len(location) + 1:] if location else obj['Key']
+            yield name, obj['LastModified']
+
+
+def _iter_local_files(storage, path):
+    try:
+        directories, files = storage.listdir(path)
+    except FileNotFoundError:
+        return
+    # Sorting directories as "name/" keeps the walk in full-path byte order.
+    entries = sorted([(f"{name}/", True) for name in directories] + [(name, False) for name in files])
+    for entry, is_directory in entries:
+        if is_directory:
+            yield from _iter_local_files(storage, f"{path}/{entry[:-1]}")
+        else:
+            name = f"{path}/{entry}"
+            yield name, storage.get_modified_time(name)
+
+
+def iter_referenced_names(model, prefix, page_size):
+    """Yield distinct ``model.file`` names under ``prefix``, in byte order."""
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    key = Collate('file', collation) if collation else F('file')
+    queryset = model.objects.filter(file__startswith=f"{prefix}/").annotate(sort_name=key)
+
+    last_name = None
+    while True:
+        page = queryset.order_by('sort_name')
+        if last_name is not None:
+            page = page.filter(sort_name__gt=last_name)
+        names = list(page.values_list('sort_name', flat=True).distinct()[:page_size])
+        if not names:
+            return
+        yield from names
+        last_name = names[-1]
+
+
+def _unique(names):
+    previous = None
+    for name in names:
+        if name != previous:
+            yield name
+            previous = name
+
+
+class Command(BaseCommand):
+    help = 'Delete orphaned intake uploads from storage and rows whose upload is missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report orphans and dangling rows without deleting anything.',
+        )
+        parser.add_argument(
+            '--prefix',
+            action='append',
+            dest='prefixes',
+            help='Storage prefix to reconcile (repeatable). Defaults to resumes and client-docs.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of objects or rows deleted per batch (default: 1000).',
+        )
+        parser.add_argument(
+            '--min-age-hours',
+            type=int,
+            default=24,
+            help='Only delete orphaned objects older than this (default: 24).',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.storage = IntakeFile._meta.get_field('file').storage
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        self.totals = dict.fromkeys(
+            ('stored', 'referenced', 'orphans', 'recent', 'dangling', 'recent_dangling'), 0
+        )
+
+        for prefix in options['prefixes'] or DEFAULT_PREFIXES:
+            self.reconcile_prefix(prefix, cutoff)
+
+        totals = self.totals
+        verb = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(
+            f"Stored objects: {totals['stored']}, referenced names: {totals['referenced']}\n"
+            f"Orphans skipped as too recent: {totals['recent']}\n"
+            f"Missing files skipped as too recent: {totals['recent_dangling']}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['orphans']} orphaned object(s) and rows for {totals['dangling']} missing file(s)."
+        ))
+
+    def reconcile_prefix(self, prefix, cutoff):
+        stored = iter_stored_files(self.storage, prefix)
+        referenced = _unique(heapq.merge(
+            iter_referenced_names(IntakeFile, prefix, self.batch_size),
+            iter_referenced_names(IntakeBlob, prefix, self.batch_size),
+        ))
+        orphans, dangling = [], []
+
+        stored_item = next(stored, None)
+        referenced_name = next(referenced, None)
+        while stored_item is not None or referenced_name is not None:
+            stored_name = stored_item[0] if stored_item is not None else None
+
+            if referenced_name is None or (stored_name is not None and stored_name < referenced_name):
+                self.totals['stored'] += 1
+                if stored_item[1] < cutoff:
+                    orphans.append(stored_name)
+                else:
+                    self.totals['recent'] += 1
+                stored_item = next(stored, None)
+            elif stored_name is None or referenced_name < stored_name:
+                self.totals['referenced'] += 1
+                dangling.append(referenced_name)
+                referenced_name = next(referenced, None)
+            else:
+                self.totals['stored'] += 1
+                self.totals['referenced'] += 1
+                stored_item = next(stored, None)
+                referenced_name = next(referenced, None)
+
+            if len(orphans) >= self.batch_size:
+                self.delete_orphans(orphans)
+                orphans = []
+            if len(dangling) >= self.batch_size:
+                self.delete_dangling(dangling, cutoff)
+                dangling = []
+
+        self.delete_orphans(orphans)
+        self.delete_dangling(dangling, cutoff)
+
+    def delete_orphans(self, names):
+        if not names:
+            return
+        self.totals['orphans'] += len(names)
+        for name in names:
+            self.stdout.write(f'Orphaned object: {name}')
+        if not self.dry_run:
+            delete_stored_files(self.storage, names)
+
+    def delete_dangling(self, names, cutoff):
+        # The object may have been stored since the listing was read.
+        names = [name for name in names if not self.storage.exists(name)]
+        if not names:
+            return
+        # Rows saved after the cutoff may belong to an upload still in progress.
+        files = IntakeFile.objects.filter(file__in=names, uploaded_at__lt=cutoff)
+        blobs = IntakeBlob.objects.filter(file__in=names, created_at__lt=cutoff, files__isnull=True)
+        old_names = set(files.values_list('file', flat=True)) | set(blobs.values_list('file', flat=True))
+        self.totals['recent_dangling'] += len(set(names) - old_names)
+        if not old_names:
+            return
+        self.totals['dangling'] += len(old_names)
+        for name in sorted(old_names):
+            self.stdout.write(f'Missing object for rows: {name}')
+        if not self.dry_run:
+            with transaction.atomic():
+                # Deleting the files releases their blobs (see main/signals.py).
+                files.delete()
+                blobs.delete()
@@ -0,0 +1,169 @@
+"""
+Move intake uploads stored before upload path routing (migration 0014) from
+intake_uploads/ into resumes/legacy/ or client-docs/legacy/.
+Run with: python manage.py reroute_intake_files [--dry-run] [--workers 8] [--restart]
+
+Files are classified with the same rule as new uploads (talent forms go to
+resumes/). Objects are copied in a thread pool (server-side on S3), rows are
+updated per batch in one transaction together with a checkpoint, and old keys
+are deleted once that transaction commits. Interrupting the command loses at
+most the current batch; re-running it continues after the checkpoint.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from storages.backends.s3 import S3Storage
+
+from main.models import IntakeBlob, IntakeFile, StorageMigrationCheckpoint, intake_file_prefix
+from main.storage_cleanup import delete_stored_files
+
+CHECKPOINT_NAME = 'reroute_intake_files'
+ROUTED_PREFIXES = ('resumes/', 'client-docs/')
+LEGACY_PREFIX = 'intake_uploads/'
+
+
+def legacy_files():
+    routed = Q()
+    for prefix in ROUTED_PREFIXES:
+        routed |= Q(file__startswith=prefix)
+    return IntakeFile.objects.exclude(routed).exclude(file='')
+
+
+def rerouted_name(name, prefix):
+    if name.startswith(LEGACY_PREFIX):
+        name = name[len(LEGACY_PREFIX):]
+    return f"{prefix}/legacy/{name}"
+
+
+def copy_stored_file(storage, source, target):
+    """Copy ``source`` to ``target`` within ``storage``; server-side on S3."""
+    if isinstance(storage, S3Storage):
+        storage.bucket.copy(
+            {'Bucket': storage.bucket_name, 'Key': storage._normalize_name(source)},
+            storage._normalize_name(target),
+        )
+        return
+    if storage.exists(target):
+        # Copied by an earlier, interrupted run.
+        return
+    with storage.open(source, 'rb') as handle:
+        storage.save(target, handle)
+
+
+class Command(BaseCommand):
+    help = 'Move pre-routing intake uploads into the resumes/ and client-docs/ prefixes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the planned moves without copying or updating anything.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of files handled per transaction (default: 200).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of concurrent copy threads (default: 8).',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the saved checkpoint and start from the first file.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.storage = IntakeFile._meta.get_field('file').storage
+        checkpoint, _created = StorageMigrationCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        if options['restart']:
+            checkpoint.last_pk = checkpoint.processed = checkpoint.failed = 0
+            checkpoint.finished_at = None
+            checkpoint.save()
+        elif checkpoint.last_pk:
+            self.stdout.write(f'Resuming after IntakeFile {checkpoint.last_pk}.')
+
+        last_pk = checkpoint.last_pk
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            while True:
+                batch = list(
+                    legacy_files().filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', 'file')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1][0]
+                self.process_batch(executor, checkpoint, {name for _pk, name in batch}, last_pk)
+
+        if self.dry_run:
+            return
+
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=['finished_at', 'updated_at'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {checkpoint.processed} file(s); skipped {checkpoint.failed}.'
+        ))
+
+    def process_batch(self, executor, checkpoint, names, last_pk):
+        # Rows outside this batch may share an object; move them together.
+        rows = IntakeFile.objects.filter(file__in=names).select_related('submission__form')
+        targets = {}
+        for row in rows:
+            prefix = intake_file_prefix(row.submission)
+            # Talent classification wins when rows sharing an object disagree.
+            if row.file.name not in targets or prefix == 'resumes':
+                targets[row.file.name] = (prefix, rerouted_name(row.file.name, prefix))
+
+        if self.dry_run:
+            for name, (_prefix, target) in sorted(targets.items()):
+                self.stdout.write(f'{name} -> {target}')
+            return
+
+        results = executor.map(lambda item: self.copy(*item), sorted(targets.items()))
+        copied = {name: target for name, target in results if target}
+
+        with transaction.atomic():
+            for name, (prefix, target) in targets.items():
+                if name in copied:
+                    self.update_references(name, prefix, target)
+            checkpoint.last_pk = last_pk
+            checkpoint.processed += len(copied)
+            checkpoint.failed += len(targets) - len(copied)
+            checkpoint.save(update_fields=['last_pk', 'processed', 'failed', 'updated_at'])
+
+        delete_stored_files(self.storage, sorted(copied))
+
+    def copy(self, name, prefix_and_target):
+        target = prefix_and_target[1]
+        try:
+            copy_stored_file(self.storage, name, target)
+        except Exception as exc:
+            self.stderr.write(f'Could not copy {name}: {exc}')
+            return name, None
+        self.stdout.write(f'{name} -> {target}')
+        return name, target
+
+    def update_references(self, name, prefix, target):
+        IntakeFile.objects.filter(file=name).update(file=target)
+
+        blob = IntakeBlob.objects.select_for_update().filter(file=name).first()
+        if blob is None:
+            return
+        existing = IntakeBlob.objects.filter(sha256=blob.sha256, prefix=prefix).exclude(pk=blob.pk).first()
+        if existing is None:
+            IntakeBlob.objects.filter(pk=blob.pk).update(file=target, prefix=prefix)
+            return
+
+        # The same content is already stored under the new prefix; share it.
+        IntakeFile.objects.filter(blob=blob).update(blob=existing, file=existing.file.name)
+        IntakeBlob.objects.filter(pk=existing.pk).update(ref_count=F('ref_count') + blob.ref_count)
+        blob.delete()
+        transaction.on_commit(lambda: delete_stored_files(self.storage, [target]))
@@ -0,0 +1,98 @@
+"""
+Management command that processes queued background jobs.
+Run with: python manage.py run_jobs [--concurrency 4] [--once]
+"""
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from main.jobs import DEFAULT_VISIBILITY_TIMEOUT, claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs (intake notifications and similar tasks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=2,
+            help='Number of jobs to run in parallel (default: 2).',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Jobs to claim per poll (default: twice the concurrency).',
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=DEFAULT_VISIBILITY_TIMEOUT,
+            help='Seconds before a claimed job that has not finished is handed to another worker.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no due jobs remain instead of polling forever.',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency must be at least 1.')
+
+        batch_size = options['batch_size'] or concurrency * 2
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+
+        succeeded = failed = 0
+        executor = ThreadPoolExecutor(max_workers=concurrency) if concurrency > 1 else None
+        try:
+            while not self.stopping:
+                close_old_connections()
+                jobs = claim_jobs(batch_size, options['visibility_timeout'])
+                if not jobs:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                if executor:
+                    results = [future.result() for future in wait(
+                        [executor.submit(self._run_in_thread, job) for job in jobs]
+                    ).done]
+                else:
+                    results = [run_job(job) for job in jobs]
+
+                succeeded += results.count(True)
+                failed += results.count(False)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor:
+                executor.shutdown(wait=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Background jobs processed: {succeeded} succeeded, {failed} failed.'
+        ))
+
+    def _run_in_thread(self, job):
+        try:
+            return run_job(job)
+        finally:
+            # Each worker thread has its own connection; don't leak it.
+            connection.close()
+
+    def _request_stop(self, signum, frame):
+        self.stdout.write('Stopping after the current batch...')
+        self.stopping = True
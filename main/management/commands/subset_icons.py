@@ -0,0 +1,61 @@
+"""
+Build the Font Awesome subset for the icons the site currently uses.
+Run with: python manage.py subset_icons [--list] [--keep 5]
+
+Icons are collected from the Feature/SocialMediaLink choices, the icon
+fields on Feature, SocialMediaLink and NavigationItem rows, the templates
+and main.css (see main/icon_fonts.py). Saving one of those models rebuilds
+the subset on its own; this command covers deploys that change templates.
+"""
+import os
+
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+
+from main.icon_fonts import FONT_AWESOME_CSS, FONT_STYLES, collect_icon_set, generate_icon_subset
+from main.models import IconSubset
+
+
+def static_size(path):
+    return os.path.getsize(finders.find(path))
+
+
+class Command(BaseCommand):
+    help = 'Generate the Font Awesome subset stylesheet and fonts for the icons in use'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='Print the icon names included in the subset.',
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=5,
+            help='Number of older subsets to keep for pages cached before a change (default: 5).',
+        )
+
+    def handle(self, *args, **options):
+        icon_set = collect_icon_set()
+        created = not IconSubset.objects.filter(key=icon_set.key).exists()
+        icon_subset = generate_icon_subset(icon_set)
+
+        if options['list']:
+            for name in icon_subset.icons:
+                self.stdout.write(name)
+
+        stale = IconSubset.objects.exclude(pk=icon_subset.pk).order_by('-created_at')[options['keep']:]
+        pruned, _details = IconSubset.objects.filter(pk__in=list(stale.values_list('pk', flat=True))).delete()
+
+        subset_bytes = len(icon_subset.stylesheet.encode('utf-8')) + sum(
+            len(bytes(getattr(icon_subset, f'{style}_font'))) for style in FONT_STYLES
+        )
+        full_bytes = static_size(FONT_AWESOME_CSS) + sum(
+            static_size(path.replace('.ttf', '.woff2')) for _family, _weight, path in FONT_STYLES.values()
+        )
+        verb = 'Built' if created else 'Reused'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} subset {icon_subset.key[:12]} with {len(icon_subset.icons)} icon(s): '
+            f'{subset_bytes} bytes instead of {full_bytes}; pruned {pruned} old subset(s).'
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_intakefile_upload_path_routing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='intakesubmission',
+            name='contact_email',
+            field=models.EmailField(blank=True, help_text='Normalized (lowercase) email address from the submission', max_length=254, verbose_name='Contact Email'),
+        ),
+        migrations.AddField(
+            model_name='intakesubmission',
+            name='contact_name',
+            field=models.CharField(blank=True, db_index=True, help_text='Full name from the submission', max_length=200, verbose_name='Contact Name'),
+        ),
+        migrations.AddField(
+            model_name='intakesubmission',
+            name='contact_phone',
+            field=models.CharField(blank=True, db_index=True, help_text='Phone number from the submission', max_length=50, verbose_name='Contact Phone'),
+        ),
+        migrations.AddIndex(
+            model_name='intakesubmission',
+            index=models.Index(fields=['form', 'contact_email'], name='main_submission_form_email_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def _extract_contact(data, email_labels):
+    if not isinstance(data, dict):
+        data = {}
+
+    email = ''
+    for label in (*email_labels, 'Email Address', 'email'):
+        email = (data.get(label) or '').strip().lower()
+        if email:
+            break
+
+    phone = (data.get('Phone Number') or data.get('phone') or '').strip()
+
+    first_name = (data.get('First Name') or data.get('first_name') or '').strip()
+    last_name = (data.get('Last Name') or data.get('last_name') or '').strip()
+    if first_name and last_name:
+        name = f"{first_name} {last_name}"
+    else:
+        name = (data.get('Full Name') or data.get('full_name') or '').strip()
+
+    return email[:254], name[:200], phone[:50]
+
+
+def backfill_contact_columns(apps, schema_editor):
+    IntakeField = apps.get_model('main', 'IntakeField')
+    IntakeSubmission = apps.get_model('main', 'IntakeSubmission')
+
+    email_labels_by_form = {}
+    for form_id, label in IntakeField.objects.filter(field_type='email').values_list('form_id', 'label'):
+        email_labels_by_form.setdefault(form_id, []).append(label)
+
+    pending = []
+    submissions = IntakeSubmission.objects.only('id', 'form_id', 'data').order_by('pk')
+    for submission in submissions.iterator(chunk_size=BATCH_SIZE):
+        email, name, phone = _extract_contact(
+            submission.data,
+            email_labels_by_form.get(submission.form_id, ()),
+        )
+        submission.contact_email = email
+        submission.contact_name = name
+        submission.contact_phone = phone
+        pending.append(submission)
+
+        if len(pending) >= BATCH_SIZE:
+            IntakeSubmission.objects.bulk_update(
+                pending, ['contact_email', 'contact_name', 'contact_phone']
+            )
+            pending = []
+
+    if pending:
+        IntakeSubmission.objects.bulk_update(
+            pending, ['contact_email', 'contact_name', 'contact_phone']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_intakesubmission_contact_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_contact_columns, migrations.RunPython.noop),
+    ]
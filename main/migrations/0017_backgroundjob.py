@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_backfill_intakesubmission_contact_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task', models.CharField(help_text='Name of the registered job handler (see main.jobs.JOB_HANDLERS)', max_length=100, verbose_name='Task')),
+                ('payload', models.JSONField(blank=True, default=dict, help_text='Arguments passed to the job handler', verbose_name='Payload')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('dead', 'Dead (gave up after retries)')], default='pending', max_length=20, verbose_name='Status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('max_attempts', models.PositiveIntegerField(default=5, help_text='The job is dead-lettered after this many failed attempts', verbose_name='Max Attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='The job will not be picked up before this time', verbose_name='Run After')),
+                ('locked_until', models.DateTimeField(blank=True, help_text='Running jobs become visible to other workers again after this time', null=True, verbose_name='Locked Until')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Background Job',
+                'verbose_name_plural': 'Background Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='main_job_status_run_after_idx')],
+            },
+        ),
+    ]
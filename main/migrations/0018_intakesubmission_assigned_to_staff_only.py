@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_backgroundjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='intakesubmission',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, help_text='Staff member responsible for this submission', limit_choices_to={'is_staff': True}, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Assigned To'),
+        ),
+    ]
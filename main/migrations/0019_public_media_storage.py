@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:56
+
+import main.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_intakesubmission_assigned_to_staff_only'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='banner',
+            name='image',
+            field=models.ImageField(blank=True, help_text='The image that appears on the right side of the banner (optional)', null=True, storage=main.storage.public_media_storage, upload_to='banner/', verbose_name='Banner Image'),
+        ),
+        migrations.AlterField(
+            model_name='genericpagesection',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Optional image for this section', null=True, storage=main.storage.public_media_storage, upload_to='generic/', verbose_name='Section Image'),
+        ),
+        migrations.AlterField(
+            model_name='minipost',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Small image that appears in the sidebar mini-posts section', null=True, storage=main.storage.public_media_storage, upload_to='miniposts/', verbose_name='Sidebar Post Image'),
+        ),
+        migrations.AlterField(
+            model_name='pagecontent',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Optional image for this section', null=True, storage=main.storage.public_media_storage, upload_to='page_content/', verbose_name='Section Image'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text="Image that appears with this article (appears in the 'Ipsum sed dolor' section)", null=True, storage=main.storage.public_media_storage, upload_to='posts/', verbose_name='Article Image'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0019_public_media_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntakeBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('prefix', models.CharField(help_text='resumes or client-docs; identical content is shared within a prefix', max_length=50, verbose_name='Storage Prefix')),
+                ('file', models.FileField(max_length=255, upload_to='', verbose_name='Stored File')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of uploaded files that point at this content', verbose_name='References')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stored Upload',
+                'verbose_name_plural': 'Stored Uploads',
+                'constraints': [models.UniqueConstraint(fields=('sha256', 'prefix'), name='main_intakeblob_sha256_prefix_uniq')],
+            },
+        ),
+        migrations.AddField(
+            model_name='intakefile',
+            name='blob',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Deduplicated content; empty for files stored before deduplication', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='files', to='main.intakeblob', verbose_name='Stored Upload'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0020_intakeblob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageMigrationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Command')),
+                ('last_pk', models.BigIntegerField(default=0, help_text='Rows up to this primary key have been handled', verbose_name='Last Processed ID')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Files Moved')),
+                ('failed', models.PositiveIntegerField(default=0, help_text='Files that could not be copied (e.g. missing from storage)', verbose_name='Files Skipped')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Storage Migration Checkpoint',
+                'verbose_name_plural': 'Storage Migration Checkpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:05
+
+import main.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0021_storagemigrationcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(help_text='Storage name of the original image (content-hashed, so it never changes in place)', max_length=255, verbose_name='Source Image')),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=10, verbose_name='Format')),
+                ('width', models.PositiveIntegerField(verbose_name='Width')),
+                ('height', models.PositiveIntegerField(verbose_name='Height')),
+                ('file', models.ImageField(max_length=255, storage=main.storage.public_media_storage, upload_to='derivatives/', verbose_name='Image')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Image Derivative',
+                'verbose_name_plural': 'Image Derivatives',
+                'ordering': ['source_name', 'format', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('source_name', 'format', 'width'), name='main_imagederivative_source_format_width_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0022_imagederivative'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IconSubset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='SHA-256 of the icon set this subset covers', max_length=64, unique=True, verbose_name='Key')),
+                ('icons', models.JSONField(default=list, verbose_name='Icons')),
+                ('stylesheet', models.TextField(verbose_name='Stylesheet')),
+                ('solid_font', models.BinaryField(blank=True, default=b'', verbose_name='Solid Font')),
+                ('regular_font', models.BinaryField(blank=True, default=b'', verbose_name='Regular Font')),
+                ('brands_font', models.BinaryField(blank=True, default=b'', verbose_name='Brands Font')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Icon Subset',
+                'verbose_name_plural': 'Icon Subsets',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0023_iconsubset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='claim_token',
+            field=models.UUIDField(blank=True, editable=False, help_text='Set on every claim; only the worker holding it may record the outcome', null=True, verbose_name='Claim Token'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0024_backgroundjob_claim_token'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='intakefile',
+            name='file',
+            field=models.FileField(upload_to='', verbose_name='Uploaded File'),
+        ),
+    ]
@@ -1,8 +1,12 @@
+import hashlib
+from datetime import timedelta
 from pathlib import Path
 
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.utils.text import get_valid_filename
+from .storage import public_media_storage
+from .storage_cleanup import delete_stored_files, purge_after_commit
 from .validators import validate_resume_upload
 
 
@@ -31,13 +35,63 @@ def _is_talent_submission(submission):
     )
 
 
+def extract_submission_contact(data):
+    """
+    Pull normalized email, full name and phone values out of submission data.
+    """
+    if not isinstance(data, dict):
+        data = {}
+
+    email = (data.get('Email Address') or data.get('email') or '').strip().lower()
+    phone = (data.get('Phone Number') or data.get('phone') or '').strip()
+
+    first_name = (data.get('First Name') or data.get('first_name') or '').strip()
+    last_name = (data.get('Last Name') or data.get('last_name') or '').strip()
+    if first_name and last_name:
+        name = f"{first_name} {last_name}"
+    else:
+        name = (data.get('Full Name') or data.get('full_name') or '').strip()
+
+    return {
+        'email': email[:254],
+        'name': name[:200],
+        'phone': phone[:50],
+    }
+
+
+def intake_file_prefix(submission):
+    """Route talent uploads to resumes/ and client uploads to client-docs/."""
+    return "resumes" if _is_talent_submission(submission) else "client-docs"
+
+
+def _upload_extension(filename):
+    extension = Path(filename or "").suffix.lower()
+    return extension if extension[1:].isalnum() else ""
+
+
 def intake_file_upload_path(instance, filename):
     """
-    Route talent uploads to resumes/ and client uploads to client-docs/.
+    Kept because migration 0014 references it. IntakeFile.file has no
+    upload_to any more: IntakeFile.save stores the content as an IntakeBlob
+    and points the field at the blob's object, named by intake_blob_name().
+    """
+    prefix = intake_file_prefix(instance.submission)
+    if instance.blob is None:
+        # No blob yet (e.g. the field assigned outside IntakeFile.save): use
+        # the dated scheme the files had before blobs existed.
+        safe_filename = get_valid_filename(Path(filename or "upload").name) or "upload"
+        return f"{prefix}/{timezone.now():%Y/%m}/{safe_filename}"
+    return intake_blob_name(prefix, instance.blob.sha256, _upload_extension(filename))
+
+
+def intake_blob_name(prefix, digest, extension):
+    """
+    Content-addressed storage name for an IntakeBlob, under the resumes/ or
+    client-docs/ prefix. Names can't collide, so storing an upload takes a
+    single PUT with no probing for a free name, and the uploaded name is kept
+    in IntakeFile.original_filename.
     """
-    safe_filename = get_valid_filename(Path(filename or "upload").name) or "upload"
-    prefix = "resumes" if _is_talent_submission(instance.submission) else "client-docs"
-    return f"{prefix}/{timezone.now():%Y/%m}/{safe_filename}"
+    return f"{prefix}/sha256/{digest[:2]}/{digest}{extension}"
 
 class Banner(models.Model):
     heading = models.CharField(
@@ -82,6 +136,7 @@ class Banner(models.Model):
     )
     image = models.ImageField(
         upload_to='banner/',
+        storage=public_media_storage,
         blank=True,
         null=True,
         verbose_name="Banner Image",
@@ -143,6 +198,7 @@ class Feature(models.Model):
 class Post(models.Model):
     image = models.ImageField(
         upload_to='posts/',
+        storage=public_media_storage,
         blank=True,
         null=True,
         verbose_name="Article Image",
@@ -175,6 +231,7 @@ class Post(models.Model):
 class MiniPost(models.Model):
     image = models.ImageField(
         upload_to='miniposts/',
+        storage=public_media_storage,
         blank=True,
         null=True,
         verbose_name="Sidebar Post Image",
@@ -273,6 +330,7 @@ class PageContent(models.Model):
     )
     image = models.ImageField(
         upload_to='page_content/',
+        storage=public_media_storage,
         blank=True,
         null=True,
         verbose_name="Section Image",
@@ -432,6 +490,44 @@ class IntakeField(models.Model):
             return [choice.strip() for choice in self.choices.split('\n') if choice.strip()]
         return []
 
+def needs_followup_q():
+    """
+    Q expression matching submissions that need follow-up: the follow-up
+    date has arrived, or the submission is still new after a day.
+    """
+    now = timezone.now()
+    return models.Q(next_followup_date__lte=now.date()) | models.Q(
+        status='new',
+        submitted_at__lte=now - timedelta(days=1),
+    )
+
+
+class IntakeSubmissionQuerySet(models.QuerySet):
+    def needs_followup(self):
+        """Only submissions that need follow-up"""
+        return self.filter(needs_followup_q())
+
+    def with_followup_flag(self):
+        """Annotate `is_followup_due` so rows don't recompute it in Python"""
+        # A bare boolean expression is NULL, not False, when
+        # next_followup_date is NULL; When() treats NULL as not matching.
+        return self.annotate(
+            is_followup_due=models.Case(
+                models.When(needs_followup_q(), then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            )
+        )
+
+    def dashboard_stats(self):
+        """Total, new and needs-follow-up counts in one aggregate query"""
+        return self.aggregate(
+            total=models.Count('pk'),
+            new=models.Count('pk', filter=models.Q(status='new')),
+            need_followup=models.Count('pk', filter=needs_followup_q()),
+        )
+
+
 class IntakeSubmission(models.Model):
     """Model to store form submissions"""
     STATUS_CHOICES = [
@@ -467,6 +563,28 @@ class IntakeSubmission(models.Model):
         help_text="Form field data submitted by the user"
     )
 
+    # Contact details copied out of `data` so they can be indexed and sorted
+    contact_email = models.EmailField(
+        max_length=254,
+        blank=True,
+        verbose_name="Contact Email",
+        help_text="Normalized (lowercase) email address from the submission"
+    )
+    contact_name = models.CharField(
+        max_length=200,
+        blank=True,
+        db_index=True,
+        verbose_name="Contact Name",
+        help_text="Full name from the submission"
+    )
+    contact_phone = models.CharField(
+        max_length=50,
+        blank=True,
+        db_index=True,
+        verbose_name="Contact Phone",
+        help_text="Phone number from the submission"
+    )
+
     # Status and tracking fields
     status = models.CharField(
         max_length=20,
@@ -487,6 +605,7 @@ class IntakeSubmission(models.Model):
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        limit_choices_to={'is_staff': True},
         verbose_name="Assigned To",
         help_text="Staff member responsible for this submission"
     )
@@ -521,26 +640,38 @@ class IntakeSubmission(models.Model):
     # Timestamps for tracking
     status_updated_at = models.DateTimeField(auto_now=True)
 
+    objects = IntakeSubmissionQuerySet.as_manager()
+
     class Meta:
         ordering = ['-submitted_at']
         verbose_name = "Form Submission"
         verbose_name_plural = "Form Submissions"
+        indexes = [
+            models.Index(fields=['form', 'contact_email'], name='main_submission_form_email_idx'),
+        ]
 
     def __str__(self):
         client_name = self.get_client_name()
         return f"{client_name} - {self.form.title} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.populate_contact_fields()
+        super().save(*args, **kwargs)
+
+    def populate_contact_fields(self):
+        """Fill blank contact columns from the submission data"""
+        contact = extract_submission_contact(self.data)
+        self.contact_email = (self.contact_email or contact['email']).strip().lower()
+        self.contact_name = self.contact_name or contact['name']
+        self.contact_phone = self.contact_phone or contact['phone']
+
     def get_client_name(self):
-        """Extract client name from submission data"""
-        data = self.data
-        first_name = data.get('First Name', data.get('first_name', ''))
-        last_name = data.get('Last Name', data.get('last_name', ''))
-        email = data.get('Email Address', data.get('email', ''))
-
-        if first_name and last_name:
-            return f"{first_name} {last_name}"
-        elif email:
-            return email
+        """Client name, falling back to email, from the contact columns"""
+        if self.contact_name:
+            return self.contact_name
+        elif self.contact_email:
+            return self.contact_email
         else:
             return f"Submission #{self.id}"
 
@@ -558,7 +689,7 @@ class IntakeSubmission(models.Model):
         return (timezone.now() - self.submitted_at).days
 
     def needs_followup(self):
-        """Check if submission needs follow-up"""
+        """Check if submission needs follow-up (see needs_followup_q for the SQL version)"""
         from django.utils import timezone
         if self.next_followup_date and self.next_followup_date <= timezone.now().date():
             return True
@@ -566,6 +697,127 @@ class IntakeSubmission(models.Model):
             return True
         return False
 
+class IntakeBlobManager(models.Manager):
+    def acquire(self, content, prefix, extension):
+        """
+        Return the blob holding ``content`` and take a reference to it.
+        The content is only uploaded if no blob under ``prefix`` has it yet.
+        """
+        digest = hashlib.sha256()
+        if content.seekable():
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        try:
+            return self._acquire(content, prefix, digest, extension)
+        except IntegrityError:
+            # Another upload stored the same content first; use its blob.
+            return self._acquire(content, prefix, digest, extension)
+
+    def _acquire(self, content, prefix, digest, extension):
+        with transaction.atomic(using=self.db):
+            # Locking the row keeps purge_unreferenced() from deleting the
+            # object while we take a reference to it.
+            blob = self.select_for_update().filter(sha256=digest, prefix=prefix).first()
+            if blob is not None:
+                blob.ref_count += 1
+                blob.save(update_fields=['ref_count'])
+                return blob
+            # Other uploads of this content wait on the new row until we
+            # commit, by which time the object is stored.
+            name = intake_blob_name(prefix, digest, extension)
+            blob = self.create(sha256=digest, prefix=prefix, file=name, size=content.size, ref_count=1)
+            blob.file.save(name, content, save=False)
+            if blob.file.name != name:
+                # The storage doesn't overwrite and an orphaned object had the name.
+                blob.save(update_fields=['file'])
+            return blob
+
+    def release(self, blob_id, using=None):
+        """
+        Drop a reference to a blob. A blob nothing references keeps its row
+        (with ref_count 0) until the transaction commits; then its row and
+        stored object are deleted, unless the content was acquired again.
+        """
+        with transaction.atomic(using=using):
+            blob = self.db_manager(using).select_for_update().filter(pk=blob_id, ref_count__gt=0).first()
+            if blob is None:
+                return
+            blob.ref_count -= 1
+            blob.save(update_fields=['ref_count'])
+        if not blob.ref_count:
+            purge_after_commit(self.purge_unreferenced, blob_id, using=using)
+
+    def purge_unreferenced(self, blob_ids, using=None):
+        """Delete the blobs in ``blob_ids`` whose ref_count is (still) zero."""
+        with transaction.atomic(using=using):
+            blobs = list(
+                self.db_manager(using).select_for_update().filter(pk__in=blob_ids, ref_count=0)
+            )
+            # Delete the objects while holding the row locks, so acquire()
+            # can't take a new reference to one that is going away.
+            delete_stored_files(
+                self.model._meta.get_field('file').storage,
+                sorted(blob.file.name for blob in blobs),
+            )
+            self.db_manager(using).filter(pk__in=[blob.pk for blob in blobs]).delete()
+
+    def usage(self):
+        """Stored vs. referenced bytes, i.e. what deduplication saves."""
+        totals = self.aggregate(
+            blobs=models.Count('pk'),
+            references=models.Sum('ref_count', default=0),
+            stored_bytes=models.Sum('size', default=0),
+            referenced_bytes=models.Sum(
+                models.F('size') * models.F('ref_count'),
+                default=0,
+                output_field=models.BigIntegerField(),
+            ),
+        )
+        totals['saved_bytes'] = totals['referenced_bytes'] - totals['stored_bytes']
+        return totals
+
+
+class IntakeBlob(models.Model):
+    """Deduplicated content of intake uploads, shared by IntakeFile rows"""
+    sha256 = models.CharField(
+        max_length=64,
+        verbose_name="SHA-256"
+    )
+    prefix = models.CharField(
+        max_length=50,
+        verbose_name="Storage Prefix",
+        help_text="resumes or client-docs; identical content is shared within a prefix"
+    )
+    file = models.FileField(
+        max_length=255,
+        verbose_name="Stored File"
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name="Size (bytes)"
+    )
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="References",
+        help_text="Number of uploaded files that point at this content"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = IntakeBlobManager()
+
+    class Meta:
+        verbose_name = "Stored Upload"
+        verbose_name_plural = "Stored Uploads"
+        constraints = [
+            models.UniqueConstraint(fields=['sha256', 'prefix'], name='main_intakeblob_sha256_prefix_uniq'),
+        ]
+
+    def __str__(self):
+        return self.file.name
+
+
 class IntakeFile(models.Model):
     """Model to store uploaded files from intake forms"""
     submission = models.ForeignKey(
@@ -575,9 +827,18 @@ class IntakeFile(models.Model):
         verbose_name="Form Submission"
     )
     file = models.FileField(
-        upload_to=intake_file_upload_path,
         verbose_name="Uploaded File"
     )
+    blob = models.ForeignKey(
+        IntakeBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='files',
+        verbose_name="Stored Upload",
+        help_text="Deduplicated content; empty for files stored before deduplication"
+    )
     original_filename = models.CharField(
         max_length=255,
         verbose_name="Original Filename"
@@ -593,6 +854,28 @@ class IntakeFile(models.Model):
         if self.file:
             validate_resume_upload(self.file)
 
+    def save(self, *args, **kwargs):
+        released_blob_id = None
+        # One transaction, so a failed save doesn't leave the blob's
+        # reference count raised for a row that was never written.
+        with transaction.atomic(using=kwargs.get('using')):
+            if self.file and not self.file._committed:
+                # The stored name is content-addressed, so remember what the file was called.
+                if not self.original_filename:
+                    self.original_filename = Path(self.file.name).name[:255]
+                released_blob_id = self.blob_id if self.pk else None
+                self.blob = IntakeBlob.objects.acquire(
+                    self.file,
+                    intake_file_prefix(self.submission),
+                    _upload_extension(self.file.name),
+                )
+                self.file = self.blob.file.name
+
+            super().save(*args, **kwargs)
+
+        if released_blob_id and released_blob_id != self.blob_id:
+            IntakeBlob.objects.release(released_blob_id)
+
     def __str__(self):
         return f"{self.original_filename} - {self.submission}"
 
@@ -609,6 +892,7 @@ class GenericPageSection(models.Model):
     )
     image = models.ImageField(
         upload_to='generic/',
+        storage=public_media_storage,
         blank=True,
         null=True,
         verbose_name="Section Image",
@@ -804,3 +1088,189 @@ class SocialMediaLink(models.Model):
     def get_icon_class(self):
         """Get the Font Awesome icon class for this platform"""
         return f"fa-{self.platform}"
+
+
+class BackgroundJob(models.Model):
+    """Queued unit of work processed by `manage.py run_jobs`"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_DEAD, 'Dead (gave up after retries)'),
+    ]
+
+    task = models.CharField(
+        max_length=100,
+        verbose_name="Task",
+        help_text="Name of the registered job handler (see main.jobs.JOB_HANDLERS)"
+    )
+    payload = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="Payload",
+        help_text="Arguments passed to the job handler"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Status"
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Attempts"
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=5,
+        verbose_name="Max Attempts",
+        help_text="The job is dead-lettered after this many failed attempts"
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Run After",
+        help_text="The job will not be picked up before this time"
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Locked Until",
+        help_text="Running jobs become visible to other workers again after this time"
+    )
+    claim_token = models.UUIDField(
+        blank=True,
+        null=True,
+        editable=False,
+        verbose_name="Claim Token",
+        help_text="Set on every claim; only the worker holding it may record the outcome"
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name="Last Error"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Finished At"
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='main_job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+
+class StorageMigrationCheckpoint(models.Model):
+    """Progress of a resumable storage maintenance command"""
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Command"
+    )
+    last_pk = models.BigIntegerField(
+        default=0,
+        verbose_name="Last Processed ID",
+        help_text="Rows up to this primary key have been handled"
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Files Moved"
+    )
+    failed = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Files Skipped",
+        help_text="Files that could not be copied (e.g. missing from storage)"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Finished At"
+    )
+
+    class Meta:
+        verbose_name = "Storage Migration Checkpoint"
+        verbose_name_plural = "Storage Migration Checkpoints"
+
+    def __str__(self):
+        return f"{self.name} (last ID {self.last_pk})"
+
+
+class ImageDerivative(models.Model):
+    """Resized copy of a site image, used for responsive srcset markup"""
+    FORMAT_WEBP = 'webp'
+    FORMAT_JPEG = 'jpeg'
+
+    FORMAT_CHOICES = [
+        (FORMAT_WEBP, 'WebP'),
+        (FORMAT_JPEG, 'JPEG'),
+    ]
+
+    source_name = models.CharField(
+        max_length=255,
+        verbose_name="Source Image",
+        help_text="Storage name of the original image (content-hashed, so it never changes in place)"
+    )
+    format = models.CharField(
+        max_length=10,
+        choices=FORMAT_CHOICES,
+        verbose_name="Format"
+    )
+    width = models.PositiveIntegerField(verbose_name="Width")
+    height = models.PositiveIntegerField(verbose_name="Height")
+    file = models.ImageField(
+        upload_to='derivatives/',
+        storage=public_media_storage,
+        max_length=255,
+        verbose_name="Image"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source_name', 'format', 'width']
+        verbose_name = "Image Derivative"
+        verbose_name_plural = "Image Derivatives"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source_name', 'format', 'width'],
+                name='main_imagederivative_source_format_width_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source_name} ({self.format}, {self.width}w)"
+
+
+class IconSubset(models.Model):
+    """Font Awesome subset (stylesheet and WOFF2 fonts) for the icons in use"""
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Key",
+        help_text="SHA-256 of the icon set this subset covers"
+    )
+    icons = models.JSONField(default=list, verbose_name="Icons")
+    stylesheet = models.TextField(verbose_name="Stylesheet")
+    solid_font = models.BinaryField(blank=True, default=b'', verbose_name="Solid Font")
+    regular_font = models.BinaryField(blank=True, default=b'', verbose_name="Regular Font")
+    brands_font = models.BinaryField(blank=True, default=b'', verbose_name="Brands Font")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Icon Subset"
+        verbose_name_plural = "Icon Subsets"
+
+    def __str__(self):
+        return f"{len(self.icons)} icons ({self.key[:12]})"
@@ -0,0 +1,72 @@
+"""
+Navigation tree compiler.
+
+Loads every active NavigationItem in a single query and assembles an
+immutable nested structure, so rendering the menu never touches the
+database per item, however deep the menu goes.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+
+from .models import NavigationItem
+
+
+@dataclass(frozen=True)
+class NavigationNode:
+    """One active menu entry with its active children, already ordered."""
+    id: int
+    title: str
+    url: str
+    icon_class: str
+    opens_new_window: bool
+    children: tuple = ()
+
+    @property
+    def has_children(self):
+        return bool(self.children)
+
+
+@dataclass(frozen=True)
+class NavigationTree:
+    """Top-level menu entries plus a lookup of items that have active children."""
+    roots: tuple = ()
+    parent_ids: frozenset = frozenset()
+
+    def has_children(self, item_id):
+        return item_id in self.parent_ids
+
+
+def build_navigation_tree():
+    """Compile the active navigation menu with one query."""
+    items = NavigationItem.objects.filter(is_active=True).order_by('order', 'title').values(
+        'id', 'parent_id', 'title', 'url', 'icon_class', 'opens_new_window'
+    )
+    return compile_navigation_tree(items)
+
+
+def compile_navigation_tree(items):
+    """
+    Assemble NavigationNode trees from flat item rows (dicts), preserving
+    their order. Items whose parent is missing or inactive are dropped, just
+    like they are hidden when the menu is rendered from the database.
+    """
+    children_by_parent = defaultdict(list)
+    for item in items:
+        children_by_parent[item['parent_id']].append(item)
+
+    def build_node(item):
+        return NavigationNode(
+            id=item['id'],
+            title=item['title'],
+            url=item['url'],
+            icon_class=item['icon_class'],
+            opens_new_window=item['opens_new_window'],
+            children=tuple(build_node(child) for child in children_by_parent.get(item['id'], ())),
+        )
+
+    # Only walk down from top-level items; rows in a parent cycle are never
+    # reachable from a root, so recursion always terminates.
+    return NavigationTree(
+        roots=tuple(build_node(item) for item in children_by_parent.get(None, ())),
+        parent_ids=frozenset(parent_id for parent_id in children_by_parent if parent_id is not None),
+    )
@@ -0,0 +1,97 @@
+"""
+Opt-in full-response cache for the public content pages.
+
+Responses are keyed by scheme, host and path, the query parameters listed
+in PAGE_CACHE_QUERY_PARAMS, and a global content version, which model
+signals bump whenever anything rendered on those pages changes (see
+main/signals.py). Only anonymous GET/HEAD requests without pending session
+messages or other query parameters are served from, or stored in, the
+cache, so random query strings can't fill it and evict real pages.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_versions import bump_cache_version, get_cache_version
+from .models import Banner, Feature, PageContent, Post
+from .site_chrome import SITE_CHROME_MODELS
+
+PAGE_CACHE_VERSION_KEY = "main:page_cache:version"
+PAGE_CACHE_KEY = "main:page_cache:{version}:{digest}"
+
+# Models rendered on cached pages, including everything in the site chrome.
+PAGE_CACHE_MODELS = SITE_CHROME_MODELS + (Banner, Feature, Post, PageContent)
+
+
+def cache_public_page(view_func):
+    """Serve anonymous requests for ``view_func`` from the page cache when enabled."""
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        cache_key = _page_cache_key(request)
+        response = cache.get(cache_key)
+        if response is not None:
+            return response
+
+        response = view_func(request, *args, **kwargs)
+        if _is_cacheable_response(request, response):
+            cache.set(cache_key, response, getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60))
+        return response
+
+    return _wrapped_view
+
+
+def invalidate_page_cache():
+    """Move every worker to a new content version; old pages expire on their own."""
+    bump_cache_version(PAGE_CACHE_VERSION_KEY)
+
+
+def _page_cache_key(request):
+    params = sorted(
+        (name, value)
+        for name, values in request.GET.lists()
+        for value in values
+    )
+    url = request.build_absolute_uri(request.path)
+    if params:
+        url = f"{url}?{urlencode(params)}"
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return PAGE_CACHE_KEY.format(
+        version=get_cache_version(PAGE_CACHE_VERSION_KEY),
+        digest=digest,
+    )
+
+
+def _is_cacheable_request(request):
+    if not getattr(settings, 'ENABLE_PAGE_CACHE', False):
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if set(request.GET) - set(getattr(settings, 'PAGE_CACHE_QUERY_PARAMS', [])):
+        return False
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return False
+
+    return not _has_pending_messages(request)
+
+
+def _has_pending_messages(request):
+    # len() loads the stored messages without marking them as displayed.
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def _is_cacheable_response(request, response):
+    if response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies:
+        return False
+    # Pages that rendered {% csrf_token %} carry a per-visitor token.
+    return not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
@@ -0,0 +1,213 @@
+"""
+Per-request timing: Server-Timing headers for staff and per-view latency
+histograms.
+
+RequestTimingMiddleware measures each request's total time, database time
+and query count (via connection.execute_wrapper), template rendering (via
+the TimedDjangoTemplates backend), storage calls (via
+main.storage.TimedStorageMixin) and outgoing mail. Other code can add its
+own metric with `with timed('name'):`, which is a no-op outside a request.
+
+Staff users get the numbers in a Server-Timing header, which browser dev
+tools show next to the request. Every request is also recorded in
+histograms kept per URL name in the worker process; the staff-only
+views.request_timings endpoint returns p50/p95/p99 for the worker that
+serves it.
+"""
+import math
+import os
+import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.utils import timezone
+
+# Server-Timing metric names, in header order. Durations are in ms.
+TIMED_METRICS = ('db', 'template', 'storage', 'mail')
+HISTOGRAM_METRICS = ('total',) + TIMED_METRICS + ('queries',)
+PERCENTILES = (50, 95, 99)
+UNRESOLVED_VIEW = '<unresolved>'
+
+_current_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time and call count per metric for one request."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.total = 0.0
+        self._active = set()
+
+
+@contextmanager
+def timed(metric):
+    """Add the time spent in the block to ``metric`` for the current request."""
+    timings = _current_timings.get()
+    if timings is None or metric in timings._active:
+        # Outside a request, or nested in a call already being timed.
+        yield
+        return
+    timings._active.add(metric)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[metric] += perf_counter() - start
+        timings.counts[metric] += 1
+        timings._active.discard(metric)
+
+
+@contextmanager
+def measure_request():
+    """Collect RequestTimings for everything run inside the block."""
+    timings = RequestTimings()
+    token = _current_timings.set(timings)
+    start = perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+            yield timings
+    finally:
+        timings.total = perf_counter() - start
+        _current_timings.reset(token)
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+def server_timing_header(timings):
+    entries = []
+    for metric in TIMED_METRICS:
+        if metric == 'db' or timings.counts[metric]:
+            entry = f'{metric};dur={timings.durations[metric] * 1000:.1f}'
+            noun = 'queries' if metric == 'db' else 'calls'
+            entries.append(f'{entry};desc="{timings.counts[metric]} {noun}"')
+    entries.append(f'total;dur={timings.total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram: constant memory per view, and percentiles within
+    BUCKET_GROWTH of the true value.
+    """
+    BUCKET_GROWTH = 1.05
+    # Values at or below this land in the first bucket.
+    MIN_VALUE = 0.01
+
+    def __init__(self):
+        self.buckets = defaultdict(int)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, value):
+        if value <= self.MIN_VALUE:
+            bucket = 0
+        else:
+            bucket = math.ceil(math.log(value / self.MIN_VALUE, self.BUCKET_GROWTH))
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.MIN_VALUE * self.BUCKET_GROWTH ** bucket, self.max)
+        return self.max
+
+
+_histograms = defaultdict(lambda: defaultdict(LatencyHistogram))
+_histograms_lock = threading.Lock()
+_recording_since = timezone.now()
+
+
+def record_request(view_name, timings):
+    values = {'total': timings.total * 1000, 'queries': timings.counts['db']}
+    values.update((metric, timings.durations[metric] * 1000) for metric in TIMED_METRICS)
+    with _histograms_lock:
+        for metric, value in values.items():
+            _histograms[view_name][metric].record(value)
+
+
+def get_timing_summary():
+    """p50/p95/p99 of each metric per URL name, for this worker process."""
+    with _histograms_lock:
+        views = {
+            view_name: {
+                'count': metrics['total'].count,
+                **{
+                    metric: {f'p{percent}': _round(metrics[metric].percentile(percent)) for percent in PERCENTILES}
+                    for metric in HISTOGRAM_METRICS
+                },
+            }
+            for view_name, metrics in sorted(_histograms.items())
+        }
+    return {'pid': os.getpid(), 'since': _recording_since.isoformat(), 'views': views}
+
+
+def reset_timing_histograms():
+    global _recording_since
+
+    with _histograms_lock:
+        _histograms.clear()
+        _recording_since = timezone.now()
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+class RequestTimingMiddleware:
+    """Measure every request; see the module docstring."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'ENABLE_REQUEST_TIMING', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure_request() as timings:
+            response = self.get_response(request)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        record_request(resolver_match.view_name if resolver_match else UNRESOLVED_VIEW, timings)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_active and user.is_staff:
+            response['Server-Timing'] = server_timing_header(timings)
+        return response
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with rendering counted as `template` time."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
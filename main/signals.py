@@ -1,40 +1,98 @@
-import logging
-
-from django.db.models.signals import post_delete
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import IntakeFile
-
-logger = logging.getLogger(__name__)
-
-
-def _delete_file_from_storage(field_file):
-    """Delete the backing object from the configured storage backend."""
-    if not field_file:
-        return
-
-    file_name = getattr(field_file, "name", "")
-    if not file_name:
-        return
-
-    try:
-        field_file.storage.delete(file_name)
-    except Exception:
-        logger.exception("Failed to delete file from storage: %s", file_name)
+from .icon_fonts import ICON_MODELS, invalidate_icon_set, schedule_icon_subset
+from .images import RESPONSIVE_IMAGE_MODELS, schedule_derivatives
+from .models import DynamicPage, ImageDerivative, IntakeBlob, IntakeFile
+from .page_cache import PAGE_CACHE_MODELS, invalidate_page_cache
+from .site_chrome import SITE_CHROME_MODELS, invalidate_site_chrome
+from .slug_index import invalidate_published_slugs
+from .staff_choices import invalidate_staff_choices
+from .storage_cleanup import delete_unreferenced_files, purge_after_commit
 
 
 @receiver(post_delete, sender=IntakeFile)
 def delete_intake_file_blob_on_model_delete(sender, instance, **kwargs):
     """
-    Remove uploaded blobs when IntakeFile rows are deleted.
-    Works for local media and remote backends (e.g., S3) via Django storage API.
+    Release the deleted row's IntakeBlob reference and remove the stored
+    object once no other upload shares its content.
+    Objects are deleted in batches after the transaction commits (see
+    main/storage_cleanup.py), so a rolled-back delete keeps its files.
     """
-    file_name = getattr(instance.file, "name", "")
-    if not file_name:
+    using = kwargs.get("using")
+    if instance.blob_id is not None:
+        IntakeBlob.objects.release(instance.blob_id, using=using)
         return
 
-    # Guard against deleting a file path still referenced by another row.
-    if sender.objects.filter(file=file_name).exists():
-        return
+    # Stored before deduplication (see `manage.py dedupe_intake_files`).
+    file_name = getattr(instance.file, "name", "")
+    if file_name:
+        purge_after_commit(delete_unreferenced_intake_files, file_name, using=using)
+
+
+def delete_unreferenced_intake_files(names, using=None):
+    """Delete the pre-deduplication uploads in ``names`` no IntakeFile still uses."""
+    delete_unreferenced_files(IntakeFile, "file", names, using=using)
+
+
+def _connect_invalidation(models, handler):
+    for model in models:
+        label = model._meta.label_lower
+        post_save.connect(handler, sender=model, dispatch_uid=f"{handler.__name__}_save_{label}")
+        post_delete.connect(handler, sender=model, dispatch_uid=f"{handler.__name__}_delete_{label}")
+
+
+def _invalidate_now_and_on_commit(invalidate):
+    # Invalidate right away so this process sees its own writes, and again
+    # after commit so no worker keeps data it rebuilt before the commit.
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def invalidate_site_chrome_on_change(sender, **kwargs):
+    """Drop the cached site chrome when one of its models changes."""
+    _invalidate_now_and_on_commit(invalidate_site_chrome)
+
+
+def invalidate_page_cache_on_change(sender, **kwargs):
+    """Bump the page cache content version when rendered content changes."""
+    _invalidate_now_and_on_commit(invalidate_page_cache)
+
+
+def invalidate_published_slugs_on_change(sender, **kwargs):
+    """Rebuild the published slug index when a DynamicPage changes."""
+    _invalidate_now_and_on_commit(invalidate_published_slugs)
+
+
+def invalidate_staff_choices_on_change(sender, **kwargs):
+    """Refresh the cached staff-user labels used by admin assignment widgets."""
+    _invalidate_now_and_on_commit(invalidate_staff_choices)
+
+
+def generate_image_derivatives_on_save(sender, instance, **kwargs):
+    """Queue responsive derivatives for a newly uploaded site image."""
+    source_name = getattr(instance.image, "name", "")
+    if source_name and not ImageDerivative.objects.filter(source_name=source_name).exists():
+        schedule_derivatives(source_name)
+
+
+def refresh_icon_subset_on_change(sender, **kwargs):
+    """Recollect the icons in use and build a new Font Awesome subset if they changed."""
+    _invalidate_now_and_on_commit(invalidate_icon_set)
+    schedule_icon_subset()
+
+
+_connect_invalidation(SITE_CHROME_MODELS, invalidate_site_chrome_on_change)
+_connect_invalidation(PAGE_CACHE_MODELS, invalidate_page_cache_on_change)
+_connect_invalidation((DynamicPage,), invalidate_published_slugs_on_change)
+_connect_invalidation((get_user_model(),), invalidate_staff_choices_on_change)
+_connect_invalidation(ICON_MODELS, refresh_icon_subset_on_change)
 
-    _delete_file_from_storage(instance.file)
+for model in RESPONSIVE_IMAGE_MODELS:
+    post_save.connect(
+        generate_image_derivatives_on_save,
+        sender=model,
+        dispatch_uid=f"generate_image_derivatives_on_save_{model._meta.label_lower}",
+    )
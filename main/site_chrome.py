@@ -0,0 +1,104 @@
+"""
+Cached "site chrome": the header, sidebar and footer data that base.html
+renders on every page.
+
+The snapshot is built once per content version, kept in process memory and
+shared with other workers through the default cache. Model signals bump the
+version (see main/signals.py), so the next render rebuilds it.
+"""
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from .cache_versions import bump_cache_version, get_cache_version
+from .models import ContactInfo, DynamicPage, Footer, MiniPost, NavigationItem, SocialMediaLink
+from .navigation import build_navigation_tree
+
+SITE_CHROME_VERSION_KEY = "main:site_chrome:version"
+SITE_CHROME_SNAPSHOT_KEY = "main:site_chrome:snapshot:{version}"
+SITE_CHROME_TIMEOUT = 60 * 60 * 24
+
+# Models whose rows are rendered in the site chrome.
+SITE_CHROME_MODELS = (
+    ContactInfo,
+    Footer,
+    SocialMediaLink,
+    NavigationItem,
+    MiniPost,
+    DynamicPage,
+)
+
+_process_snapshot = None
+
+
+@dataclass(frozen=True)
+class SiteChrome:
+    """Immutable snapshot of the data shared by every page template."""
+    version: str
+    contact_info: object
+    footer: object
+    social_links: tuple
+    navigation: object
+    mini_posts: tuple
+    dynamic_nav_pages: tuple
+
+    def as_context(self):
+        context = {
+            'social_links': self.social_links,
+            'nav_items': self.navigation.roots,
+            'mini_posts': self.mini_posts,
+            'dynamic_nav_pages': self.dynamic_nav_pages,
+        }
+        if self.contact_info:
+            context['contact_info'] = self.contact_info
+        if self.footer:
+            context['footer'] = self.footer
+        return context
+
+
+def build_site_chrome(version):
+    """Load every chrome query from the database into a new snapshot."""
+    return SiteChrome(
+        version=version,
+        contact_info=ContactInfo.objects.first(),
+        footer=Footer.objects.first(),
+        social_links=tuple(SocialMediaLink.objects.filter(is_active=True).order_by('order')),
+        navigation=build_navigation_tree(),
+        mini_posts=tuple(MiniPost.objects.all()[:3]),
+        dynamic_nav_pages=tuple(
+            DynamicPage.objects.filter(
+                is_published=True,
+                show_in_navigation=True
+            ).order_by('navigation_order', 'title')
+        ),
+    )
+
+
+def get_site_chrome():
+    """
+    Return the snapshot for the current version, preferring process memory,
+    then the shared cache, and only then the database.
+    """
+    global _process_snapshot
+
+    version = get_cache_version(SITE_CHROME_VERSION_KEY)
+    snapshot = _process_snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    snapshot_key = SITE_CHROME_SNAPSHOT_KEY.format(version=version)
+    snapshot = cache.get(snapshot_key)
+    if snapshot is None:
+        snapshot = build_site_chrome(version)
+        cache.set(snapshot_key, snapshot, SITE_CHROME_TIMEOUT)
+
+    _process_snapshot = snapshot
+    return snapshot
+
+
+def invalidate_site_chrome():
+    """Start a new version so every worker rebuilds the snapshot on next use."""
+    global _process_snapshot
+
+    bump_cache_version(SITE_CHROME_VERSION_KEY)
+    _process_snapshot = None
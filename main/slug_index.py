@@ -0,0 +1,95 @@
+"""
+In-memory index of published DynamicPage slugs.
+
+dynamic_page_view sits behind the `<slug:slug>/` and `<path:slug>/`
+catch-all routes, so every scanner probe (`/wp-login.php/`, `/.env/`) would
+otherwise cost a database lookup and a rendered 404. The index is rebuilt
+with one query whenever its cache version changes (see main/signals.py).
+
+Rejections are counted in process memory and added to the shared total at
+most once per REJECTED_LOOKUPS_FLUSH_INTERVAL seconds, so a probe costs no
+cache round trip (a query with the default DatabaseCache).
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponseNotFound
+
+from .cache_versions import bump_cache_version, get_cache_version
+from .models import DynamicPage
+
+PUBLISHED_SLUGS_VERSION_KEY = "main:published_slugs:version"
+REJECTED_LOOKUPS_KEY = "main:published_slugs:rejected"
+REJECTED_LOOKUPS_FLUSH_INTERVAL = 60
+
+_process_index = (None, frozenset())
+_pending_rejections = 0
+_last_flush = time.monotonic()
+_rejections_lock = threading.Lock()
+
+
+def is_published_slug(slug):
+    """Return True if ``slug`` belongs to a published DynamicPage."""
+    global _process_index
+
+    version = get_cache_version(PUBLISHED_SLUGS_VERSION_KEY)
+    index_version, slugs = _process_index
+    if index_version != version:
+        slugs = frozenset(
+            DynamicPage.objects.filter(is_published=True).values_list('slug', flat=True)
+        )
+        _process_index = (version, slugs)
+    return slug in slugs
+
+
+def invalidate_published_slugs():
+    """Force every worker to reload the slug index on its next lookup."""
+    global _process_index
+
+    bump_cache_version(PUBLISHED_SLUGS_VERSION_KEY)
+    _process_index = (None, frozenset())
+
+
+def reject_unknown_slug():
+    """Count the rejected lookup and return a static 404 response."""
+    global _pending_rejections
+
+    with _rejections_lock:
+        _pending_rejections += 1
+        flush = time.monotonic() - _last_flush >= REJECTED_LOOKUPS_FLUSH_INTERVAL
+    if flush:
+        flush_rejected_lookup_count()
+    return HttpResponseNotFound(
+        b"<h1>Not Found</h1><p>The requested resource was not found on this server.</p>"
+    )
+
+
+def flush_rejected_lookup_count():
+    """Add this process's pending rejections to the total in the shared cache."""
+    global _pending_rejections, _last_flush
+
+    with _rejections_lock:
+        pending, _pending_rejections = _pending_rejections, 0
+        _last_flush = time.monotonic()
+    if not pending or cache.add(REJECTED_LOOKUPS_KEY, pending, None):
+        return
+    try:
+        cache.incr(REJECTED_LOOKUPS_KEY, pending)
+    except ValueError:
+        cache.add(REJECTED_LOOKUPS_KEY, pending, None)
+
+
+def get_rejected_lookup_count():
+    """Total flushed by every process, plus this process's pending rejections."""
+    flush_rejected_lookup_count()
+    return cache.get(REJECTED_LOOKUPS_KEY, 0)
+
+
+def reset_rejected_lookup_count():
+    global _pending_rejections, _last_flush
+
+    with _rejections_lock:
+        _pending_rejections = 0
+        _last_flush = time.monotonic()
+    cache.delete(REJECTED_LOOKUPS_KEY)
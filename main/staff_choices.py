@@ -0,0 +1,61 @@
+"""
+Cached staff-user choices for admin assignment widgets.
+
+The submission changelist renders an assignment widget on every row. Rather
+than querying auth.User per row (or rendering every user as an <option>),
+the widgets resolve the selected user's label from a small cached mapping
+of active staff users, and search the rest through admin autocomplete.
+"""
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+STAFF_CHOICES_CACHE_KEY = "main:staff_choices"
+STAFF_CHOICES_TIMEOUT = 60 * 10
+
+
+def get_staff_user_labels():
+    """Return {str(pk): label} for active staff users, from the cache if possible."""
+    labels = cache.get(STAFF_CHOICES_CACHE_KEY)
+    if labels is None:
+        user_model = get_user_model()
+        labels = {
+            str(user.pk): str(user)
+            for user in user_model.objects.filter(is_staff=True, is_active=True).only(
+                'pk', user_model.USERNAME_FIELD
+            )
+        }
+        cache.set(STAFF_CHOICES_CACHE_KEY, labels, STAFF_CHOICES_TIMEOUT)
+    return labels
+
+
+def invalidate_staff_choices():
+    cache.delete(STAFF_CHOICES_CACHE_KEY)
+
+
+class CachedStaffAutocompleteSelect(AutocompleteSelect):
+    """Autocomplete select that renders the selected user from the staff cache."""
+
+    def optgroups(self, name, value, attr=None):
+        default = (None, [], 0)
+        groups = [default]
+        selected_choices = [
+            str(v) for v in value if str(v) not in self.choices.field.empty_values
+        ]
+        if not self.is_required and not self.allow_multiple_selected:
+            default[1].append(self.create_option(name, "", "", False, 0))
+
+        labels = get_staff_user_labels()
+        missing = [pk for pk in selected_choices if pk not in labels]
+        if missing:
+            # Assigned users who have since lost staff access are rare; look them up.
+            labels = dict(labels)
+            for user in self.choices.queryset.model._default_manager.using(self.db).filter(pk__in=missing):
+                labels[str(user.pk)] = str(user)
+
+        for pk in selected_choices:
+            if pk in labels:
+                default[1].append(
+                    self.create_option(name, pk, labels[pk], True, len(default[1]))
+                )
+        return groups
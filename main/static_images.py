@@ -0,0 +1,182 @@
+"""
+Optimize the photos bundled under main/static during collectstatic.
+
+The theme ships multi-megabyte originals (working2.jpg is 7360px wide) that
+WhiteNoise would otherwise serve untouched. OptimizedImageStaticFilesStorage
+re-encodes every JPEG/PNG to fit within STATIC_IMAGE_MAX_WIDTH x
+STATIC_IMAGE_MAX_HEIGHT, writes WebP/AVIF siblings next to it
+(images/meeting.jpg -> images/meeting.webp, images/meeting.avif) and records
+them in staticfiles-images.json, which the `{% static_image %}` tag reads to
+render <picture> markup. Encoded files are cached in STATIC_IMAGE_CACHE_DIR
+under the hash of the source and the settings, so repeat builds only encode
+images that changed.
+"""
+import hashlib
+import json
+import logging
+import posixpath
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps, features
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MANIFEST_NAME = 'staticfiles-images.json'
+# Bump when the encoding below changes so cached results are rebuilt.
+ENCODER_VERSION = 1
+
+SOURCE_FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+}
+SIBLING_FORMATS = {
+    'avif': ('AVIF', {'quality': 60, 'speed': 6}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+}
+JPEG_QUALITY = 82
+
+
+def sibling_formats():
+    """Configured sibling formats that this Pillow build can encode, best first."""
+    configured = {fmt.lower() for fmt in settings.STATIC_IMAGE_FORMATS}
+    return [fmt for fmt in SIBLING_FORMATS if fmt in configured and features.check(fmt)]
+
+
+def optimize_image(content, extension, cache_dir, max_size, formats):
+    """
+    Re-encode ``content`` and its siblings into ``cache_dir``, or reuse an
+    earlier result for the same bytes and settings.
+
+    Returns {"width", "height", "files": {"original"|format: name}} with
+    names relative to ``cache_dir``.
+    """
+    options = json.dumps([ENCODER_VERSION, extension, list(max_size), formats])
+    key = hashlib.sha256(content + options.encode('utf-8')).hexdigest()
+    directory = Path(cache_dir) / key[:2]
+    metadata_path = directory / f'{key}.json'
+    if metadata_path.exists():
+        metadata = json.loads(metadata_path.read_text())
+    else:
+        directory.mkdir(parents=True, exist_ok=True)
+        metadata = _encode_image(content, extension, directory, key, max_size, formats)
+        metadata_path.write_text(json.dumps(metadata))
+    metadata['files'] = {kind: f'{key[:2]}/{filename}' for kind, filename in metadata['files'].items()}
+    return metadata
+
+
+def _encode_image(content, extension, directory, key, max_size, formats):
+    image = ImageOps.exif_transpose(Image.open(BytesIO(content)))
+    image.load()
+    source_size = image.size
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    image.thumbnail(max_size, Image.Resampling.LANCZOS)
+
+    source_format = SOURCE_FORMATS[extension]
+    buffer = BytesIO()
+    if source_format == 'JPEG':
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    optimized = buffer.getvalue()
+    if image.size == source_size and len(optimized) >= len(content):
+        # Already as small as we can make it at this size.
+        optimized = content
+
+    files = {'original': f'{key}{extension}'}
+    (directory / files['original']).write_bytes(optimized)
+    for fmt in formats:
+        pillow_format, save_options = SIBLING_FORMATS[fmt]
+        buffer = BytesIO()
+        image.save(buffer, pillow_format, **save_options)
+        files[fmt] = f'{key}.{fmt}'
+        (directory / files[fmt]).write_bytes(buffer.getvalue())
+
+    width, height = image.size
+    return {'width': width, 'height': height, 'files': files}
+
+
+class OptimizedImageStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise's manifest storage, with bundled images optimized before hashing."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._image_manifest = None
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run=dry_run, **options)
+            return
+
+        # Point the hashing step at the optimized copies instead of the sources.
+        paths = dict(paths)
+        image_manifest = self.optimize_images(paths)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        self.save_image_manifest(image_manifest)
+
+    def optimize_images(self, paths):
+        cache = FileSystemStorage(location=settings.STATIC_IMAGE_CACHE_DIR)
+        max_size = (settings.STATIC_IMAGE_MAX_WIDTH, settings.STATIC_IMAGE_MAX_HEIGHT)
+        formats = sibling_formats()
+        source_names = {
+            name for name in paths
+            if posixpath.splitext(name)[1].lower() in SOURCE_FORMATS
+        }
+
+        image_manifest = {}
+        for name in sorted(source_names):
+            extension = posixpath.splitext(name)[1].lower()
+            storage, path = paths[name]
+            with storage.open(path) as handle:
+                content = handle.read()
+            try:
+                result = optimize_image(content, extension, cache.location, max_size, formats)
+            except OSError as exc:
+                logger.warning("Could not optimize static image %s: %s", name, exc)
+                continue
+
+            sources = {}
+            for kind, cached_name in result['files'].items():
+                target = name if kind == 'original' else f'{posixpath.splitext(name)[0]}.{kind}'
+                if kind != 'original' and target in paths:
+                    # A hand-made file with that name ships with the site; keep it.
+                    continue
+                self._replace(target, cache, cached_name)
+                paths[target] = (cache, cached_name)
+                if kind != 'original':
+                    sources[kind] = target
+            image_manifest[name] = {
+                'width': result['width'],
+                'height': result['height'],
+                'sources': sources,
+            }
+        return image_manifest
+
+    def _replace(self, name, cache, cached_name):
+        # Keep the unhashed copy in STATIC_ROOT in step with the hashed one.
+        if self.exists(name):
+            self.delete(name)
+        with cache.open(cached_name) as handle:
+            self._save(name, File(handle))
+
+    def save_image_manifest(self, image_manifest):
+        if self.exists(IMAGE_MANIFEST_NAME):
+            self.delete(IMAGE_MANIFEST_NAME)
+        self._save(IMAGE_MANIFEST_NAME, ContentFile(json.dumps(image_manifest, sort_keys=True).encode('utf-8')))
+        self._image_manifest = image_manifest
+
+    def image_variants(self, name):
+        """Return {"width", "height", "sources": {format: name}} for ``name``, or None."""
+        if self._image_manifest is None:
+            try:
+                with self.open(IMAGE_MANIFEST_NAME) as handle:
+                    self._image_manifest = json.loads(handle.read().decode('utf-8'))
+            except FileNotFoundError:
+                self._image_manifest = {}
+        return self._image_manifest.get(name)
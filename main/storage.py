@@ -0,0 +1,193 @@
+"""
+Storage backends for uploaded media.
+
+Confidential intake uploads use the `default` storage, which signs URLs.
+Site-content images use the `public` storage (see public_media_storage),
+which serves unsigned, content-hashed URLs that can be cached indefinitely.
+
+With query-string auth enabled, S3Storage.url() computes a fresh signature on
+every call, so each `{{ post.image.url }}` produces a URL browsers and CDNs
+have never seen before. If the public storage is configured to sign URLs,
+CachedUrlMixin reuses the signed URL for an object for
+MEDIA_URL_CACHE_TIMEOUT seconds, which must stay comfortably below the
+signature lifetime (AWS_QUERYSTRING_EXPIRE). Intake URLs are never reused:
+each preview or download link is signed on its own.
+"""
+import hashlib
+import logging
+import threading
+import time
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+from .request_timing import timed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_URL_CACHE_TIMEOUT = 60 * 50
+# Never hand out a cached URL with less than this much signature life left.
+MIN_URL_VALIDITY = 60
+
+
+class TimedStorageMixin:
+    """Count storage calls as `storage` time in the request's Server-Timing."""
+
+    def url(self, *args, **kwargs):
+        with timed('storage'):
+            return super().url(*args, **kwargs)
+
+    def exists(self, name):
+        with timed('storage'):
+            return super().exists(name)
+
+    def size(self, name):
+        with timed('storage'):
+            return super().size(name)
+
+    def delete(self, name):
+        with timed('storage'):
+            return super().delete(name)
+
+    def _open(self, name, mode='rb'):
+        with timed('storage'):
+            return super()._open(name, mode)
+
+    def _save(self, name, content):
+        with timed('storage'):
+            return super()._save(name, content)
+
+
+class BatchDeleteS3Storage(TimedStorageMixin, S3Storage):
+    """S3 storage that can delete many objects with DeleteObjects requests."""
+
+    delete_batch_size = 1000
+
+    def delete_many(self, names):
+        keys = [self._normalize_name(clean_name(name)) for name in names]
+        for start in range(0, len(keys), self.delete_batch_size):
+            batch = keys[start:start + self.delete_batch_size]
+            with timed('storage'):
+                response = self.bucket.delete_objects(
+                    Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+                )
+            for error in response.get('Errors', []):
+                logger.error(
+                    "Failed to delete %s from S3: %s %s",
+                    error.get('Key'), error.get('Code'), error.get('Message'),
+                )
+
+
+class CachedUrlMixin:
+    """
+    Reuse the signed URL for an object name for MEDIA_URL_CACHE_TIMEOUT
+    seconds. URLs are kept in this process only: signing is a local HMAC,
+    cheaper than a round trip to a shared cache.
+    """
+    url_cache_size = 2048
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Object name -> (signed URL, time.monotonic() deadline).
+        self._url_cache = {}
+        self._url_cache_lock = threading.Lock()
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        timeout = self._url_cache_timeout()
+        if parameters or expire or http_method or not self.querystring_auth or timeout <= 0:
+            return super().url(name, parameters=parameters, expire=expire, http_method=http_method)
+
+        now = time.monotonic()
+        cached = self._url_cache.get(name)
+        if cached is not None and now < cached[1]:
+            return cached[0]
+
+        url = super().url(name)
+        with self._url_cache_lock:
+            if len(self._url_cache) >= self.url_cache_size:
+                self._url_cache = {
+                    key: entry for key, entry in self._url_cache.items() if now < entry[1]
+                }
+                if len(self._url_cache) >= self.url_cache_size:
+                    self._url_cache = {}
+            self._url_cache[name] = (url, now + timeout)
+        return url
+
+    def delete(self, name):
+        super().delete(name)
+        self._url_cache.pop(name, None)
+
+    def delete_many(self, names):
+        super().delete_many(names)
+        for name in names:
+            self._url_cache.pop(name, None)
+
+    def _url_cache_timeout(self):
+        timeout = getattr(settings, 'MEDIA_URL_CACHE_TIMEOUT', DEFAULT_MEDIA_URL_CACHE_TIMEOUT)
+        return min(timeout, self.querystring_expire - MIN_URL_VALIDITY)
+
+
+class ContentHashedNameMixin:
+    """
+    Store files under names that include a hash of their content, e.g.
+    banner/photo.3f2a9c1b7d4e.jpg. A changed image always gets a new URL, so
+    the old one can be cached forever, and re-uploading an identical file
+    reuses the stored object.
+    """
+    hash_length = 12
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        if content.seekable():
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if content.seekable():
+            content.seek(0)
+
+        path = PurePosixPath(name)
+        suffix = "".join(path.suffixes[-1:])
+        stem = path.name[:-len(suffix)] if suffix else path.name
+        return str(path.with_name(f"{stem}.{digest.hexdigest()[:self.hash_length]}{suffix}"))
+
+
+class PublicFileSystemStorage(ContentHashedNameMixin, TimedStorageMixin, FileSystemStorage):
+    """Local storage for site images; served from MEDIA_ROOT like other media."""
+
+
+class PublicMediaS3Storage(ContentHashedNameMixin, CachedUrlMixin, BatchDeleteS3Storage):
+    """
+    S3 storage for site images, with immutable cache headers. URLs are
+    unsigned unless the storage is configured with querystring_auth, in
+    which case each process reuses them (see CachedUrlMixin).
+    """
+
+    default_object_parameters = {
+        'CacheControl': 'public, max-age=31536000, immutable',
+    }
+
+    def get_default_settings(self):
+        defaults = super().get_default_settings()
+        defaults['querystring_auth'] = False
+        defaults['object_parameters'] = dict(self.default_object_parameters)
+        return defaults
+
+
+def public_media_storage():
+    """Storage for site-content images (banners, posts, page sections)."""
+    return storages['public']
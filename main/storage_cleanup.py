@@ -0,0 +1,120 @@
+"""
+Delete stored files once the transaction that dropped them commits.
+
+Deleting a submission cascades to every IntakeFile, and each one used to
+delete its object from storage straight away, inside the transaction.
+Deletes are now collected in one batch per outermost transaction and run by
+a single on_commit callback: S3 storages that provide delete_many() send
+batched DeleteObjects requests, other storages are cleaned up from a small
+thread pool. A rolled-back transaction discards its batch, so its files are
+never deleted.
+
+A savepoint that rolls back can't take its entries out of the surrounding
+transaction's batch, so callers register a purge function with
+purge_after_commit() that re-checks, after the commit, which names are
+really unused before deleting them.
+"""
+import logging
+import weakref
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_DELETE_THREADS = 8
+
+# Database alias -> weak reference to that connection's open batch.
+_open_batches = ContextVar('storage_cleanup_batches', default=None)
+
+
+class _PendingDeletes:
+    """Keys to purge after one transaction commits, grouped by purge function."""
+
+    def __init__(self, using):
+        self.using = using
+        self.keys = defaultdict(set)
+        self.flushed = False
+
+    def flush(self):
+        self.flushed = True
+        for purge, keys in self.keys.items():
+            try:
+                purge(sorted(keys), using=self.using)
+            except Exception:
+                logger.exception("Failed to purge %s stored file(s) after commit", len(keys))
+
+
+def purge_after_commit(purge, key, using=None):
+    """
+    Call ``purge(keys, using=using)`` after the current transaction commits,
+    once for every ``key`` passed in during that transaction. ``purge`` must
+    check that each key is still unused before deleting anything. Outside a
+    transaction it is called straight away.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        purge([key], using=connection.alias)
+        return
+    _pending_deletes(connection).keys[purge].add(key)
+
+
+def _pending_deletes(connection):
+    """Return the batch of the current outermost transaction, creating it if needed."""
+    batches = _open_batches.get()
+    if batches is None:
+        batches = {}
+        _open_batches.set(batches)
+
+    # The only strong reference to a batch is its on_commit callback. Django
+    # drops that when the transaction (or the savepoint the callback was
+    # registered in) rolls back, which ends the batch along with it.
+    ref = batches.get(connection.alias)
+    batch = ref() if ref is not None else None
+    if batch is None or batch.flushed:
+        batch = _PendingDeletes(connection.alias)
+        transaction.on_commit(batch.flush, using=connection.alias)
+        batches[connection.alias] = weakref.ref(batch)
+    return batch
+
+
+def delete_unreferenced_files(model, field_name, names, using=None):
+    """
+    Delete the ``names`` that no ``model`` row references in ``field_name``
+    from the field's storage. A purge function for purge_after_commit().
+    """
+    referenced = set(
+        model._default_manager.using(using)
+        .filter(**{f"{field_name}__in": names})
+        .values_list(field_name, flat=True)
+    )
+    storage = model._meta.get_field(field_name).storage
+    delete_stored_files(storage, [name for name in names if name not in referenced])
+
+
+def delete_stored_files(storage, names):
+    """Delete ``names`` from ``storage``, logging (not raising) failures."""
+    if not names:
+        return
+
+    if hasattr(storage, "delete_many"):
+        try:
+            storage.delete_many(names)
+        except Exception:
+            logger.exception("Failed to delete %s file(s) from storage", len(names))
+        return
+
+    def delete_one(name):
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception("Failed to delete file from storage: %s", name)
+
+    if len(names) == 1:
+        delete_one(names[0])
+        return
+
+    with ThreadPoolExecutor(max_workers=min(MAX_DELETE_THREADS, len(names))) as executor:
+        list(executor.map(delete_one, names))
@@ -0,0 +1,39 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from main.critical_css import get_critical_css
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def critical_stylesheet(context, path):
+    """
+    Link the stylesheet at ``path``. When critical CSS has been extracted for
+    the page template being rendered (see main/critical_css.py), inline it and
+    load the full stylesheet without blocking the first paint.
+
+    Usage: {% critical_stylesheet 'assets/css/main.css' %}
+    """
+    href = static(path)
+    critical = get_critical_css(_page_template_name(context))
+    if not critical:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '<link rel="stylesheet" href="{}" media="print" onload="this.media=\'all\'">\n'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        # Rules come from our own main.css; just never let them close the tag.
+        mark_safe(critical.replace("</", "<\\/")),
+        href,
+        href,
+    )
+
+
+def _page_template_name(context):
+    # The template passed to render(), e.g. "index.html", not base.html.
+    origin = getattr(context.template, "origin", None)
+    name = getattr(origin, "template_name", "") or ""
+    return name.rsplit("/", 1)[-1].removesuffix(".html")
@@ -0,0 +1,89 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from main.images import get_responsive_sources
+
+register = template.Library()
+
+# Browsers take the first <source> they support, so list smaller formats first.
+STATIC_IMAGE_FORMAT_ORDER = ("avif", "webp")
+
+
+@register.simple_tag
+def responsive_image(image, alt="", sizes="100vw", loading="lazy", css_class=""):
+    """
+    Render an image field as a <picture> with WebP and JPEG srcsets, explicit
+    dimensions and lazy loading. Pass loading="eager" for above-the-fold
+    images (e.g. the homepage banner) so they are fetched with high priority.
+    Falls back to a plain <img> until derivatives have been generated.
+
+    Usage: {% responsive_image post.image alt=post.title sizes="(max-width: 736px) 100vw, 33vw" %}
+    """
+    if not image:
+        return ""
+
+    priority = "high" if loading == "eager" else "auto"
+    class_attr = format_html(' class="{}"', css_class) if css_class else ""
+    sources = get_responsive_sources(image.name)
+    if not sources.get("jpeg"):
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}" decoding="async" fetchpriority="{}"{} />',
+            image.url, alt, loading, priority, class_attr,
+        )
+
+    fallback_url, width, height = sources["jpeg"][-1]
+    webp_source = ""
+    if sources.get("webp"):
+        webp_source = format_html(
+            '<source type="image/webp" srcset="{}" sizes="{}" />',
+            _srcset(sources["webp"]), sizes,
+        )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"'
+        ' loading="{}" decoding="async" fetchpriority="{}"{} /></picture>',
+        webp_source, fallback_url, _srcset(sources["jpeg"]), sizes, width, height, alt,
+        loading, priority, class_attr,
+    )
+
+
+@register.simple_tag
+def static_image(path, alt="", loading="lazy", css_class=""):
+    """
+    Render a bundled static image as a <picture> offering the AVIF/WebP
+    siblings written by collectstatic (see main.static_images), with the
+    optimized JPEG/PNG as fallback. Renders a plain <img> when the static
+    storage doesn't optimize images (e.g. with DEBUG on).
+
+    Usage: {% static_image 'images/meeting.jpg' alt=post.title %}
+    """
+    priority = "high" if loading == "eager" else "auto"
+    class_attr = format_html(' class="{}"', css_class) if css_class else ""
+    image_variants = getattr(staticfiles_storage, "image_variants", None)
+    variants = image_variants(path) if image_variants else None
+    if not variants:
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}" decoding="async" fetchpriority="{}"{} />',
+            static(path), alt, loading, priority, class_attr,
+        )
+
+    sources = format_html_join(
+        "",
+        '<source type="image/{}" srcset="{}" />',
+        ((image_format, static(name)) for image_format, name in _best_first(variants["sources"])),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" width="{}" height="{}" alt="{}"'
+        ' loading="{}" decoding="async" fetchpriority="{}"{} /></picture>',
+        sources, static(path), variants["width"], variants["height"], alt,
+        loading, priority, class_attr,
+    )
+
+
+def _best_first(sources):
+    return sorted(sources.items(), key=lambda item: STATIC_IMAGE_FORMAT_ORDER.index(item[0]))
+
+
+def _srcset(candidates):
+    return format_html_join(", ", "{} {}w", ((url, width) for url, width, _height in candidates))
@@ -0,0 +1,26 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from main.js_bundle import JS_BUNDLES
+
+register = template.Library()
+
+
+@register.simple_tag
+def script_bundle(name):
+    """
+    Load the JavaScript bundle ``name`` built by collectstatic (see
+    main/js_bundle.py) with `defer`. When the static storage doesn't build
+    bundles (e.g. with DEBUG on), load its source files instead, also
+    deferred and in the same order.
+
+    Usage: {% script_bundle 'assets/js/site.js' %}
+    """
+    has_bundle = getattr(staticfiles_storage, "has_bundle", None)
+    if has_bundle and has_bundle(name):
+        return format_html('<script src="{}" defer></script>', static(name))
+    return format_html_join(
+        "\n", '<script src="{}" defer></script>', ((static(source),) for source in JS_BUNDLES[name])
+    )
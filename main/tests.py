@@ -1,25 +1,93 @@
 import io
+import json
+import os
+from datetime import timedelta
 import shutil
 import tempfile
+import time
 import zipfile
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
 from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from django.test import TestCase
-from django.test.utils import override_settings
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
-
-from .models import IntakeField, IntakeFile, IntakeForm, IntakeSubmission
+from django.utils import timezone
+from fontTools.ttLib import TTFont
+from PIL import Image
+from storages.backends.s3 import S3Storage
+
+from .context_processors import global_context
+from .critical_css import (
+    extract_critical_css,
+    get_critical_css,
+    render_page,
+    representative_pages,
+    theme_css,
+)
+from .css_purge import PURGE_REPORT_NAME, purge_stylesheet, used_tokens
+from .icon_fonts import generate_icon_subset, get_icon_stylesheet_url, invalidate_icon_set
+from .images import generate_derivatives, invalidate_responsive_sources
+from .jobs import claim_jobs, run_job
+from .js_bundle import JS_BUNDLES, VLQ_CHARS, build_bundle
+from .models import (
+    BackgroundJob,
+    ContactInfo,
+    DynamicPage,
+    Feature,
+    IconSubset,
+    ImageDerivative,
+    IntakeBlob,
+    IntakeField,
+    IntakeFile,
+    IntakeForm,
+    IntakeSubmission,
+    NavigationItem,
+    PageContent,
+    Post,
+    StorageMigrationCheckpoint,
+    intake_file_upload_path,
+)
+from .navigation import build_navigation_tree
+from .page_cache import invalidate_page_cache
+from .request_timing import (
+    LatencyHistogram,
+    get_timing_summary,
+    measure_request,
+    reset_timing_histograms,
+    server_timing_header,
+)
+from .site_chrome import SITE_CHROME_VERSION_KEY, get_site_chrome, invalidate_site_chrome
+from .slug_index import REJECTED_LOOKUPS_KEY, get_rejected_lookup_count, reset_rejected_lookup_count
+from .storage import BatchDeleteS3Storage, PublicFileSystemStorage, PublicMediaS3Storage
+from .templatetags.responsive_images import responsive_image, static_image
+from .templatetags.script_bundles import script_bundle
+from .upload_handlers import IntakeUploadGuardHandler
 from .validators import (
+    MAX_FILES_PER_SUBMISSION,
     MAX_RESUME_FILE_SIZE_BYTES,
     normalize_and_validate_submission_email,
     validate_resume_upload,
 )
-from .views import send_intake_notification
+from .views import _send_owner_email_alert, _submission_exists_for_email, send_intake_notification
+
+
+# Query-count tests measure the app's own queries; the default database
+# cache would add reads of its cache table.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+# Critical CSS extracted from the setup_hirexfed_content pages.
+CRITICAL_CSS_SNAPSHOTS = Path(settings.BASE_DIR) / "fixtures" / "critical_css"
 
 
 class SubmissionValidationTests(TestCase):
@@ -317,6 +385,30 @@ class IntakeSubmissionValidationFeedbackTests(TestCase):
             any("already been used" in str(message) for message in messages_list)
         )
 
+    def test_submission_contact_columns_are_populated_on_create(self):
+        submission = IntakeSubmission.objects.create(
+            form=self.form,
+            data={
+                "Email Address": " Candidate@Business.com ",
+                "Full Name": "Casey Candidate",
+                "Phone Number": "555-0100",
+            },
+        )
+
+        self.assertEqual(submission.contact_email, "candidate@business.com")
+        self.assertEqual(submission.contact_name, "Casey Candidate")
+        self.assertEqual(submission.contact_phone, "555-0100")
+        self.assertEqual(submission.get_client_name(), "Casey Candidate")
+
+    def test_duplicate_check_is_a_single_query(self):
+        IntakeSubmission.objects.create(
+            form=self.form,
+            data={"Email Address": "candidate@business.com"},
+        )
+
+        with self.assertNumQueries(1):
+            self.assertTrue(_submission_exists_for_email(self.form, "Candidate@Business.com"))
+
     def test_invalid_email_domain_shows_field_specific_reason(self):
         response = self.client.post(
             reverse("intake_form", kwargs={"slug": self.form.slug}),
@@ -335,6 +427,389 @@ class IntakeSubmissionValidationFeedbackTests(TestCase):
         )
 
 
+class IntakeUploadGuardTests(TestCase):
+    def setUp(self):
+        self.form = IntakeForm.objects.create(
+            title="Upload Form",
+            slug="upload-form",
+            email_recipients="ops@examplebusiness.com",
+            allow_file_uploads=True,
+        )
+        IntakeField.objects.create(
+            form=self.form,
+            label="Email Address",
+            field_name="email",
+            field_type="email",
+            is_required=True,
+            order=1,
+        )
+        self.request = RequestFactory().post("/")
+
+    def test_spoofed_upload_is_rejected_while_streaming(self):
+        response = self.client.post(
+            reverse("intake_form", kwargs={"slug": self.form.slug}),
+            data={
+                "email": "candidate@business.com",
+                "documents": SimpleUploadedFile("resume.pdf", b"MZ\x90\x00not-a-pdf"),
+            },
+            follow=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        messages_list = [str(message) for message in response.context["messages"]]
+        self.assertIn('Documents: File "resume.pdf" content does not match its extension.', messages_list)
+        self.assertFalse(IntakeSubmission.objects.exists())
+
+    def test_oversized_upload_stops_at_the_first_chunk_over_the_limit(self):
+        handler = IntakeUploadGuardHandler(self.request)
+        handler.new_file("documents", "resume.pdf", "application/pdf", None)
+        chunk = b"%PDF-" + b"0" * (MAX_RESUME_FILE_SIZE_BYTES - 5)
+        self.assertEqual(handler.receive_data_chunk(chunk, 0), chunk)
+
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b"0", len(chunk))
+        self.assertEqual(self.request.intake_upload_error[0], "documents")
+        self.assertIn("too large", self.request.intake_upload_error[1])
+
+    def test_too_many_files_are_rejected_before_reading_them(self):
+        handler = IntakeUploadGuardHandler(self.request)
+        for _ in range(MAX_FILES_PER_SUBMISSION):
+            handler.new_file("documents", "resume.pdf", "application/pdf", None)
+            handler.receive_data_chunk(b"%PDF-1.4", 0)
+            handler.file_complete(8)
+
+        with self.assertRaises(StopUpload):
+            handler.new_file("documents", "resume.pdf", "application/pdf", None)
+        self.assertEqual(
+            self.request.intake_upload_error,
+            (None, f"Upload error: You can upload up to {MAX_FILES_PER_SUBMISSION} files per submission."),
+        )
+
+    def test_files_outside_the_upload_field_are_not_checked_or_counted(self):
+        handler = IntakeUploadGuardHandler(self.request)
+        for _ in range(MAX_FILES_PER_SUBMISSION + 1):
+            handler.new_file("avatar", "avatar.gif", "image/gif", None)
+            self.assertEqual(handler.receive_data_chunk(b"GIF89a", 0), b"GIF89a")
+            handler.file_complete(6)
+
+        handler.new_file("documents", "resume.pdf", "application/pdf", None)
+        handler.receive_data_chunk(b"%PDF-1.4", 0)
+        handler.file_complete(8)
+
+        self.assertEqual(handler.file_count, 1)
+        self.assertFalse(hasattr(self.request, "intake_upload_error"))
+
+
+class CachedUrlStorageTests(TestCase):
+    def setUp(self):
+        self.storage = PublicMediaS3Storage(
+            bucket_name="xfed-media",
+            region_name="us-east-1",
+            access_key="AKIAEXAMPLE",
+            secret_key="secret",
+            location="public",
+            querystring_auth=True,
+            querystring_expire=7200,
+        )
+
+    def test_signed_url_is_reused_until_the_cache_expires(self):
+        with patch.object(S3Storage, "url", autospec=True, side_effect=S3Storage.url) as signer:
+            first = self.storage.url("posts/photo.jpg")
+            second = self.storage.url("posts/photo.jpg")
+            with patch("main.storage.time.monotonic", return_value=time.monotonic() + 60 * 60):
+                third = self.storage.url("posts/photo.jpg")
+
+        self.assertEqual(first, second)
+        self.assertIn("Signature=", first)
+        self.assertEqual(signer.call_count, 2)
+        self.assertIn("Signature=", third)
+
+    def test_custom_parameters_bypass_the_cache(self):
+        self.storage.url("posts/photo.jpg")
+        url = self.storage.url(
+            "posts/photo.jpg",
+            parameters={"ResponseContentDisposition": "attachment"},
+        )
+
+        self.assertIn("response-content-disposition=attachment", url)
+
+    def test_intake_storage_signs_every_url(self):
+        storage = BatchDeleteS3Storage(
+            bucket_name="xfed-media",
+            region_name="us-east-1",
+            access_key="AKIAEXAMPLE",
+            secret_key="secret",
+            location="media",
+            querystring_auth=True,
+        )
+
+        with patch.object(S3Storage, "url", autospec=True, side_effect=S3Storage.url) as signer:
+            storage.url("resumes/cv.pdf")
+            storage.url("resumes/cv.pdf")
+
+        self.assertEqual(signer.call_count, 2)
+
+
+class PublicMediaStorageTests(TestCase):
+    def setUp(self):
+        self.temp_media_root = tempfile.mkdtemp(prefix="xfed-public-media-")
+        self.addCleanup(shutil.rmtree, self.temp_media_root, ignore_errors=True)
+        self.private_root = os.path.join(self.temp_media_root, "private")
+        self.public_root = os.path.join(self.temp_media_root, "public")
+
+    def test_identical_content_is_stored_once_under_a_hashed_name(self):
+        storage = PublicFileSystemStorage(location=self.public_root)
+
+        first = storage.save("posts/photo.jpg", ContentFile(b"jpeg-bytes"))
+        second = storage.save("posts/photo.jpg", ContentFile(b"jpeg-bytes"))
+        changed = storage.save("posts/photo.jpg", ContentFile(b"other-bytes"))
+
+        self.assertRegex(first, r"^posts/photo\.[0-9a-f]{12}\.jpg$")
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, changed)
+        self.assertEqual(len(os.listdir(os.path.join(self.public_root, "posts"))), 2)
+
+    def test_migrate_command_moves_existing_images_to_public_storage(self):
+        os.makedirs(os.path.join(self.private_root, "posts"))
+        with open(os.path.join(self.private_root, "posts", "photo.jpg"), "wb") as handle:
+            handle.write(b"jpeg-bytes")
+        post = Post.objects.create(title="Article", description="Body", image="posts/photo.jpg")
+
+        storages_setting = {
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+                "OPTIONS": {"location": self.private_root},
+            },
+            "public": {
+                "BACKEND": "main.storage.PublicFileSystemStorage",
+                "OPTIONS": {"location": self.public_root},
+            },
+        }
+        with override_settings(STORAGES=storages_setting):
+            call_command("migrate_public_media", "--delete-source", stdout=io.StringIO())
+
+        post.refresh_from_db()
+        self.assertRegex(post.image.name, r"^posts/photo\.[0-9a-f]{12}\.jpg$")
+        self.assertTrue(os.path.exists(os.path.join(self.public_root, post.image.name)))
+        self.assertFalse(os.path.exists(os.path.join(self.private_root, "posts", "photo.jpg")))
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        self.temp_media_root = tempfile.mkdtemp(prefix="xfed-responsive-media-")
+        self.addCleanup(shutil.rmtree, self.temp_media_root, ignore_errors=True)
+        self.media_override = override_settings(MEDIA_ROOT=self.temp_media_root)
+        self.media_override.enable()
+        self.addCleanup(self.media_override.disable)
+        cache.clear()
+        invalidate_responsive_sources()
+
+    def _create_post(self, size=(1600, 800)):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (200, 40, 40)).save(buffer, "JPEG")
+        image = SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(title="Article", description="Body", image=image)
+
+    def test_saving_an_image_generates_webp_and_jpeg_derivatives(self):
+        post = self._create_post()
+
+        derivatives = ImageDerivative.objects.filter(source_name=post.image.name)
+        self.assertEqual(
+            sorted(derivatives.values_list("format", "width", "height")),
+            sorted(
+                (image_format, width, width // 2)
+                for image_format in ("jpeg", "webp")
+                for width in (320, 640, 960, 1280, 1600)
+            ),
+        )
+        with Image.open(derivatives.get(format="webp", width=640).file) as webp:
+            self.assertEqual((webp.format, webp.size), ("WEBP", (640, 320)))
+        self.assertEqual(generate_derivatives(post.image.name), 0)
+
+    def test_tag_renders_srcset_with_dimensions_and_lazy_loading(self):
+        post = self._create_post()
+
+        html = responsive_image(post.image, alt="Article", sizes="33vw")
+
+        self.assertIn('<source type="image/webp" srcset="', html)
+        self.assertRegex(html, r"-320w\.[0-9a-f]{12}\.webp 320w")
+        self.assertRegex(html, r"-1600w\.[0-9a-f]{12}\.jpg 1600w")
+        self.assertIn('sizes="33vw"', html)
+        self.assertIn('width="1600" height="800"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('alt="Article"', html)
+
+    def test_warm_tag_renders_without_queries(self):
+        post = self._create_post()
+        responsive_image(post.image)
+
+        with self.assertNumQueries(0):
+            html = responsive_image(post.image)
+
+        self.assertIn("<picture>", html)
+
+    def test_tag_falls_back_to_plain_img_without_derivatives(self):
+        post = Post.objects.create(title="Article", description="Body", image="posts/missing.jpg")
+
+        html = responsive_image(post.image, loading="eager")
+
+        self.assertNotIn("<picture>", html)
+        self.assertIn('src="/media/posts/missing.jpg"', html)
+        self.assertIn('fetchpriority="high"', html)
+
+    def test_backfill_command_generates_missing_and_prunes_unused(self):
+        post = self._create_post()
+        ImageDerivative.objects.all().delete()
+        ImageDerivative.objects.create(source_name="posts/old.jpg", format="jpeg", width=320, height=160)
+
+        call_command("generate_image_derivatives", "--prune", stdout=io.StringIO())
+
+        self.assertEqual(ImageDerivative.objects.filter(source_name=post.image.name).count(), 10)
+        self.assertFalse(ImageDerivative.objects.filter(source_name="posts/old.jpg").exists())
+
+    def test_prune_skips_derivatives_without_a_stored_file(self):
+        for width, file_name in ((320, "derivatives/old-320w.jpg"), (640, "")):
+            ImageDerivative.objects.create(
+                source_name="posts/old.jpg", format="jpeg", width=width, height=width // 2, file=file_name
+            )
+
+        with patch("main.management.commands.generate_image_derivatives.delete_stored_files") as delete:
+            call_command("generate_image_derivatives", "--prune", stdout=io.StringIO())
+
+        self.assertEqual(delete.call_args.args[1], ["derivatives/old-320w.jpg"])
+        self.assertFalse(ImageDerivative.objects.exists())
+
+
+def _decode_source_map(mappings):
+    """(line, column, source, source line, source column) for every segment."""
+    segments, fields = [], [0, 0, 0, 0]
+    for line, encoded_line in enumerate(mappings.split(";")):
+        fields[0] = 0
+        for encoded in filter(None, encoded_line.split(",")):
+            values, value, shift = [], 0, 0
+            for char in encoded:
+                digit = VLQ_CHARS.index(char)
+                value += (digit & 31) << shift
+                shift += 5
+                if not digit & 32:
+                    values.append(-(value >> 1) if value & 1 else value >> 1)
+                    value = shift = 0
+            fields = [field + delta for field, delta in zip(fields, values)]
+            segments.append((line, *fields))
+    return segments
+
+
+class JsBundleTests(TestCase):
+    def test_bundle_is_minified_with_a_source_map_back_to_each_file(self):
+        first = "/*! banner */\n// setup\nvar first = 1;\n"
+        second = "function second() {\n    /* value */\n    return first;\n}\n"
+
+        js, source_map = build_bundle("assets/js/site.js", [("assets/js/a.js", first), ("vendor/b.js", second)])
+        source_map = json.loads(source_map)
+
+        self.assertEqual(
+            js,
+            "/*! banner */var first=1;\nfunction second(){return first;};\n//# sourceMappingURL=site.js.map\n",
+        )
+        self.assertEqual(source_map["sources"], ["a.js", "../../vendor/b.js"])
+        self.assertEqual(source_map["sourcesContent"], [first, second])
+        bundle_lines = js.split("\n")
+        for line, column, source, source_line, source_column in _decode_source_map(source_map["mappings"]):
+            original = source_map["sourcesContent"][source].split("\n")[source_line]
+            self.assertEqual(bundle_lines[line][column], original[source_column])
+        self.assertIn((1, 18, 1, 2, 4), _decode_source_map(source_map["mappings"]))
+
+    def test_pages_defer_the_source_files_when_no_bundle_was_built(self):
+        html = self.client.get(reverse("index")).content.decode()
+
+        for source in JS_BUNDLES["assets/js/site.js"]:
+            self.assertIn(f'<script src="/static/{source}" defer></script>', html)
+        self.assertNotIn("site.js", html)
+
+    def test_collectstatic_fingerprints_the_bundle_and_its_source_map(self):
+        temp_dir = tempfile.mkdtemp(prefix="xfed-js-bundle-")
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        source_dir = os.path.join(temp_dir, "source")
+        for index, name in enumerate(JS_BUNDLES["assets/js/site.js"]):
+            path = os.path.join(source_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as handle:
+                handle.write(f"// file {index}\nwindow.step{index} = {index};\n")
+
+        with override_settings(
+            STATIC_ROOT=os.path.join(temp_dir, "static"),
+            STATICFILES_DIRS=[source_dir],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "main.js_bundle.BundledJsStaticFilesStorage"},
+            },
+        ):
+            call_command("collectstatic", "--noinput", verbosity=0)
+            tag = script_bundle("assets/js/site.js")
+
+        static_root = os.path.join(temp_dir, "static")
+        with open(os.path.join(static_root, "staticfiles.json")) as handle:
+            hashed = json.load(handle)["paths"]
+        with open(os.path.join(static_root, hashed["assets/js/site.js"])) as handle:
+            bundle = handle.read()
+        self.assertTrue(bundle.startswith("window.step0=0;\nwindow.step1=1;\n"))
+        self.assertIn(f"//# sourceMappingURL={os.path.basename(hashed['assets/js/site.js.map'])}", bundle)
+        self.assertEqual(tag, f'<script src="/static/{hashed["assets/js/site.js"]}" defer></script>')
+
+
+class StaticImageOptimizationTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="xfed-static-images-")
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.source_dir = os.path.join(self.temp_dir, "source")
+        os.makedirs(os.path.join(self.source_dir, "images"))
+        buffer = io.BytesIO()
+        Image.new("RGB", (3000, 2000), (30, 90, 160)).save(buffer, "JPEG", quality=95)
+        self.source_bytes = buffer.getvalue()
+        with open(os.path.join(self.source_dir, "images", "photo.jpg"), "wb") as handle:
+            handle.write(self.source_bytes)
+
+        self.static_override = override_settings(
+            STATIC_ROOT=os.path.join(self.temp_dir, "static"),
+            STATICFILES_DIRS=[self.source_dir],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATIC_IMAGE_MAX_WIDTH=1200,
+            STATIC_IMAGE_MAX_HEIGHT=1200,
+            STATIC_IMAGE_FORMATS=["webp"],
+            STATIC_IMAGE_CACHE_DIR=os.path.join(self.temp_dir, "cache"),
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "main.static_images.OptimizedImageStaticFilesStorage"},
+            },
+        )
+        self.static_override.enable()
+        self.addCleanup(self.static_override.disable)
+
+    def test_collectstatic_resizes_images_and_writes_webp_siblings(self):
+        call_command("collectstatic", "--noinput", verbosity=0)
+
+        static_root = os.path.join(self.temp_dir, "static")
+        with Image.open(os.path.join(static_root, "images", "photo.jpg")) as optimized:
+            self.assertEqual(optimized.size, (1200, 800))
+        with Image.open(os.path.join(static_root, "images", "photo.webp")) as webp:
+            self.assertEqual((webp.format, webp.size), ("WEBP", (1200, 800)))
+        with open(os.path.join(static_root, "staticfiles.json")) as handle:
+            self.assertIn("images/photo.webp", json.load(handle)["paths"])
+
+        html = static_image("images/photo.jpg", alt="Photo")
+        self.assertRegex(html, r'<source type="image/webp" srcset="/static/images/photo\.[0-9a-f]{12}\.webp" />')
+        self.assertRegex(html, r'src="/static/images/photo\.[0-9a-f]{12}\.jpg" width="1200" height="800"')
+
+    def test_repeat_collectstatic_reuses_cached_encodings(self):
+        call_command("collectstatic", "--noinput", verbosity=0)
+        with patch("main.static_images._encode_image") as encode:
+            call_command("collectstatic", "--noinput", verbosity=0)
+
+        encode.assert_not_called()
+
+
 class IntakeFileAdminPreviewTests(TestCase):
     def setUp(self):
         self.temp_media_root = tempfile.mkdtemp(prefix="xfed-test-media-")
@@ -384,6 +859,79 @@ class IntakeFileAdminPreviewTests(TestCase):
         self.assertIn("inline;", response["Content-Disposition"])
         self.assertEqual(response["Content-Type"], "application/pdf")
 
+    def _preview_url(self):
+        return reverse(
+            "admin:main_intakesubmission_file_preview",
+            args=[self.submission.pk, self.uploaded_file.pk],
+        )
+
+    def test_proxied_preview_supports_range_and_conditional_requests(self):
+        response = self.client.get(self._preview_url(), HTTP_RANGE="bytes=0-4")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-")
+        self.assertEqual(response["Content-Range"], "bytes 0-4/22")
+        self.assertIn("private", response["Cache-Control"])
+
+        response = self.client.get(self._preview_url(), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(self._preview_url(), HTTP_RANGE="bytes=100-")
+        self.assertEqual(response.status_code, 416)
+
+    def test_invalid_range_sends_the_whole_file(self):
+        response = self.client.get(self._preview_url(), HTTP_RANGE="bytes=5-2")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content)), 22)
+        self.assertNotIn("Content-Range", response)
+
+    @override_settings(INTAKE_FILE_DELIVERY="redirect")
+    def test_redirect_mode_sends_presigned_url(self):
+        s3_storage = BatchDeleteS3Storage(
+            bucket_name="xfed-media",
+            region_name="us-east-1",
+            access_key="AKIAEXAMPLE",
+            secret_key="secret",
+            querystring_auth=True,
+        )
+        with patch.object(IntakeFile._meta.get_field("file"), "storage", s3_storage):
+            response = self.client.get(self._preview_url())
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("Signature=", response["Location"])
+        self.assertIn("response-content-disposition=inline", response["Location"])
+
+    @override_settings(INTAKE_FILE_DELIVERY="accel", INTAKE_FILE_ACCEL_PREFIX="/protected-media/")
+    def test_accel_mode_hands_the_file_to_nginx(self):
+        response = self.client.get(self._preview_url())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"],
+            f"/protected-media/{self.uploaded_file.file.name}",
+        )
+        self.assertEqual(response.content, b"")
+
+    @override_settings(INTAKE_FILE_DELIVERY="sendfile")
+    def test_sendfile_mode_redirects_when_the_storage_has_no_local_paths(self):
+        response = self.client.get(self._preview_url())
+        self.assertEqual(response["X-Sendfile"], self.uploaded_file.file.path)
+
+        s3_storage = BatchDeleteS3Storage(
+            bucket_name="xfed-media",
+            region_name="us-east-1",
+            access_key="AKIAEXAMPLE",
+            secret_key="secret",
+            querystring_auth=True,
+        )
+        with patch.object(IntakeFile._meta.get_field("file"), "storage", s3_storage):
+            response = self.client.get(self._preview_url())
+
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn("X-Sendfile", response)
+        self.assertIn("Signature=", response["Location"])
+
 
 class IntakeFileCleanupTests(TestCase):
     def setUp(self):
@@ -427,7 +975,8 @@ class IntakeFileCleanupTests(TestCase):
         file_name = intake_file.file.name
 
         self.assertTrue(storage.exists(file_name))
-        intake_file.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            intake_file.delete()
         self.assertFalse(storage.exists(file_name))
 
     def test_deleting_submission_removes_related_uploaded_blobs(self):
@@ -452,11 +1001,312 @@ class IntakeFileCleanupTests(TestCase):
         self.assertTrue(first_storage.exists(first_name))
         self.assertTrue(second_storage.exists(second_name))
 
-        submission.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            submission.delete()
 
         self.assertFalse(first_storage.exists(first_name))
         self.assertFalse(second_storage.exists(second_name))
 
+    def test_cascading_delete_removes_blobs_in_one_batch_after_commit(self):
+        submission, first_file = self._create_submission_with_file(
+            "batch-delete@examplebusiness.com",
+            "resume-a.pdf",
+        )
+        IntakeFile.objects.create(
+            submission=submission,
+            file=SimpleUploadedFile("resume-b.pdf", b"%PDF-1.7 second"),
+        )
+        names = set(submission.files.values_list("file", flat=True))
+        storage = first_file.file.storage
+
+        with patch("main.models.delete_stored_files") as delete_stored_files:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                submission.delete()
+                delete_stored_files.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        delete_stored_files.assert_called_once_with(storage, sorted(names))
+
+    def test_rolled_back_delete_keeps_files(self):
+        _submission, intake_file = self._create_submission_with_file(
+            "rollback@examplebusiness.com",
+            "resume-rollback.pdf",
+        )
+        storage = intake_file.file.storage
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    intake_file.submission.delete()
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertTrue(storage.exists(intake_file.file.name))
+        self.assertTrue(IntakeFile.objects.filter(pk=intake_file.pk).exists())
+
+    def test_rolled_back_savepoint_keeps_only_its_own_files(self):
+        submission, kept = self._create_submission_with_file("savepoint@examplebusiness.com", "resume-a.pdf")
+        dropped = IntakeFile.objects.create(
+            submission=submission,
+            file=SimpleUploadedFile("resume-b.pdf", b"%PDF-1.7 second"),
+        )
+        storage = kept.file.storage
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                dropped.delete()
+                try:
+                    with transaction.atomic():
+                        kept.delete()
+                        raise RuntimeError("abort")
+                except RuntimeError:
+                    pass
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(storage.exists(kept.file.name))
+        self.assertFalse(storage.exists(dropped.file.name))
+
+    def test_batch_of_a_rolled_back_block_is_not_reused(self):
+        submission, first = self._create_submission_with_file("reuse@examplebusiness.com", "resume-a.pdf")
+        second = IntakeFile.objects.create(
+            submission=submission,
+            file=SimpleUploadedFile("resume-b.pdf", b"%PDF-1.7 second"),
+        )
+        storage = first.file.storage
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    first.delete()
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+            second.delete()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(storage.exists(first.file.name))
+        self.assertFalse(storage.exists(second.file.name))
+
+    def test_s3_delete_many_uses_batches_of_one_thousand(self):
+        storage = BatchDeleteS3Storage(bucket_name="xfed-media", location="media")
+        bucket = MagicMock()
+        bucket.delete_objects.return_value = {}
+        names = [f"resumes/{index}.pdf" for index in range(2500)]
+
+        with patch.object(BatchDeleteS3Storage, "bucket", bucket):
+            storage.delete_many(names)
+
+        batch_sizes = [
+            len(call.kwargs["Delete"]["Objects"]) for call in bucket.delete_objects.call_args_list
+        ]
+        self.assertEqual(batch_sizes, [1000, 1000, 500])
+        first_key = bucket.delete_objects.call_args_list[0].kwargs["Delete"]["Objects"][0]["Key"]
+        self.assertEqual(first_key, "media/resumes/0.pdf")
+
+    def test_identical_uploads_share_one_blob_until_the_last_is_deleted(self):
+        _first_submission, first_file = self._create_submission_with_file(
+            "first@examplebusiness.com",
+            "resume.pdf",
+        )
+        _second_submission, second_file = self._create_submission_with_file(
+            "second@examplebusiness.com",
+            "resume-copy.pdf",
+        )
+        storage = first_file.file.storage
+
+        self.assertEqual(first_file.blob_id, second_file.blob_id)
+        self.assertEqual(first_file.file.name, second_file.file.name)
+        self.assertEqual(IntakeBlob.objects.get().ref_count, 2)
+        self.assertEqual(IntakeBlob.objects.usage()["saved_bytes"], first_file.blob.size)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first_file.delete()
+        self.assertTrue(storage.exists(second_file.file.name))
+        self.assertEqual(IntakeBlob.objects.get().ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second_file.delete()
+        self.assertFalse(storage.exists(second_file.file.name))
+        self.assertFalse(IntakeBlob.objects.exists())
+
+    def test_failed_save_does_not_keep_a_blob_reference(self):
+        submission, first_file = self._create_submission_with_file("first@examplebusiness.com", "resume.pdf")
+        second_file = IntakeFile(
+            submission=submission,
+            file=SimpleUploadedFile("resume.pdf", b"%PDF-1.7\n1 0 obj\n<<>>\n", content_type="application/pdf"),
+        )
+
+        with self.assertRaises(ValueError):
+            second_file.save(force_update=True)
+
+        self.assertEqual(IntakeBlob.objects.get(pk=first_file.blob_id).ref_count, 1)
+
+    def test_content_uploaded_again_before_the_purge_runs_is_kept(self):
+        _submission, first_file = self._create_submission_with_file("first@examplebusiness.com", "resume.pdf")
+        storage = first_file.file.storage
+        with self.captureOnCommitCallbacks() as callbacks:
+            first_file.delete()
+        self.assertEqual(IntakeBlob.objects.get().ref_count, 0)
+
+        # The release has committed but its purge hasn't run yet.
+        _submission, second_file = self._create_submission_with_file("second@examplebusiness.com", "resume.pdf")
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(second_file.file.name, first_file.file.name)
+        self.assertTrue(storage.exists(second_file.file.name))
+        self.assertEqual(IntakeBlob.objects.get().ref_count, 1)
+
+    def test_dedupe_command_links_legacy_files_and_removes_duplicates(self):
+        submission = IntakeSubmission.objects.create(form=self.form, data={})
+        storage = IntakeFile._meta.get_field("file").storage
+        legacy_names = [
+            storage.save(f"client-docs/2025/01/{name}", ContentFile(b"%PDF-1.7 legacy"))
+            for name in ("resume.pdf", "resume-again.pdf")
+        ]
+        IntakeFile.objects.bulk_create(
+            IntakeFile(submission=submission, file=name, original_filename=name.rsplit("/", 1)[-1])
+            for name in legacy_names
+        )
+
+        output = io.StringIO()
+        call_command("dedupe_intake_files", stdout=output)
+
+        blob = IntakeBlob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(blob.file.name, legacy_names[0])
+        self.assertEqual(set(IntakeFile.objects.values_list("file", flat=True)), {legacy_names[0]})
+        self.assertFalse(storage.exists(legacy_names[1]))
+        self.assertIn(f"Bytes saved by deduplication: {blob.size}", output.getvalue())
+
+
+class ReconcileMediaCommandTests(TestCase):
+    def setUp(self):
+        self.temp_media_root = tempfile.mkdtemp(prefix="xfed-reconcile-media-")
+        self.media_override = override_settings(MEDIA_ROOT=self.temp_media_root)
+        self.media_override.enable()
+        self.addCleanup(shutil.rmtree, self.temp_media_root, ignore_errors=True)
+        self.addCleanup(self.media_override.disable)
+
+        form = IntakeForm.objects.create(
+            title="Client Consultation",
+            slug="client-consultation",
+            email_recipients="ops@examplebusiness.com",
+        )
+        self.submission = IntakeSubmission.objects.create(form=form, data={})
+        self.storage = IntakeFile._meta.get_field("file").storage
+        self.kept = IntakeFile.objects.create(
+            submission=self.submission,
+            file=SimpleUploadedFile("kept.pdf", b"%PDF-1.7 kept"),
+        )
+        self.old_orphan = self.storage.save("client-docs/2024/01/crashed.pdf", ContentFile(b"%PDF old"))
+        old_time = (timezone.now() - timedelta(days=3)).timestamp()
+        os.utime(self.storage.path(self.old_orphan), (old_time, old_time))
+        self.new_orphan = self.storage.save("client-docs/2026/10/in-flight.pdf", ContentFile(b"%PDF new"))
+        self.dangling = IntakeFile.objects.bulk_create([
+            IntakeFile(submission=self.submission, file="client-docs/2024/01/missing.pdf"),
+        ])[0]
+        IntakeFile.objects.filter(pk=self.dangling.pk).update(uploaded_at=timezone.now() - timedelta(days=3))
+
+    def test_dry_run_only_reports(self):
+        output = io.StringIO()
+        call_command("reconcile_media", "--dry-run", stdout=output)
+
+        self.assertIn(f"Orphaned object: {self.old_orphan}", output.getvalue())
+        self.assertIn("Missing object for rows: client-docs/2024/01/missing.pdf", output.getvalue())
+        self.assertTrue(self.storage.exists(self.old_orphan))
+        self.assertTrue(IntakeFile.objects.filter(pk=self.dangling.pk).exists())
+
+    def test_deletes_old_orphans_and_dangling_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconcile_media", "--batch-size", "1", stdout=io.StringIO())
+
+        self.assertFalse(self.storage.exists(self.old_orphan))
+        self.assertTrue(self.storage.exists(self.new_orphan))
+        self.assertTrue(self.storage.exists(self.kept.file.name))
+        self.assertFalse(IntakeFile.objects.filter(pk=self.dangling.pk).exists())
+        self.assertTrue(IntakeFile.objects.filter(pk=self.kept.pk).exists())
+
+    def test_recent_dangling_rows_are_left_alone(self):
+        recent = IntakeFile.objects.bulk_create([
+            IntakeFile(submission=self.submission, file="client-docs/2026/10/still-saving.pdf"),
+        ])[0]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("reconcile_media", stdout=io.StringIO())
+
+        self.assertTrue(IntakeFile.objects.filter(pk=recent.pk).exists())
+        self.assertFalse(IntakeFile.objects.filter(pk=self.dangling.pk).exists())
+
+    def test_rows_are_kept_when_their_object_exists_by_the_time_of_the_delete(self):
+        old = timezone.now() - timedelta(days=3)
+        IntakeFile.objects.filter(pk=self.kept.pk).update(uploaded_at=old)
+        IntakeBlob.objects.update(created_at=old)
+
+        # A listing read before the kept object was stored.
+        with patch(
+            "main.management.commands.reconcile_media.iter_stored_files",
+            side_effect=lambda storage, prefix: iter(()),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("reconcile_media", stdout=io.StringIO())
+
+        self.assertTrue(IntakeFile.objects.filter(pk=self.kept.pk).exists())
+        self.assertTrue(self.storage.exists(self.kept.file.name))
+        self.assertFalse(IntakeFile.objects.filter(pk=self.dangling.pk).exists())
+
+
+class RerouteIntakeFilesCommandTests(TestCase):
+    def setUp(self):
+        self.temp_media_root = tempfile.mkdtemp(prefix="xfed-reroute-media-")
+        self.media_override = override_settings(MEDIA_ROOT=self.temp_media_root)
+        self.media_override.enable()
+        self.addCleanup(shutil.rmtree, self.temp_media_root, ignore_errors=True)
+        self.addCleanup(self.media_override.disable)
+        self.storage = IntakeFile._meta.get_field("file").storage
+
+    def _legacy_file(self, form_slug, filename):
+        form, _created = IntakeForm.objects.get_or_create(
+            slug=form_slug,
+            defaults={"title": form_slug.replace("-", " ").title(), "email_recipients": "ops@examplebusiness.com"},
+        )
+        submission = IntakeSubmission.objects.create(form=form, data={})
+        name = self.storage.save(f"intake_uploads/2024/05/{filename}", ContentFile(b"%PDF-1.7 " + filename.encode()))
+        return IntakeFile.objects.bulk_create([
+            IntakeFile(submission=submission, file=name, original_filename=filename),
+        ])[0]
+
+    def test_moves_legacy_files_into_routed_prefixes(self):
+        talent = self._legacy_file("join-our-team", "resume.pdf")
+        client = self._legacy_file("client-consultation", "return.pdf")
+
+        call_command("reroute_intake_files", "--batch-size", "1", "--workers", "2", stdout=io.StringIO())
+
+        talent.refresh_from_db()
+        client.refresh_from_db()
+        self.assertEqual(talent.file.name, "resumes/legacy/2024/05/resume.pdf")
+        self.assertEqual(client.file.name, "client-docs/legacy/2024/05/return.pdf")
+        self.assertTrue(self.storage.exists(talent.file.name))
+        self.assertFalse(self.storage.exists("intake_uploads/2024/05/resume.pdf"))
+
+        checkpoint = StorageMigrationCheckpoint.objects.get(name="reroute_intake_files")
+        self.assertEqual((checkpoint.last_pk, checkpoint.processed), (client.pk, 2))
+        self.assertIsNotNone(checkpoint.finished_at)
+
+    def test_resumes_after_the_checkpoint(self):
+        first = self._legacy_file("join-our-team", "first.pdf")
+        second = self._legacy_file("join-our-team", "second.pdf")
+        StorageMigrationCheckpoint.objects.create(name="reroute_intake_files", last_pk=first.pk)
+
+        call_command("reroute_intake_files", stdout=io.StringIO())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.file.name, "intake_uploads/2024/05/first.pdf")
+        self.assertEqual(second.file.name, "resumes/legacy/2024/05/second.pdf")
+
 
 class IntakeFileUploadRoutingTests(TestCase):
     def setUp(self):
@@ -507,6 +1357,23 @@ class IntakeFileUploadRoutingTests(TestCase):
         )
         self.assertTrue(intake_file.file.name.startswith("client-docs/"))
 
+    def test_uploads_are_stored_under_content_addressed_names(self):
+        intake_file = self._create_file_for_form("join-our-team", "Join Our Team")
+
+        self.assertRegex(intake_file.file.name, r"^resumes/sha256/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$")
+        self.assertEqual(intake_file.original_filename, "upload.pdf")
+
+    def test_upload_path_without_a_blob_uses_the_dated_scheme(self):
+        intake_file = self._create_file_for_form("join-our-team", "Join Our Team")
+
+        path = intake_file_upload_path(IntakeFile(submission=intake_file.submission), "My CV.pdf")
+
+        self.assertEqual(path, f"resumes/{timezone.now():%Y/%m}/My_CV.pdf")
+        self.assertEqual(
+            intake_file_upload_path(intake_file, "My CV.pdf"),
+            f"resumes/sha256/{intake_file.blob.sha256[:2]}/{intake_file.blob.sha256}.pdf",
+        )
+
 
 class SetupHireXfedContentCommandTests(TestCase):
     def test_default_mode_preserves_existing_submissions(self):
@@ -553,3 +1420,651 @@ class SetupHireXfedContentCommandTests(TestCase):
     def test_reset_requires_force_when_debug_false(self):
         with self.assertRaises(CommandError):
             call_command("setup_hirexfed_content", reset=True)
+
+
+class IconSubsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_icon_set()
+
+    def test_subset_contains_only_icons_in_use(self):
+        icon_subset = generate_icon_subset()
+
+        self.assertIn('.fa-gem:before{content:"\\f3a5"}', icon_subset.stylesheet)
+        self.assertIn(".fa-twitter:before", icon_subset.stylesheet)
+        self.assertNotIn(".fa-ambulance:before", icon_subset.stylesheet)
+        solid = TTFont(io.BytesIO(bytes(icon_subset.solid_font)))
+        cmap = solid.getBestCmap()
+        self.assertEqual(solid.flavor, "woff2")
+        self.assertIn(0xF3A5, cmap)  # fa-gem, a Feature choice
+        self.assertIn(0xF0C9, cmap)  # sidebar toggle drawn by main.css
+        self.assertNotIn(0xF0F9, cmap)  # fa-ambulance
+
+    def test_pages_link_full_stylesheet_until_subset_is_built(self):
+        html = render_to_string("base.html", request=RequestFactory().get("/"))
+
+        self.assertIn("assets/css/fontawesome-all.min.css", html)
+
+    def test_saves_that_keep_the_icon_set_do_not_rebuild_the_subset(self):
+        generate_icon_subset()
+        feature = Feature.objects.create(icon="fa-gem", title="Gem", description="Gem")
+
+        with patch("main.icon_fonts.generate_icon_subset") as generate:
+            with self.captureOnCommitCallbacks(execute=True):
+                feature.title = "Renamed"
+                feature.save()
+
+        generate.assert_not_called()
+
+    def test_icons_used_only_in_page_content_are_subset(self):
+        generate_icon_subset()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PageContent.objects.create(
+                page="homepage",
+                section_type="main_content",
+                title="Emergencies",
+                content='<p><span class="icon solid fa-ambulance"></span> Same-day help</p>',
+            )
+
+        icon_subset = IconSubset.objects.latest("created_at")
+        self.assertIn(".fa-ambulance:before", icon_subset.stylesheet)
+        self.assertIn(reverse("icon_subset_stylesheet", args=[icon_subset.key]), get_icon_stylesheet_url())
+
+    def test_new_navigation_icon_builds_and_serves_a_new_subset(self):
+        generate_icon_subset()
+        original_url = get_icon_stylesheet_url()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NavigationItem.objects.create(title="Emergency", url="#", icon_class="fa fa-ambulance")
+
+        stylesheet_url = get_icon_stylesheet_url()
+        self.assertIsNotNone(original_url)
+        self.assertNotEqual(stylesheet_url, original_url)
+        self.assertIn(stylesheet_url, render_to_string("base.html", request=RequestFactory().get("/")))
+
+        response = self.client.get(stylesheet_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/css; charset=utf-8")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn(".fa-ambulance:before", response.content.decode())
+
+        key = IconSubset.objects.latest("created_at").key
+        font_response = self.client.get(reverse("icon_subset_font", args=[key, "solid"]))
+        self.assertEqual(font_response.status_code, 200)
+        self.assertEqual(font_response["Content-Type"], "font/woff2")
+        self.assertEqual(self.client.get(reverse("icon_subset_font", args=[key, "duotone"])).status_code, 404)
+
+
+@override_settings(CRITICAL_CSS_ROOT=CRITICAL_CSS_SNAPSHOTS)
+class CriticalCssTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command("setup_hirexfed_content", stdout=io.StringIO())
+
+    def setUp(self):
+        cache.clear()
+        get_critical_css.cache_clear()
+        self.addCleanup(get_critical_css.cache_clear)
+
+    def test_extracted_css_matches_snapshots(self):
+        css = theme_css()
+        pages = representative_pages()
+
+        self.assertEqual(sorted(pages), ["dynamic_page", "elements", "generic", "index", "intake"])
+        for template_name, path in pages.items():
+            with self.subTest(template=template_name):
+                snapshot = (CRITICAL_CSS_SNAPSHOTS / f"{template_name}.css").read_text(encoding="utf-8")
+                self.assertEqual(
+                    extract_critical_css(render_page(path), css),
+                    snapshot,
+                    "Critical CSS snapshots are out of date; see extract_critical_css for how to refresh them.",
+                )
+
+    def test_critical_css_keeps_above_the_fold_rules_only(self):
+        critical = get_critical_css("index")
+
+        self.assertIn("#header{", critical)
+        self.assertIn("#banner{", critical)
+        self.assertIn("#sidebar.inactive{", critical)
+        self.assertNotIn(".posts{", critical)
+        self.assertNotIn(":hover", critical)
+        self.assertNotIn("@import", critical)
+
+    def test_pages_inline_critical_css_and_load_main_css_without_blocking(self):
+        html = self.client.get(reverse("index")).content.decode()
+
+        self.assertIn("<style>" + get_critical_css("index")[:200], html)
+        self.assertIn(
+            '<link rel="stylesheet" href="/static/assets/css/main.css" media="print" onload="this.media=\'all\'">',
+            html,
+        )
+        self.assertIn('<noscript><link rel="stylesheet" href="/static/assets/css/main.css"></noscript>', html)
+
+    def test_templates_without_critical_css_link_main_css(self):
+        html = render_to_string("base.html", request=RequestFactory().get("/"))
+
+        self.assertIn('<link rel="stylesheet" href="/static/assets/css/main.css">', html)
+        self.assertNotIn("<style>", html)
+
+
+class CssPurgeTests(TestCase):
+    def test_purge_keeps_selectors_whose_names_are_all_used(self):
+        css = (
+            '@import url("fonts.css");\n'
+            ".used, .unused { color: red; }\n"
+            "ul.used > li:not(.unused)::before { content: ''; }\n"
+            "input[type=\"checkbox\"]:checked + label { color: blue; }\n"
+            "@media screen and (max-width: 480px) { .unused { margin: 0; } }\n"
+            "@media print { .used { margin: 0; } }\n"
+        )
+
+        purged, removed = purge_stylesheet(css, {"used", "ul", "li", "input", "label"})
+
+        self.assertIn('@import url("fonts.css");', purged)
+        self.assertIn(".used { color: red; }", purged)
+        self.assertIn("ul.used > li:not(.unused)::before", purged)
+        self.assertIn("input[type=\"checkbox\"]:checked + label", purged)
+        self.assertIn("@media print {\n.used { margin: 0; } }", purged)
+        self.assertNotIn("480px", purged)
+        self.assertEqual(removed, [".unused", ".unused"])
+
+    @override_settings(CSS_PURGE_SAFELIST=["editor-callout"])
+    def test_used_tokens_cover_templates_scripts_stored_html_and_safelist(self):
+        PageContent.objects.create(
+            page="homepage",
+            section_type="main_content",
+            title="Rates",
+            content='<div class="table-wrapper"><table class="alt"></table></div>',
+        )
+
+        tokens = used_tokens()
+
+        self.assertTrue({"table-wrapper", "alt", "editor-callout", "is-preload", "inactive"} <= tokens)
+        self.assertIn("posts", tokens)
+        self.assertNotIn("aln-bottom", tokens)
+
+    def test_collectstatic_fingerprints_the_purged_stylesheet(self):
+        temp_dir = tempfile.mkdtemp(prefix="xfed-css-purge-")
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        source_dir = os.path.join(temp_dir, "source")
+        os.makedirs(os.path.join(source_dir, "assets", "css"))
+        with open(os.path.join(source_dir, "assets", "css", "main.css"), "w") as handle:
+            handle.write(".from-admin-content { color: red; }\n.never-used-anywhere { color: blue; }\n")
+        PageContent.objects.create(
+            page="homepage",
+            section_type="main_content",
+            title="Welcome",
+            content='<p class="from-admin-content">Hello</p>',
+        )
+
+        with override_settings(
+            STATIC_ROOT=os.path.join(temp_dir, "static"),
+            STATICFILES_DIRS=[source_dir],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "main.css_purge.PurgedCssStaticFilesStorage"},
+            },
+        ):
+            call_command("collectstatic", "--noinput", verbosity=0)
+
+        static_root = os.path.join(temp_dir, "static")
+        with open(os.path.join(static_root, "staticfiles.json")) as handle:
+            hashed_name = json.load(handle)["paths"]["assets/css/main.css"]
+        with open(os.path.join(static_root, hashed_name)) as handle:
+            collected = handle.read()
+        self.assertIn(".from-admin-content", collected)
+        self.assertNotIn(".never-used-anywhere", collected)
+        with open(os.path.join(static_root, PURGE_REPORT_NAME)) as handle:
+            report = json.load(handle)["assets/css/main.css"]
+        self.assertEqual(report["removed_selectors"], 1)
+        self.assertGreater(report["removed_bytes"], 0)
+
+
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        reset_timing_histograms()
+        self.addCleanup(reset_timing_histograms)
+        self.staff_user = get_user_model().objects.create_user(
+            username="timing_staff",
+            password="strong-test-password",
+            is_staff=True,
+        )
+
+    def test_staff_responses_carry_a_server_timing_header(self):
+        self.client.force_login(self.staff_user)
+
+        header = self.client.get(reverse("index"))["Server-Timing"]
+
+        self.assertRegex(header, r'^db;dur=\d+\.\d;desc="[1-9]\d* queries", template;dur=\d+\.\d;desc="1 calls"')
+        self.assertRegex(header, r"total;dur=\d+\.\d$")
+
+    def test_anonymous_responses_have_no_server_timing_header(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("index")))
+
+    @override_settings(OWNER_NOTIFICATION_EMAILS=["owner@examplebusiness.com"])
+    def test_storage_and_mail_calls_are_timed(self):
+        temp_dir = tempfile.mkdtemp(prefix="xfed-timing-")
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        storage = PublicFileSystemStorage(location=temp_dir, base_url="/media/")
+
+        with measure_request() as timings:
+            storage.url(storage.save("posts/photo.jpg", ContentFile(b"jpeg")))
+            _send_owner_email_alert("New submission", "Details")
+
+        self.assertGreaterEqual(timings.counts["storage"], 2)
+        self.assertEqual(timings.counts["mail"], 1)
+        self.assertIn('storage;dur=', server_timing_header(timings))
+        self.assertIn('mail;dur=', server_timing_header(timings))
+
+    def test_staff_endpoint_reports_percentiles_per_url_name(self):
+        for _ in range(3):
+            self.client.get(reverse("index"))
+        self.client.get("/no-such-page/")
+
+        self.assertEqual(self.client.get(reverse("request_timings")).status_code, 302)
+        self.client.force_login(self.staff_user)
+        summary = self.client.get(reverse("request_timings")).json()
+
+        self.assertEqual(summary["views"]["index"]["count"], 3)
+        self.assertEqual(set(summary["views"]["index"]["total"]), {"p50", "p95", "p99"})
+        self.assertGreater(summary["views"]["index"]["queries"]["p50"], 0)
+        self.assertEqual(summary["views"]["dynamic_page"]["count"], 1)
+        self.assertIn("request_timings", get_timing_summary()["views"])
+
+    def test_histogram_percentiles_are_within_bucket_precision(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.record(float(value))
+
+        for percent in (50, 95, 99):
+            self.assertAlmostEqual(histogram.percentile(percent), percent, delta=percent * 0.05)
+        self.assertEqual(histogram.percentile(100), 100.0)
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+
+class SiteChromeCacheTests(TestCase):
+    def setUp(self):
+        invalidate_site_chrome()
+        self.request = RequestFactory().get("/")
+        ContactInfo.objects.create(
+            email="help@examplebusiness.com",
+            phone="555-0100",
+            address="Remote",
+        )
+        services = NavigationItem.objects.create(title="Services", url="#", order=10)
+        NavigationItem.objects.create(title="Tax Prep", url="/tax-prep/", parent=services, order=10)
+
+    def test_warm_snapshot_renders_base_template_without_queries(self):
+        render_to_string("base.html", request=self.request)
+
+        with self.assertNumQueries(0):
+            html = render_to_string("base.html", request=self.request)
+
+        self.assertIn("help@examplebusiness.com", html)
+        self.assertIn("Tax Prep", html)
+
+    def test_other_workers_invalidation_is_seen_after_check_interval(self):
+        get_site_chrome()
+        ContactInfo.objects.update(email="support@examplebusiness.com")
+        # Another worker bumps the version in the shared cache.
+        cache.set(SITE_CHROME_VERSION_KEY, "bumped-elsewhere", None)
+
+        self.assertEqual(get_site_chrome().contact_info.email, "help@examplebusiness.com")
+        with patch("main.cache_versions.time.monotonic", return_value=time.monotonic() + 60):
+            self.assertEqual(get_site_chrome().contact_info.email, "support@examplebusiness.com")
+
+    def test_saving_chrome_model_invalidates_snapshot_on_commit(self):
+        self.assertEqual(
+            global_context(self.request)["contact_info"].email,
+            "help@examplebusiness.com",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactInfo.objects.update_or_create(
+                pk=ContactInfo.objects.get().pk,
+                defaults={"email": "support@examplebusiness.com"},
+            )
+
+        self.assertEqual(
+            global_context(self.request)["contact_info"].email,
+            "support@examplebusiness.com",
+        )
+
+
+class NavigationTreeTests(TestCase):
+    def test_builds_nested_active_tree_with_one_query(self):
+        services = NavigationItem.objects.create(title="Services", url="#", order=20)
+        NavigationItem.objects.create(title="Home", url="/", order=10)
+        tax = NavigationItem.objects.create(title="Tax", url="/tax/", parent=services, order=20)
+        NavigationItem.objects.create(title="Audit", url="/audit/", parent=services, order=10)
+        NavigationItem.objects.create(title="Hidden", url="/hidden/", parent=services, is_active=False)
+        NavigationItem.objects.create(title="Amended Returns", url="/tax/amended/", parent=tax)
+
+        with self.assertNumQueries(1):
+            tree = build_navigation_tree()
+
+        self.assertEqual([node.title for node in tree.roots], ["Home", "Services"])
+        services_node = tree.roots[1]
+        self.assertEqual([node.title for node in services_node.children], ["Audit", "Tax"])
+        self.assertEqual(services_node.children[1].children[0].title, "Amended Returns")
+        self.assertTrue(tree.has_children(services.pk))
+        self.assertFalse(tree.has_children(tree.roots[0].id))
+
+
+@override_settings(ENABLE_PAGE_CACHE=True)
+@override_settings(CACHES=LOCMEM_CACHES)
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        invalidate_site_chrome()
+        invalidate_page_cache()
+        DynamicPage.objects.create(title="About Us", slug="about-us")
+        self.section = PageContent.objects.create(
+            page="about-us",
+            section_type="main_content",
+            title="Who we are",
+            content="<p>Original copy</p>",
+        )
+
+    def test_anonymous_repeat_request_is_served_without_queries(self):
+        self.client.get("/about-us/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/about-us/")
+
+        self.assertContains(response, "Original copy")
+
+    def test_unlisted_query_strings_bypass_cache(self):
+        self.client.get("/about-us/?utm_source=abc")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/about-us/?utm_source=abc")
+
+        self.assertGreater(len(queries), 0)
+
+    @override_settings(PAGE_CACHE_QUERY_PARAMS=["page", "sort"])
+    def test_listed_query_parameters_are_part_of_the_cache_key(self):
+        self.client.get("/about-us/?sort=new&page=2")
+
+        with self.assertNumQueries(0):
+            self.client.get("/about-us/?page=2&sort=new")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/about-us/?page=3&sort=new")
+        self.assertGreater(len(queries), 0)
+
+    def test_content_change_bumps_page_version(self):
+        self.client.get("/about-us/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.section.content = "<p>Updated copy</p>"
+            self.section.save()
+
+        self.assertContains(self.client.get("/about-us/"), "Updated copy")
+
+    def test_authenticated_requests_bypass_cache(self):
+        staff_user = get_user_model().objects.create_user(
+            username="staff_viewer",
+            password="strong-test-password",
+        )
+        self.client.get("/about-us/")
+        PageContent.objects.filter(pk=self.section.pk).update(content="<p>Draft copy</p>")
+        self.client.force_login(staff_user)
+
+        self.assertContains(self.client.get("/about-us/"), "Draft copy")
+
+
+class PublishedSlugIndexTests(TestCase):
+    def setUp(self):
+        reset_rejected_lookup_count()
+        DynamicPage.objects.create(title="Services", slug="services")
+
+    def test_unknown_paths_are_rejected_without_queries(self):
+        self.client.get("/services/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/wp-login.php/")
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(get_rejected_lookup_count(), 1)
+
+    def test_rejections_reach_the_shared_count_once_per_flush_interval(self):
+        self.client.get("/services/")
+        self.client.get("/wp-login.php/")
+        self.client.get("/.env/")
+
+        self.assertIsNone(cache.get(REJECTED_LOOKUPS_KEY))
+        with patch("main.slug_index.time.monotonic", return_value=time.monotonic() + 60):
+            self.client.get("/xmlrpc.php/")
+        self.assertEqual(cache.get(REJECTED_LOOKUPS_KEY), 3)
+
+    def test_unpublishing_a_page_updates_the_index(self):
+        self.assertEqual(self.client.get("/services/").status_code, 200)
+
+        page = DynamicPage.objects.get(slug="services")
+        page.is_published = False
+        page.save()
+
+        self.assertEqual(self.client.get("/services/").status_code, 404)
+
+
+@override_settings(
+    ENABLE_BACKGROUND_JOBS=True,
+    OWNER_NOTIFICATION_FORM_SLUGS=["join-our-team"],
+    OWNER_NOTIFICATION_EMAILS=["owner1@examplebusiness.com"],
+    ENABLE_SLACK_NOTIFICATIONS=False,
+)
+class BackgroundJobQueueTests(TestCase):
+    def setUp(self):
+        self.form = IntakeForm.objects.create(
+            title="Join Our Team",
+            slug="join-our-team",
+            email_recipients="ops@examplebusiness.com",
+            allow_file_uploads=False,
+        )
+        IntakeField.objects.create(
+            form=self.form,
+            label="Email Address",
+            field_name="email",
+            field_type="email",
+            is_required=True,
+            order=1,
+        )
+
+    @patch("main.views.EmailMessage")
+    def test_submission_enqueues_notifications_instead_of_sending(self, email_message_cls):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("intake_form", kwargs={"slug": self.form.slug}),
+                data={"email": "candidate@business.com"},
+            )
+
+        self.assertEqual(response.status_code, 200)
+        email_message_cls.assert_not_called()
+        self.assertEqual(
+            sorted(BackgroundJob.objects.values_list("task", flat=True)),
+            ["intake_owner_email", "intake_owner_slack", "intake_recipient_email"],
+        )
+
+        call_command("run_jobs", once=True, concurrency=1, stdout=io.StringIO())
+
+        self.assertEqual(email_message_cls.call_count, 2)
+        self.assertEqual(
+            BackgroundJob.objects.filter(status=BackgroundJob.STATUS_DONE).count(),
+            3,
+        )
+
+    @patch("main.views.EmailMessage")
+    def test_failed_jobs_back_off_and_are_dead_lettered(self, email_message_cls):
+        email_message_cls.return_value.send.side_effect = Exception("smtp failure")
+        submission = IntakeSubmission.objects.create(
+            form=self.form,
+            data={"Email Address": "candidate@business.com"},
+        )
+        job = BackgroundJob.objects.create(
+            task="intake_recipient_email",
+            payload={"submission_id": submission.pk, "files": []},
+            max_attempts=2,
+        )
+
+        self.assertFalse(run_job(claim_jobs(1)[0]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_PENDING)
+        self.assertIn("smtp failure", job.last_error)
+        self.assertEqual(claim_jobs(1), [])
+
+        BackgroundJob.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        self.assertFalse(run_job(claim_jobs(1)[0]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_DEAD)
+        self.assertEqual(job.attempts, 2)
+
+    @patch("main.views.EmailMessage")
+    def test_expired_claim_is_not_run(self, email_message_cls):
+        submission = IntakeSubmission.objects.create(form=self.form, data={})
+        BackgroundJob.objects.create(
+            task="intake_recipient_email",
+            payload={"submission_id": submission.pk, "files": []},
+        )
+        stale = claim_jobs(1, visibility_timeout=0)[0]
+        current = claim_jobs(1)[0]
+
+        self.assertIsNone(run_job(stale))
+        email_message_cls.assert_not_called()
+        self.assertTrue(run_job(current))
+        self.assertEqual(email_message_cls.call_count, 1)
+
+    @patch("main.views.EmailMessage")
+    def test_run_reclaimed_mid_send_does_not_record_its_outcome(self, email_message_cls):
+        submission = IntakeSubmission.objects.create(form=self.form, data={})
+        job = BackgroundJob.objects.create(
+            task="intake_recipient_email",
+            payload={"submission_id": submission.pk, "files": []},
+        )
+        stale = claim_jobs(1)[0]
+
+        def reclaim():
+            BackgroundJob.objects.filter(pk=job.pk).update(locked_until=timezone.now())
+            self.reclaimed = claim_jobs(1)[0]
+
+        email_message_cls.return_value.send.side_effect = reclaim
+        self.assertIsNone(run_job(stale))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_RUNNING)
+        self.assertEqual(job.claim_token, self.reclaimed.claim_token)
+
+        email_message_cls.return_value.send.side_effect = None
+        self.assertTrue(run_job(self.reclaimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_DONE)
+        self.assertIsNone(job.claim_token)
+
+
+class IntakeSubmissionFollowupQueryTests(TestCase):
+    def setUp(self):
+        form = IntakeForm.objects.create(
+            title="Followup Form",
+            slug="followup-form",
+            email_recipients="ops@examplebusiness.com",
+        )
+        today = timezone.now().date()
+        self.fresh = IntakeSubmission.objects.create(form=form, data={})
+        self.stale = IntakeSubmission.objects.create(form=form, data={})
+        IntakeSubmission.objects.filter(pk=self.stale.pk).update(
+            submitted_at=timezone.now() - timedelta(days=2)
+        )
+        self.due = IntakeSubmission.objects.create(
+            form=form, data={}, status="contacted", next_followup_date=today
+        )
+        self.scheduled = IntakeSubmission.objects.create(
+            form=form,
+            data={},
+            status="contacted",
+            next_followup_date=today + timedelta(days=3),
+        )
+
+    def test_sql_filter_matches_python_check(self):
+        expected = {s.pk for s in IntakeSubmission.objects.all() if s.needs_followup()}
+
+        self.assertEqual(
+            set(IntakeSubmission.objects.needs_followup().values_list("pk", flat=True)),
+            expected,
+        )
+        self.assertEqual(expected, {self.stale.pk, self.due.pk})
+        flags = dict(
+            IntakeSubmission.objects.with_followup_flag().values_list("pk", "is_followup_due")
+        )
+        self.assertEqual(
+            flags,
+            {
+                self.fresh.pk: False,
+                self.stale.pk: True,
+                self.due.pk: True,
+                self.scheduled.pk: False,
+            },
+        )
+        self.assertIs(flags[self.fresh.pk], False)
+
+    def test_dashboard_stats_use_one_query(self):
+        with self.assertNumQueries(1):
+            stats = IntakeSubmission.objects.dashboard_stats()
+
+        self.assertEqual(stats, {"total": 4, "new": 2, "need_followup": 2})
+
+
+# Keep the version tokens read during the warm-up request for both counts.
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_VERSION_CHECK_INTERVAL=60 * 60)
+class IntakeSubmissionChangelistQueryTests(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.admin_user = user_model.objects.create_superuser(
+            username="admin_changelist",
+            email="admin_changelist@examplebusiness.com",
+            password="strong-test-password",
+        )
+        self.client.force_login(self.admin_user)
+        self.form = IntakeForm.objects.create(
+            title="Changelist Form",
+            slug="changelist-form",
+            email_recipients="ops@examplebusiness.com",
+        )
+
+    def _create_submissions(self, count):
+        IntakeSubmission.objects.bulk_create([
+            IntakeSubmission(
+                form=self.form,
+                data={"Email Address": f"candidate{index}@business.com"},
+                contact_email=f"candidate{index}@business.com",
+                assigned_to=self.admin_user,
+            )
+            for index in range(count)
+        ])
+
+    def _count_changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("admin:main_intakesubmission_changelist"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_full_page_query_count_is_constant(self):
+        self._create_submissions(100)
+        self.client.get(reverse("admin:main_intakesubmission_changelist"))
+        full_page_queries = self._count_changelist_queries()
+
+        self._create_submissions(150)
+
+        self.assertEqual(self._count_changelist_queries(), full_page_queries)
+        self.assertLess(full_page_queries, 20)
+
+    def test_assignment_editor_does_not_render_every_staff_user(self):
+        self._create_submissions(3)
+        get_user_model().objects.bulk_create([
+            get_user_model()(username=f"roster_member_{index}", is_staff=True)
+            for index in range(30)
+        ])
+
+        response = self.client.get(reverse("admin:main_intakesubmission_changelist"))
+
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, "admin_changelist")
+        self.assertNotContains(response, "roster_member_")
@@ -0,0 +1,98 @@
+"""
+Upload handler that validates intake files while the request body streams in.
+
+Django normally buffers every upload (in memory or a temp file) before the
+view can call validate_resume_upload. IntakeUploadGuardHandler sits in front
+of the default handlers and stops reading the request as soon as a file in
+the form's upload field has a disallowed extension, a wrong signature,
+exceeds the size limit, or the submission exceeds the file count limit. The
+reason is left on the request as `intake_upload_error` so the view can
+report it.
+"""
+from pathlib import Path
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from .validators import (
+    ALLOWED_RESUME_EXTENSIONS,
+    ALLOWED_RESUME_EXTENSIONS_DISPLAY,
+    MAX_FILE_SIGNATURE_LENGTH,
+    MAX_FILES_PER_SUBMISSION,
+    MAX_RESUME_FILE_SIZE_BYTES,
+    MAX_RESUME_FILE_SIZE_MB,
+    header_matches_extension,
+)
+
+
+# Form fields whose files the intake view stores (see intake.html).
+INTAKE_UPLOAD_FIELD_NAMES = ("documents",)
+
+
+class IntakeUploadGuardHandler(FileUploadHandler):
+    """
+    Reject bad intake uploads at the first offending chunk. Only files sent
+    in ``field_names`` are checked and counted; the view ignores the rest.
+    """
+
+    def __init__(self, request=None, field_names=INTAKE_UPLOAD_FIELD_NAMES):
+        super().__init__(request)
+        self.field_names = frozenset(field_names)
+        self.file_count = 0
+        self.guarding = False
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.guarding = field_name in self.field_names
+        if not self.guarding:
+            return
+        self.extension = Path(file_name or "").suffix.lower()
+        self.received = 0
+        self.header = b""
+        self.file_count += 1
+
+        if self.file_count > MAX_FILES_PER_SUBMISSION:
+            self._reject(None, f"Upload error: You can upload up to {MAX_FILES_PER_SUBMISSION} files per submission.")
+        if self.extension not in ALLOWED_RESUME_EXTENSIONS:
+            self._reject(
+                field_name,
+                f"Unsupported file format. Allowed formats: {ALLOWED_RESUME_EXTENSIONS_DISPLAY}.",
+            )
+        if content_length is not None and content_length > MAX_RESUME_FILE_SIZE_BYTES:
+            self._reject_oversized()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.guarding:
+            return raw_data
+        self.received += len(raw_data)
+        if self.received > MAX_RESUME_FILE_SIZE_BYTES:
+            self._reject_oversized()
+
+        if len(self.header) < MAX_FILE_SIGNATURE_LENGTH:
+            self.header += raw_data[:MAX_FILE_SIGNATURE_LENGTH - len(self.header)]
+            if len(self.header) >= MAX_FILE_SIGNATURE_LENGTH:
+                self._check_signature()
+
+        # Pass the data through to the handlers that actually store the file.
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Files shorter than the longest signature never filled the header.
+        if self.guarding and len(self.header) < MAX_FILE_SIGNATURE_LENGTH:
+            self._check_signature()
+        return None
+
+    def _check_signature(self):
+        if not header_matches_extension(self.header, self.extension):
+            self._reject(self.field_name, f'File "{self.file_name}" content does not match its extension.')
+
+    def _reject_oversized(self):
+        self._reject(
+            self.field_name,
+            f'File "{self.file_name}" is too large. Maximum size is {MAX_RESUME_FILE_SIZE_MB}MB.',
+        )
+
+    def _reject(self, field_name, reason):
+        if self.request is not None:
+            self.request.intake_upload_error = (field_name, reason)
+        # Don't read (or store) the rest of the request body.
+        raise StopUpload(connection_reset=True)
@@ -58,6 +58,21 @@ PLACEHOLDER_LOCAL_PARTS = {
 }
 
 _DOC_SIGNATURE = b"\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1"
+_ZIP_SIGNATURE = b"PK\x03\x04"
+
+# Leading bytes every allowed upload must start with, by extension.
+FILE_SIGNATURES_BY_EXTENSION = {
+    ".pdf": b"%PDF-",
+    ".doc": _DOC_SIGNATURE,
+    ".docx": _ZIP_SIGNATURE,
+}
+MAX_FILE_SIGNATURE_LENGTH = max(len(signature) for signature in FILE_SIGNATURES_BY_EXTENSION.values())
+
+
+def header_matches_extension(header, extension):
+    """Check the first bytes of a file against the signature for its extension."""
+    signature = FILE_SIGNATURES_BY_EXTENSION.get(extension)
+    return signature is not None and header[:len(signature)] == signature
 
 
 def normalize_and_validate_submission_email(value):
@@ -127,25 +142,23 @@ def _file_signature_matches_extension(uploaded_file, extension):
     return False
 
 
-def _is_pdf(uploaded_file):
+def _read_header(uploaded_file):
     uploaded_file.seek(0)
-    header = uploaded_file.read(5)
+    header = uploaded_file.read(MAX_FILE_SIGNATURE_LENGTH)
     uploaded_file.seek(0)
-    return header == b"%PDF-"
+    return header
+
+
+def _is_pdf(uploaded_file):
+    return header_matches_extension(_read_header(uploaded_file), ".pdf")
 
 
 def _is_doc(uploaded_file):
-    uploaded_file.seek(0)
-    header = uploaded_file.read(8)
-    uploaded_file.seek(0)
-    return header == _DOC_SIGNATURE
+    return header_matches_extension(_read_header(uploaded_file), ".doc")
 
 
 def _is_docx(uploaded_file):
-    uploaded_file.seek(0)
-    zip_signature = uploaded_file.read(4)
-    uploaded_file.seek(0)
-    if zip_signature != b"PK\x03\x04":
+    if not header_matches_extension(_read_header(uploaded_file), ".docx"):
         return False
 
     try:
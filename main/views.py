@@ -1,5 +1,6 @@
 import json
 import logging
+import mimetypes
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
@@ -7,8 +8,18 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.core.mail import EmailMessage
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
-from .models import Banner, Feature, Post, PageContent, DynamicPage, IntakeForm, IntakeSubmission, IntakeFile
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from .models import Banner, Feature, Post, PageContent, DynamicPage, IconSubset, IntakeForm, IntakeSubmission, IntakeFile
+from .icon_fonts import FONT_STYLES, ICON_SUBSET_MAX_AGE
+from .jobs import enqueue_job_on_commit
+from .page_cache import cache_public_page
+from .request_timing import get_timing_summary, timed
+from .slug_index import is_published_slug, reject_unknown_slug
+from .upload_handlers import IntakeUploadGuardHandler
 from .validators import (
     ALLOWED_RESUME_EXTENSIONS_DISPLAY,
     MAX_FILES_PER_SUBMISSION,
@@ -21,6 +32,7 @@ from .validators import (
 logger = logging.getLogger(__name__)
 
 
+@cache_public_page
 def index(request):
     """Homepage view with banner and features"""
     # Get banner content (only one should exist)
@@ -65,6 +77,7 @@ def index(request):
     }
     return render(request, 'index.html', context)
 
+@cache_public_page
 def generic(request):
     """Generic page view - can be made dynamic with PageContent model"""
     # Get page content for generic page
@@ -78,6 +91,7 @@ def generic(request):
     }
     return render(request, 'generic.html', context)
 
+@cache_public_page
 def elements(request):
     """Elements page view - can be made dynamic with PageContent model"""
     # Get page content for elements page
@@ -91,8 +105,13 @@ def elements(request):
     }
     return render(request, 'elements.html', context)
 
+@cache_public_page
 def dynamic_page_view(request, slug):
     """View for handling dynamically created pages"""
+    # Unknown slugs (mostly scanner probes) are rejected without a query.
+    if not is_published_slug(slug):
+        return reject_unknown_slug()
+
     page = get_object_or_404(DynamicPage, slug=slug, is_published=True)
 
     # Get page content sections
@@ -132,8 +151,38 @@ def dynamic_page_view(request, slug):
 
     return render(request, template_name, context)
 
+def icon_subset_stylesheet(request, key):
+    """Serve the Font Awesome subset stylesheet; keys are content hashes, so cache forever."""
+    icon_subset = get_object_or_404(IconSubset.objects.only('stylesheet'), key=key)
+    response = HttpResponse(icon_subset.stylesheet, content_type='text/css; charset=utf-8')
+    patch_cache_control(response, public=True, max_age=ICON_SUBSET_MAX_AGE, immutable=True)
+    return response
+
+def icon_subset_font(request, key, style):
+    """Serve one WOFF2 font of a Font Awesome subset."""
+    if style not in FONT_STYLES:
+        raise Http404("Unknown icon font style")
+    field_name = f'{style}_font'
+    icon_subset = get_object_or_404(IconSubset.objects.only(field_name), key=key)
+    font_data = bytes(getattr(icon_subset, field_name))
+    if not font_data:
+        raise Http404("Icon subset has no glyphs in this style")
+    response = HttpResponse(font_data, content_type='font/woff2')
+    patch_cache_control(response, public=True, max_age=ICON_SUBSET_MAX_AGE, immutable=True)
+    return response
+
+@csrf_exempt
 def intake_form_view(request, slug):
     """View for handling intake forms"""
+    # Validate uploads while they stream in. The handler has to be installed
+    # before anything reads request.POST, which is why CSRF is checked below
+    # instead of in the middleware.
+    request.upload_handlers.insert(0, IntakeUploadGuardHandler(request))
+    return _intake_form_view(request, slug)
+
+
+@csrf_protect
+def _intake_form_view(request, slug):
     form = get_object_or_404(IntakeForm, slug=slug, is_active=True)
 
     if request.method == 'POST':
@@ -159,10 +208,17 @@ def intake_form_view(request, slug):
 def handle_intake_submission(request, form):
     """Handle form submission and file uploads"""
     try:
+        # Parsing the body runs IntakeUploadGuardHandler, which records why it
+        # stopped reading an upload.
+        request.FILES
+        upload_error = getattr(request, 'intake_upload_error', None)
+        if upload_error:
+            _add_upload_error(request, form, *upload_error)
+            return redirect('intake_form', slug=form.slug)
+
         # Collect form data
         form_data = {}
         email_value = None
-        email_field_label = None
         configured_fields = list(form.fields.all())
 
         # Process non-file fields first.
@@ -187,7 +243,6 @@ def handle_intake_submission(request, form):
                         )
                         return redirect('intake_form', slug=form.slug)
                     email_value = normalized_email
-                    email_field_label = field.label
                     form_data[field.label] = normalized_email
                 else:
                     form_data[field.label] = field_value
@@ -210,7 +265,7 @@ def handle_intake_submission(request, form):
         # Prevent duplicate submissions only for configured forms (e.g. join-our-team).
         if (
             _should_enforce_unique_email(form)
-            and _submission_exists_for_email(form, email_value, email_field_label)
+            and _submission_exists_for_email(form, email_value)
         ):
             _add_field_validation_error(
                 request,
@@ -268,19 +323,25 @@ def handle_intake_submission(request, form):
         submission = IntakeSubmission.objects.create(
             form=form,
             data=form_data,
+            contact_email=email_value,
             ip_address=get_client_ip(request)
         )
 
         # Save uploaded files
+        stored_files = []
         for uploaded_file, field_label in uploaded_files:
-            IntakeFile.objects.create(
+            intake_file = IntakeFile.objects.create(
                 submission=submission,
                 file=uploaded_file,
                 original_filename=uploaded_file.name
             )
+            stored_files.append((intake_file, field_label))
 
-        # Send email notification
-        send_intake_notification(form, submission, form_data, uploaded_files)
+        # Send notifications from the job worker when enabled, otherwise inline
+        if getattr(settings, 'ENABLE_BACKGROUND_JOBS', False):
+            enqueue_intake_notifications(form, submission, stored_files)
+        else:
+            send_intake_notification(form, submission, form_data, uploaded_files)
 
         # Show confirmation page after successful submission
         return render(request, 'intake_confirmation.html', { 'form': form })
@@ -301,6 +362,18 @@ def _add_field_validation_error(request, field_label, reason):
     messages.error(request, f"{field_label}: {reason}")
 
 
+def _add_upload_error(request, form, field_name, reason):
+    if field_name is None:
+        messages.error(request, reason)
+        return
+    if field_name == 'documents':
+        field_label = 'Documents'
+    else:
+        field = form.fields.filter(field_name=field_name).first()
+        field_label = field.label if field else field_name
+    _add_field_validation_error(request, field_label, reason)
+
+
 def _should_enforce_unique_email(form):
     unique_email_slugs = getattr(settings, 'UNIQUE_EMAIL_FORM_SLUGS', ['join-our-team'])
     if not unique_email_slugs:
@@ -308,29 +381,13 @@ def _should_enforce_unique_email(form):
     return (form.slug or '').lower() in {slug.lower() for slug in unique_email_slugs}
 
 
-def _submission_exists_for_email(form, email_value, email_field_label):
-    """Check duplicate submissions using an exact, case-insensitive email match."""
+def _submission_exists_for_email(form, email_value):
+    """Check duplicate submissions with an indexed, case-insensitive email match."""
     normalized_email = email_value.strip().lower()
-    existing_data = IntakeSubmission.objects.filter(form=form).values_list('data', flat=True)
-    for data in existing_data:
-        if not isinstance(data, dict):
-            continue
-
-        existing_email = ''
-        if email_field_label:
-            existing_email = (data.get(email_field_label) or '').strip().lower()
-
-        if not existing_email:
-            existing_email = (
-                data.get('Email Address')
-                or data.get('email')
-                or ''
-            ).strip().lower()
-
-        if existing_email == normalized_email:
-            return True
-
-    return False
+    return IntakeSubmission.objects.filter(
+        form=form,
+        contact_email=normalized_email,
+    ).exists()
 
 def get_client_ip(request):
     """Get the client's IP address"""
@@ -343,7 +400,112 @@ def get_client_ip(request):
 
 def send_intake_notification(form, submission, form_data, uploaded_files):
     """Send email notification for new intake submission"""
-    # Prepare shared subject/body for all notification channels.
+    subject, message_body = _build_intake_message(form, submission, form_data, uploaded_files)
+
+    try:
+        _send_intake_recipient_email(form, subject, message_body, uploaded_files)
+    except Exception as exc:
+        logger.exception(
+            "Error sending intake recipient email for form '%s': %s",
+            form.slug,
+            str(exc),
+        )
+
+    if _should_notify_owners(form):
+        try:
+            _send_owner_email_alert(subject, message_body)
+        except Exception as exc:
+            logger.exception(
+                "Error sending owner alert email for form '%s': %s",
+                form.slug,
+                str(exc),
+            )
+
+        try:
+            _send_owner_slack_alert(form, submission, form_data, uploaded_files)
+        except Exception as exc:
+            logger.exception(
+                "Error sending owner Slack alert for form '%s': %s",
+                form.slug,
+                str(exc),
+            )
+
+
+def enqueue_intake_notifications(form, submission, stored_files):
+    """
+    Queue one background job per notification channel once the submission is
+    committed. `stored_files` is a list of (IntakeFile, field label) pairs.
+    """
+    payload = {
+        'submission_id': submission.pk,
+        'files': [[intake_file.pk, field_label] for intake_file, field_label in stored_files],
+    }
+    if _get_intake_recipients(form):
+        enqueue_job_on_commit('intake_recipient_email', payload)
+    if _should_notify_owners(form):
+        enqueue_job_on_commit('intake_owner_email', payload)
+        enqueue_job_on_commit('intake_owner_slack', payload)
+
+
+def deliver_intake_recipient_email(payload):
+    """Background job: email the form recipients with the uploads attached."""
+    submission, uploaded_files = _load_queued_submission(payload, include_content=True)
+    subject, message_body = _build_intake_message(
+        submission.form, submission, submission.data, uploaded_files
+    )
+    _send_intake_recipient_email(submission.form, subject, message_body, uploaded_files)
+
+
+def deliver_intake_owner_email(payload):
+    """Background job: send the owner alert email."""
+    submission, uploaded_files = _load_queued_submission(payload)
+    subject, message_body = _build_intake_message(
+        submission.form, submission, submission.data, uploaded_files
+    )
+    _send_owner_email_alert(subject, message_body)
+
+
+def deliver_intake_owner_slack(payload):
+    """Background job: post the owner alert to Slack."""
+    submission, uploaded_files = _load_queued_submission(payload)
+    _send_owner_slack_alert(
+        submission.form, submission, submission.data, uploaded_files, raise_errors=True
+    )
+
+
+def _load_queued_submission(payload, include_content=False):
+    """
+    Rebuild (uploaded file, field label) pairs for a queued notification from
+    the stored IntakeFile rows. Blob contents are only read when attaching.
+    """
+    submission = IntakeSubmission.objects.select_related('form').get(pk=payload['submission_id'])
+    files_by_id = {intake_file.pk: intake_file for intake_file in submission.files.all()}
+
+    uploaded_files = []
+    for file_id, field_label in payload.get('files', []):
+        intake_file = files_by_id.get(file_id)
+        if intake_file is None:
+            continue
+
+        content = b''
+        if include_content:
+            with intake_file.file.open('rb') as stored_file:
+                content = stored_file.read()
+
+        filename = intake_file.original_filename or intake_file.file.name
+        uploaded_files.append((
+            SimpleUploadedFile(
+                filename,
+                content,
+                content_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            ),
+            field_label,
+        ))
+    return submission, uploaded_files
+
+
+def _build_intake_message(form, submission, form_data, uploaded_files):
+    """Prepare shared subject/body for all notification channels."""
     subject = f"New {form.title} Submission"
     message_lines = [
         f"New submission received for: {form.title}",
@@ -366,53 +528,36 @@ def send_intake_notification(form, submission, form_data, uploaded_files):
         for uploaded_file, field_label in uploaded_files:
             message_lines.append(f"- {uploaded_file.name} ({field_label})")
 
-    message_body = "\n".join(message_lines)
+    return subject, "\n".join(message_lines)
 
-    recipients = [email.strip() for email in form.email_recipients.split('\n') if email.strip()]
-    if recipients:
-        try:
-            email = EmailMessage(
-                subject=subject,
-                body=message_body,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@xfedtax.com'),
-                to=recipients,
-            )
 
-            # Attach files if any
-            for uploaded_file, _field_label in uploaded_files:
-                uploaded_file.seek(0)
-                email.attach(
-                    uploaded_file.name,
-                    uploaded_file.read(),
-                    uploaded_file.content_type or "application/octet-stream",
-                )
+def _get_intake_recipients(form):
+    return [email.strip() for email in form.email_recipients.split('\n') if email.strip()]
 
-            email.send()
-        except Exception as exc:
-            logger.exception(
-                "Error sending intake recipient email for form '%s': %s",
-                form.slug,
-                str(exc),
-            )
 
-    if _should_notify_owners(form):
-        try:
-            _send_owner_email_alert(subject, message_body)
-        except Exception as exc:
-            logger.exception(
-                "Error sending owner alert email for form '%s': %s",
-                form.slug,
-                str(exc),
-            )
+def _send_intake_recipient_email(form, subject, message_body, uploaded_files):
+    recipients = _get_intake_recipients(form)
+    if not recipients:
+        return
 
-        try:
-            _send_owner_slack_alert(form, submission, form_data, uploaded_files)
-        except Exception as exc:
-            logger.exception(
-                "Error sending owner Slack alert for form '%s': %s",
-                form.slug,
-                str(exc),
-            )
+    email = EmailMessage(
+        subject=subject,
+        body=message_body,
+        from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@xfedtax.com'),
+        to=recipients,
+    )
+
+    # Attach files if any
+    for uploaded_file, _field_label in uploaded_files:
+        uploaded_file.seek(0)
+        email.attach(
+            uploaded_file.name,
+            uploaded_file.read(),
+            uploaded_file.content_type or "application/octet-stream",
+        )
+
+    with timed('mail'):
+        email.send()
 
 
 def _should_notify_owners(form):
@@ -434,10 +579,11 @@ def _send_owner_email_alert(subject, message_body):
         from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@xfedtax.com'),
         to=recipients,
     )
-    owner_email.send()
+    with timed('mail'):
+        owner_email.send()
 
 
-def _send_owner_slack_alert(form, submission, form_data, uploaded_files):
+def _send_owner_slack_alert(form, submission, form_data, uploaded_files, raise_errors=False):
     if not getattr(settings, 'ENABLE_SLACK_NOTIFICATIONS', False):
         return
 
@@ -479,7 +625,7 @@ def _send_owner_slack_alert(form, submission, form_data, uploaded_files):
             },
         ],
     }
-    _post_slack_webhook(webhook_url, payload)
+    _post_slack_webhook(webhook_url, payload, raise_errors=raise_errors)
 
 
 def _extract_client_identifier(form_data):
@@ -495,7 +641,7 @@ def _extract_client_identifier(form_data):
     return "unknown sender"
 
 
-def _post_slack_webhook(webhook_url, payload):
+def _post_slack_webhook(webhook_url, payload, raise_errors=False):
     request = Request(
         webhook_url,
         data=json.dumps(payload).encode("utf-8"),
@@ -506,6 +652,8 @@ def _post_slack_webhook(webhook_url, payload):
         with urlopen(request, timeout=10):
             return
     except (HTTPError, URLError) as exc:
+        if raise_errors:
+            raise
         logger.exception("Failed to send Slack notification: %s", str(exc))
 
 
@@ -677,3 +825,9 @@ def add_page_popup(request):
         return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
     return _add_page_popup_view(request)
+
+
+@staff_member_required
+def request_timings(request):
+    """p50/p95/p99 per URL name for this worker (see main/request_timing.py)."""
+    return JsonResponse(get_timing_summary(), json_dumps_params={'indent': 2})
@@ -88,6 +88,7 @@ if USE_S3_FOR_MEDIA:
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'main.request_timing.RequestTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,7 +101,8 @@ ROOT_URLCONF = 'xfed.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that also reports render time (see main/request_timing.py).
+        'BACKEND': 'main.request_timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -167,6 +169,24 @@ STATICFILES_DIRS = [
 # Static files collection for production
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic shrinks bundled JPEG/PNG images to fit these bounds and adds
+# WebP/AVIF siblings. Encoded results are cached here by source hash, so keep
+# the directory between builds to skip re-encoding unchanged images.
+STATIC_IMAGE_MAX_WIDTH = int(os.environ.get('STATIC_IMAGE_MAX_WIDTH', '1920'))
+STATIC_IMAGE_MAX_HEIGHT = int(os.environ.get('STATIC_IMAGE_MAX_HEIGHT', '1920'))
+STATIC_IMAGE_FORMATS = _env_list('STATIC_IMAGE_FORMATS', 'avif,webp')
+STATIC_IMAGE_CACHE_DIR = os.environ.get(
+    'STATIC_IMAGE_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'static-images')
+)
+# collectstatic also drops main.css rules that no template, theme script or
+# stored page HTML uses (see main/css_purge.py). List here any extra classes
+# editors type into admin content so they survive until the next build.
+CSS_PURGE_SAFELIST = _env_list('CSS_PURGE_SAFELIST', '')
+# build.sh writes each page template's above-the-fold CSS here (see
+# main/critical_css.py). It's rendered from the live content, so it isn't
+# committed; without it pages just load main.css blocking.
+CRITICAL_CSS_ROOT = os.environ.get('CRITICAL_CSS_ROOT', os.path.join(BASE_DIR, 'critical_css'))
+
 # Media files (user uploads)
 if USE_S3_FOR_MEDIA:
     AWS_STORAGE_BUCKET_NAME = os.environ.get('AWS_STORAGE_BUCKET_NAME')
@@ -182,6 +202,19 @@ if USE_S3_FOR_MEDIA:
     AWS_MEDIA_LOCATION = os.environ.get('AWS_MEDIA_LOCATION', 'media')
     AWS_DEFAULT_ACL = None
     AWS_QUERYSTRING_AUTH = _env_bool('AWS_QUERYSTRING_AUTH', True)
+    # If the public storage signs URLs, each process reuses them for
+    # MEDIA_URL_CACHE_TIMEOUT seconds, and cached pages may embed them for
+    # another PAGE_CACHE_TIMEOUT, so signatures must outlive both. Intake
+    # file URLs are signed per request and never reused.
+    AWS_QUERYSTRING_EXPIRE = int(os.environ.get('AWS_QUERYSTRING_EXPIRE', 60 * 60 * 2))
+    MEDIA_URL_CACHE_TIMEOUT = int(os.environ.get('MEDIA_URL_CACHE_TIMEOUT', 60 * 50))
+
+    # Site-content images (the `public` storage) are served unsigned with
+    # immutable cache headers from their own prefix. The bucket policy (or
+    # AWS_PUBLIC_MEDIA_DEFAULT_ACL) must allow public reads of that prefix.
+    AWS_PUBLIC_MEDIA_BUCKET_NAME = os.environ.get('AWS_PUBLIC_MEDIA_BUCKET_NAME', AWS_STORAGE_BUCKET_NAME)
+    AWS_PUBLIC_MEDIA_LOCATION = os.environ.get('AWS_PUBLIC_MEDIA_LOCATION', 'public')
+    AWS_PUBLIC_MEDIA_DEFAULT_ACL = os.environ.get('AWS_PUBLIC_MEDIA_DEFAULT_ACL') or None
     AWS_S3_FILE_OVERWRITE = False
     AWS_S3_OBJECT_PARAMETERS = {
         'CacheControl': 'max-age=86400',
@@ -203,7 +236,7 @@ else:
     MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 staticfiles_backend = (
-    'whitenoise.storage.CompressedManifestStaticFilesStorage'
+    'main.js_bundle.BundledJsStaticFilesStorage'
     if not DEBUG
     else 'django.contrib.staticfiles.storage.StaticFilesStorage'
 )
@@ -211,16 +244,29 @@ staticfiles_backend = (
 if USE_S3_FOR_MEDIA:
     STORAGES = {
         'default': {
-            'BACKEND': 'storages.backends.s3.S3Storage',
+            'BACKEND': 'main.storage.BatchDeleteS3Storage',
             'OPTIONS': {
                 'bucket_name': AWS_STORAGE_BUCKET_NAME,
                 'location': AWS_MEDIA_LOCATION,
                 'default_acl': AWS_DEFAULT_ACL,
                 'querystring_auth': AWS_QUERYSTRING_AUTH,
-                'file_overwrite': AWS_S3_FILE_OVERWRITE,
+                'querystring_expire': AWS_QUERYSTRING_EXPIRE,
+                # Intake uploads are stored under content-addressed names, so
+                # skip the HEAD request that probes for a free name on every
+                # upload; an existing object under a name has the same bytes.
+                'file_overwrite': True,
                 'object_parameters': AWS_S3_OBJECT_PARAMETERS,
             },
         },
+        'public': {
+            'BACKEND': 'main.storage.PublicMediaS3Storage',
+            'OPTIONS': {
+                'bucket_name': AWS_PUBLIC_MEDIA_BUCKET_NAME,
+                'location': AWS_PUBLIC_MEDIA_LOCATION,
+                'default_acl': AWS_PUBLIC_MEDIA_DEFAULT_ACL,
+                'file_overwrite': AWS_S3_FILE_OVERWRITE,
+            },
+        },
         'staticfiles': {
             'BACKEND': staticfiles_backend,
         },
@@ -230,11 +276,58 @@ else:
         'default': {
             'BACKEND': 'django.core.files.storage.FileSystemStorage',
         },
+        'public': {
+            'BACKEND': 'main.storage.PublicFileSystemStorage',
+        },
         'staticfiles': {
             'BACKEND': staticfiles_backend,
         },
     }
 
+# How the admin serves intake file previews: 'redirect' (302 to a presigned
+# S3 URL), 'accel' (nginx X-Accel-Redirect to INTAKE_FILE_ACCEL_PREFIX, which
+# must be an internal location aliased to MEDIA_ROOT), 'sendfile' (X-Sendfile;
+# falls back to 'redirect' on storages without local paths) or 'proxy'
+# (stream through Django with Range support).
+INTAKE_FILE_DELIVERY = os.environ.get(
+    'INTAKE_FILE_DELIVERY',
+    'redirect' if USE_S3_FOR_MEDIA else 'proxy',
+)
+INTAKE_FILE_ACCEL_PREFIX = os.environ.get('INTAKE_FILE_ACCEL_PREFIX', '/protected-media/')
+INTAKE_FILE_URL_EXPIRE = int(os.environ.get('INTAKE_FILE_URL_EXPIRE', 300))
+
+# The cache holds the version tokens that invalidate the site chrome, page
+# cache, slug index, staff choices and icon set (see main/cache_versions.py),
+# so every process - all gunicorn workers and `run_jobs` - must share it.
+# The default is the database (build.sh runs createcachetable); Redis or
+# Memcached work too. LocMemCache is per process: only use it when a single
+# process serves the site, or other workers keep stale data.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache',
+        ),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'xfed_cache'),
+    }
+}
+
+# Each process re-reads those version tokens at most this often (seconds),
+# so warm requests don't query the cache table. Other workers see an
+# invalidation within this interval.
+CACHE_VERSION_CHECK_INTERVAL = float(os.environ.get('CACHE_VERSION_CHECK_INTERVAL', 5))
+
+# Opt-in full-response cache for anonymous visitors to the public pages.
+ENABLE_PAGE_CACHE = _env_bool('ENABLE_PAGE_CACHE', False)
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 60))
+# Query parameters that change what a cached page shows. Requests carrying
+# any other parameter are rendered without the cache.
+PAGE_CACHE_QUERY_PARAMS = _env_list('PAGE_CACHE_QUERY_PARAMS', '')
+
+# Per-request DB/template/storage/mail timing: a Server-Timing header for
+# staff and per-view percentiles at /admin-helper/request-timings/.
+ENABLE_REQUEST_TIMING = _env_bool('ENABLE_REQUEST_TIMING', True)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -268,6 +361,10 @@ ENABLE_SLACK_NOTIFICATIONS = _env_bool('ENABLE_SLACK_NOTIFICATIONS', False)
 SLACK_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL', '')
 SLACK_NOTIFICATION_MENTION = os.environ.get('SLACK_NOTIFICATION_MENTION', '')
 
+# Send intake notifications from the `manage.py run_jobs` worker instead of
+# inside the request. Requires a worker process to be running.
+ENABLE_BACKGROUND_JOBS = _env_bool('ENABLE_BACKGROUND_JOBS', False)
+
 # For development, use console backend if no email configured
 if DEBUG and not EMAIL_HOST_USER:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
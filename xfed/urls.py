@@ -37,6 +37,10 @@ urlpatterns = [
     path('elements/', views.elements, name='elements'),
     # Admin helper views
     path('admin-helper/add-page/', views.add_page_popup, name='add_page_popup'),
+    path('admin-helper/request-timings/', views.request_timings, name='request_timings'),
+    # Font Awesome subset (see main/icon_fonts.py)
+    path('assets/icons/<slug:key>.css', views.icon_subset_stylesheet, name='icon_subset_stylesheet'),
+    path('assets/icons/<slug:key>/<slug:style>.woff2', views.icon_subset_font, name='icon_subset_font'),
     # Intake forms
     path('intake/<slug:slug>/', views.intake_form_view, name='intake_form'),
     # Dynamic pages - these should be last to catch custom page URLs